@@ -0,0 +1,275 @@
+# Usage:
+#   To benchmark the roms in testdata/:  python bench/run.py
+#   To save the results:  python bench/run.py --output=bench_results.json
+#   To check for regressions against saved results:
+#     python bench/run.py --compare=bench_results.json
+#   To benchmark other roms:  python bench/run.py --roms="roms/*.nes"
+#   To run some of the cases:  python bench/run.py --cases="parse process_level"
+#
+# Each rom is also benchmarked as --variants synthetic variants from rom_generator.py, so that the
+# walks don't only see the layouts of the fixtures.
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import cli
+from data_extractor import DataExtractor
+from rom_generator import RomGenerator
+from rom_image import RomImage
+from rom_probe import Probe, ProbeFile
+from rom_reader import RomReader
+
+DEFAULT_ROMS = os.path.join(REPO_DIR, 'testdata', '*.nes')
+
+
+def LoadRoms(pattern, num_variants, seed):
+    """Returns (name, rom bytes) pairs for the fixtures and generated variants of them."""
+    roms = []
+    for file_path in sorted(glob.glob(pattern)):
+        with open(file_path, 'rb') as f:
+            roms.append((os.path.basename(file_path), f.read()))
+    if not roms:
+        print('No roms matched %s, using generated roms instead.' % pattern, file=sys.stderr)
+        roms.append(('synthetic', RomGenerator(seed=seed).Generate(0)))
+    for name, rom in list(roms):
+        generator = RomGenerator(rom, seed=seed)
+        for variant_num in range(1, num_variants + 1):
+            roms.append(('%s~%d' % (name, variant_num), generator.Generate(variant_num)))
+    return roms
+
+
+def SetupRomReader(rom_path, rom):
+
+    def ReadRom():
+        rom_reader = RomReader(RomImage(rom))
+        for level_num in [0, 1, 7]:
+            rom_reader.GetLevelBlock(level_num)
+        for level_num in range(0, 10):
+            rom_reader.GetLevelInfo(level_num)
+        rom_reader.GetRequirements()
+        rom_reader.GetOverworldItemData()
+        rom_reader.GetRecorderText()
+
+    return ReadRom
+
+
+def SetupProbe(rom_path, rom):
+    return lambda: Probe(rom)
+
+
+def SetupProbeFile(rom_path, rom):
+    return lambda: ProbeFile(rom_path)
+
+
+def SetupDataExtractorInit(rom_path, rom):
+    return lambda: DataExtractor(RomImage(rom))
+
+
+def SetupParse(rom_path, rom):
+    return DataExtractor(RomImage(rom)).Parse
+
+
+def SetupGetQuotes(rom_path, rom):
+    de = DataExtractor(RomImage(rom))
+    return de.GetQuotes
+
+
+def SetupProcessLevel(level_num):
+
+    def Setup(rom_path, rom):
+        de = DataExtractor(RomImage(rom))
+        return lambda: de.ProcessLevel(level_num)
+
+    return Setup
+
+
+def SetupCliExport(rom_path, rom):
+    return lambda: cli.ProcessFile(rom_path)
+
+
+def SetupLevelFigures(level_figures):
+
+    def Setup(rom_path, rom):
+        de = DataExtractor(RomImage(rom))
+
+        def BuildLevelFigures():
+            for level_num in range(1, 10):
+                level_figures.BuildLevelFigure(de, level_num)
+
+        return BuildLevelFigures
+
+    return Setup
+
+
+def SetupFullSeedFigure(level_figures):
+
+    def Setup(rom_path, rom):
+        de = DataExtractor(RomImage(rom))
+        return lambda: level_figures.BuildFullSeedFigure(de)
+
+    return Setup
+
+
+def SetupFullSeedJson(level_figures):
+
+    def Setup(rom_path, rom):
+        from bokeh.embed import json_item
+        # streamlit_bokeh sends the figure to the browser as this JSON.
+        layout = level_figures.BuildFullSeedFigure(DataExtractor(RomImage(rom)))
+        return lambda: json.dumps(json_item(layout))
+
+    return Setup
+
+
+def GetCases():
+    """Returns (name, calls per sample, setup) triples.
+
+    setup(rom_path, rom) does any untimed preparation and returns the function
+    to time. Each sample times `calls per sample` calls. If the function returns
+    a str, its length is reported as the case's output size.
+    """
+    cases = [
+        ('probe', 1000, SetupProbe),
+        ('probe_file', 1000, SetupProbeFile),
+        ('rom_reader', 100, SetupRomReader),
+        ('data_extractor_init', 20, SetupDataExtractorInit),
+        ('parse', 1, SetupParse),
+        ('get_quotes', 10, SetupGetQuotes),
+    ]
+    for level_num in range(1, 10):
+        cases.append(('process_level_%d' % level_num, 1, SetupProcessLevel(level_num)))
+    cases.append(('cli_export', 1, SetupCliExport))
+    try:
+        import level_figures
+    except ImportError as e:
+        print('Skipping app benchmarks: %s' % e, file=sys.stderr)
+    else:
+        cases.append(('app_level_figures', 1, SetupLevelFigures(level_figures)))
+        cases.append(('app_full_seed_figure', 1, SetupFullSeedFigure(level_figures)))
+        cases.append(('app_full_seed_json', 1, SetupFullSeedJson(level_figures)))
+    return cases
+
+
+def TimeCase(setup, rom_path, rom, calls, repeat):
+    """Returns the seconds per call of each of `repeat` samples, and the size of the last call's
+    output or None."""
+    times = []
+    size = None
+    for _ in range(repeat):
+        runs = [setup(rom_path, rom) for _ in range(calls)]
+        start = time.perf_counter()
+        for run in runs:
+            output = run()
+        times.append((time.perf_counter() - start) / calls)
+        if isinstance(output, str):
+            size = len(output)
+    return times, size
+
+
+def RunBenchmarks(roms, case_filter, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory() as rom_dir:
+        rom_paths = []
+        for name, rom in roms:
+            rom_paths.append(os.path.join(rom_dir, name.replace(os.sep, '_')))
+            with open(rom_paths[-1], 'wb') as f:
+                f.write(rom)
+        for case_name, calls, setup in GetCases():
+            if case_filter and not any(pattern in case_name for pattern in case_filter):
+                continue
+            per_rom = {}
+            for (name, rom), rom_path in zip(roms, rom_paths):
+                times, size = TimeCase(setup, rom_path, rom, calls, repeat)
+                per_rom[name] = {'min': min(times), 'median': statistics.median(times)}
+                if size is not None:
+                    per_rom[name]['size'] = size
+            results[case_name] = {
+                'min': statistics.fmean(stats['min'] for stats in per_rom.values()),
+                'median': statistics.fmean(stats['median'] for stats in per_rom.values()),
+                'roms': per_rom,
+            }
+            line = '%-20s %10.3f ms' % (case_name, results[case_name]['min'] * 1000)
+            if all('size' in stats for stats in per_rom.values()):
+                results[case_name]['size'] = statistics.fmean(
+                    stats['size'] for stats in per_rom.values())
+                line += ' %10.0f KB' % (results[case_name]['size'] / 1024)
+            print(line, file=sys.stderr)
+    return results
+
+
+def CompareResults(baseline, results, threshold):
+    """Prints each case's change from the baseline and returns the names of regressed cases."""
+    regressions = []
+    print('%-20s %12s %12s %8s' % ('case', 'baseline ms', 'current ms', 'change'))
+    for case_name, stats in results.items():
+        if case_name not in baseline['cases']:
+            print('%-20s %12s %12.3f' % (case_name, '-', stats['min'] * 1000))
+            continue
+        before = baseline['cases'][case_name]['min']
+        change = stats['min'] / before - 1 if before else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(case_name)
+            flag = '  REGRESSION'
+        print('%-20s %12.3f %12.3f %+7.1f%%%s' %
+              (case_name, before * 1000, stats['min'] * 1000, change * 100, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--roms', type=str, default=DEFAULT_ROMS, help='Glob of roms to benchmark')
+    parser.add_argument('--variants',
+                        type=int,
+                        default=2,
+                        help='Number of generated variants of each rom to benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the generated variants')
+    parser.add_argument('--repeat', type=int, default=5, help='Samples to take per case and rom')
+    parser.add_argument('--cases',
+                        type=str,
+                        default='',
+                        help='Only run cases whose names contain one of these words')
+    parser.add_argument('--output', type=str, default=None, help='File to save results to as JSON')
+    parser.add_argument('--compare',
+                        type=str,
+                        default=None,
+                        help='JSON results to compare against; exits with 1 on a regression')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=0.1,
+                        help='Slowdown of a case\'s best time that counts as a regression')
+    args = parser.parse_args()
+
+    roms = LoadRoms(args.roms, args.variants, args.seed)
+    results = RunBenchmarks(roms, args.cases.split(), args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(
+                {
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'roms': [name for name, _ in roms],
+                    'repeat': args.repeat,
+                    'cases': results,
+                },
+                f,
+                indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if CompareResults(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
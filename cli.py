@@ -2,43 +2,157 @@
 #   For a single file:  python cli.py --files=rom.nes
 #   For a set of files:  python cli.py --files="rom1.nes rom2.nes"
 #   For a glob of files:  python cli.py --files="*.nes"
+#   To read files into memory instead of mapping them:  python cli.py --no-mmap --files=rom.nes
+#   To parse on every core:  python cli.py --jobs=0 --files="*.nes"
+#   To print roms as they finish instead of in order:  python cli.py --jobs=0 --no-ordered ...
+#   To reuse parse results across runs:  python cli.py --cache-dir=~/.cache/z1r --files="*.nes"
+#   To only parse roms that are new or changed since the last run:
+#     python cli.py --manifest=~/.cache/z1r-corpus --files="*.nes"
+#   To skip roms that are truncated, headerless or have an unknown layout without parsing them:
+#     python cli.py --probe --files="*.nes"
+#   To print one JSON object per row:  python cli.py --format=ndjson --files="*.nes"
+#   To write a table per kind of row:  python cli.py --format=parquet --output-dir=out --files=...
+#   To print per-stage parse timings to stderr:  python cli.py --profile --files="*.nes"
+#   To also save a cProfile dump for pstats/snakeviz:  python cli.py --pstats=parse.prof ...
 
 import argparse
+import contextlib
 import glob
-import io
+import importlib.util
+import itertools
+import json
 import os
-from data_extractor import DataExtractor
-from constants import CAVE_NAME, ITEM_TYPES
-
-
-def GenerateLevelCSVLine(file_path, level_num, data):
-    ret = [file_path, str(level_num)]
-    ret.append(data['room_num'])
-    ret.append(data['room_type'])
-    ret.append(data['enemy_info'] or 'No Enemies')
-    ret.append(data['item_info'] or 'No Item')
-    ret.append(data['stair_info'] or 'No Stairway')
-    ret.append(data['north.wall_type'])
-    ret.append(data['west.wall_type'])
-    ret.append(data['east.wall_type'])
-    ret.append(data['south.wall_type'])
-    return ','.join(ret)
-
-
-def GenerateOverworldCSVLine(file_path, data):
-    if not data['screen_num']:
+import sys
+import time
+from export_rows import PARSE_ERROR, READ_ERROR, ErrorRow, IterFileRows
+from row_writers import FORMATS, OpenRowWriter
+
+
+def ProcessFile(file_path, use_mmap=True, cache_dir=None, probe=False):
+    """Returns the rows for one rom, which are a single ErrorRow if it can't be parsed."""
+    return list(IterFileRows(file_path, use_mmap, cache_dir, probe))
+
+
+def IterProcessedFiles(files_to_process,
+                       use_mmap=True,
+                       jobs=1,
+                       ordered=True,
+                       cache_dir=None,
+                       probe=False):
+    """Yields (file_path, rows) pairs, fanning the work out to `jobs` processes.
+
+    jobs=0 uses one process per core. With ordered=False, results are yielded
+    as soon as each file finishes instead of in input order.
+    """
+    if jobs == 1:
+        for file_path in files_to_process:
+            yield file_path, IterFileRows(file_path, use_mmap, cache_dir, probe)
         return
-    ret = [file_path, 'Overworld']
-    ret.append(data['screen_num'])
-    ret.append(data['cave_name'])
-    ret.append(data['block_type'])
-    return ','.join(ret)
+
+    # Only pay for the process pool machinery when it's used.
+    import concurrent.futures
+    max_workers = jobs or os.cpu_count()
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        if ordered:
+            chunksize = max(1, min(16, len(files_to_process) // (max_workers * 4)))
+            results = executor.map(ProcessFile,
+                                   files_to_process,
+                                   itertools.repeat(use_mmap),
+                                   itertools.repeat(cache_dir),
+                                   itertools.repeat(probe),
+                                   chunksize=chunksize)
+            yield from zip(files_to_process, results)
+        else:
+            futures = {
+                executor.submit(ProcessFile, file_path, use_mmap, cache_dir, probe): file_path
+                for file_path in files_to_process
+            }
+            for future in concurrent.futures.as_completed(futures):
+                yield futures[future], future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def IterManifestFiles(manifest, files_to_process, **kwargs):
+    """Like IterProcessedFiles, but only parses roms the manifest doesn't have current rows for.
+
+    The new rows are recorded in the manifest and every rom's rows come from it, except for
+    roms that couldn't be read or parsed, which are tried again on the next run.
+    """
+    stale_files = [file_path for file_path in files_to_process if not manifest.IsCurrent(file_path)]
+    unrecorded = {}
+    for file_path, rows in IterProcessedFiles(stale_files, **kwargs):
+        rows = list(rows)
+        if any(isinstance(row, ErrorRow) and row.error.startswith((PARSE_ERROR, READ_ERROR))
+               for row in rows):
+            unrecorded[file_path] = rows
+            continue
+        try:
+            manifest.Record(file_path, rows)
+        except OSError:
+            # The rom went away after it was parsed.
+            unrecorded[file_path] = rows
+    for file_path in files_to_process:
+        if file_path in unrecorded:
+            yield file_path, unrecorded[file_path]
+        else:
+            yield file_path, manifest.GetRows(file_path)
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--files', type=str, required=True, help='Roms to process and print')
+    parser.add_argument('--mmap',
+                        action=argparse.BooleanOptionalAction,
+                        default=True,
+                        help='Map roms read-only instead of reading them into memory')
+    parser.add_argument('--jobs',
+                        type=int,
+                        default=1,
+                        help='Number of worker processes to parse roms in (0 = one per core)')
+    parser.add_argument('--ordered',
+                        action=argparse.BooleanOptionalAction,
+                        default=True,
+                        help='Print roms in input order rather than as they finish')
+    parser.add_argument('--cache-dir',
+                        type=str,
+                        default=None,
+                        help='Directory to cache parse results in, keyed by rom contents')
+    parser.add_argument('--probe',
+                        action='store_true',
+                        help='Skip roms that are truncated, have no iNES header or have an unknown '
+                        'level layout instead of parsing them')
+    parser.add_argument('--format',
+                        choices=FORMATS,
+                        default='lines',
+                        help='lines: the original comma-joined lines. csv, parquet: a table per '
+                        'kind of row in --output-dir. ndjson: a JSON object per row')
+    parser.add_argument('--output-dir',
+                        type=str,
+                        default=None,
+                        help='Directory to write csv, parquet or ndjson tables to')
+    parser.add_argument('--manifest',
+                        type=str,
+                        default=None,
+                        help='Directory to keep an index of processed roms and their rows in, so '
+                        'that re-runs only parse new or changed roms')
+    parser.add_argument('--profile',
+                        action='store_true',
+                        help='Print a JSON summary of time spent in each parse stage and of rom '
+                        'reads to stderr')
+    parser.add_argument('--pstats',
+                        type=str,
+                        default=None,
+                        help='File to save a cProfile dump of the run to. Implies --profile')
     args = parser.parse_args()
+    if args.format in ['csv', 'parquet'] and not args.output_dir:
+        parser.error('--format=%s needs --output-dir' % args.format)
+    if args.format == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        parser.error('--format=parquet needs pyarrow (pip install pyarrow)')
+    args.profile |= bool(args.pstats)
+    if args.profile and args.jobs != 1:
+        parser.error('--profile only sees parses in this process, so it needs --jobs=1')
     files_to_process = []
     for pattern in args.files.split(' '):
         if '*' in pattern:
@@ -46,74 +160,44 @@ def main():
         else:
             files_to_process.append(pattern)
 
-    for file_path in files_to_process:
-        with open(file_path, 'rb') as f:
-            rom = io.BytesIO(f.read())
-            data_extractor = DataExtractor(rom=rom)
-            try:
-                data_extractor.Parse()
-            except IndexError:
-                print("Error parsing level data in %s." % file_path)
-                exit()
-
-            # Print out room data for each level
-            for level in range(1, 10):
-                if level in data_extractor.data:
-                    for room in data_extractor.data[level]:
-                        print(
-                            GenerateLevelCSVLine(file_path, level,
-                                                 data_extractor.data[level][room]))
-
-            # Print out overworld screens
-            if data_extractor.data:
-                for screen_num in data_extractor.data[0]:
-                    print(GenerateOverworldCSVLine(file_path, data_extractor.data[0][screen_num]))
-
-            # Caves
-            if data_extractor.shop_data:
-                for cave_type in [0x10, 0x11, 0x12, 0x13, 0x18]:
-                    for i in range(0, 3):
-                        if data_extractor.shop_data[cave_type][i] != 0x3F:
-                            print(",".join([
-                                file_path, "cave", CAVE_NAME[cave_type],
-                                ITEM_TYPES[data_extractor.shop_data[cave_type][i]]
-                            ]))
-
-            # Shops
-            if data_extractor.shop_data:
-                for cave_type in [0x1D, 0x1E, 0x1F, 0x20, 0x1A, 0x23, 0x21, 0x22]:
-                    for i in range(0, 3):
-                        if data_extractor.shop_data[cave_type][i] != 0x3F:
-                            print(",".join([
-                                file_path, "cave", CAVE_NAME[cave_type],
-                                ITEM_TYPES[data_extractor.shop_data[cave_type][i]],
-                                str(data_extractor.shop_data[cave_type][i + 3])
-                            ]))
-
-            # Print out Overworld items as "Level 0"
-            locations = ["Armos", "Coast"]
-            items = data_extractor.GetOverworldItems()
-            for i in range(0, 2):
-                print(','.join([file_path, '0', locations[i], items[i]]))
-
-            requirements = data_extractor.GetRequirements()
-            if requirements["triforce"] == 0xFF:
-                print("%s,misc,level_nine_triforce_requirement,8 (Vanilla)" % file_path)
-            else:
-                print("%s,misc,level_nine_triforce_requirement,%d" %
-                      (file_path, requirements["triforce"]))
-            print("%s,misc,white_sword_cave_requirement,%d" %
-                  (file_path, requirements["white_sword"]))
-            print("%s,misc,magical_sword_cave_requirement,%d" %
-                  (file_path, requirements["magical_sword"]))
-            print("%s,misc,door_repair_charge,%d" % (file_path, requirements["door_repair"]))
-
-            for num in range(0, 38):
-                print("%s,quote,%d,%s" % (file_path, num, data_extractor.GetQuote(num)))
-            maybe_recorder_text = data_extractor.GetRecorderText()
-
-            if maybe_recorder_text:
-                print("%s,quote,recorder,%s" % (file_path, maybe_recorder_text))
+    process_args = dict(use_mmap=args.mmap,
+                        jobs=args.jobs,
+                        ordered=args.ordered,
+                        cache_dir=args.cache_dir,
+                        probe=args.probe)
+    manifest = None
+    if args.manifest:
+        from corpus_manifest import CorpusManifest
+        manifest = CorpusManifest(os.path.expanduser(args.manifest))
+        results = IterManifestFiles(manifest, files_to_process, **process_args)
+    else:
+        results = IterProcessedFiles(files_to_process, **process_args)
+    had_errors = False
+    with contextlib.ExitStack() as profiling:
+        if args.profile:
+            from profiling import Profile
+            stats = profiling.enter_context(Profile())
+            start = time.perf_counter()
+        if args.pstats:
+            import cProfile
+            profiler = profiling.enter_context(cProfile.Profile())
+        with contextlib.closing(results), OpenRowWriter(args.format, sys.stdout,
+                                                        args.output_dir) as writer:
+            for file_path, rows in results:
+                for row in rows:
+                    had_errors |= isinstance(row, ErrorRow)
+                    writer.Write(row)
+    if args.pstats:
+        profiler.dump_stats(args.pstats)
+    if args.profile:
+        summary = dict(files=len(files_to_process), seconds=time.perf_counter() - start)
+        summary.update(stats.AsDict())
+        json.dump(summary, sys.stderr, indent=2)
+        sys.stderr.write('\n')
+    if manifest:
+        manifest.Save()
+    if had_errors:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
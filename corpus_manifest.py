@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from typing import Any, Dict, List
+from data_extractor import PARSER_VERSION
+from export_rows import Row
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+ROWS_DIR = 'rows'
+ROWS_FILE_SUFFIX = '.rows'
+
+
+def HashFile(file_path: str) -> str:
+    with open(file_path, 'rb') as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=20)).hexdigest()
+
+
+class CorpusManifest:
+    """Index of the roms a corpus export has already processed, for incremental re-runs.
+
+    manifest.json maps each rom's absolute path to its size, mtime, content
+    hash and the file under rows/ that holds its exported rows. A rom whose
+    size and mtime are unchanged is assumed unchanged; otherwise its content
+    is hashed, so a touched but identical rom still isn't re-parsed. Rows are
+    stored per content hash, so copies of a rom share a rows file. Bumping
+    PARSER_VERSION invalidates every entry.
+    """
+
+    def __init__(self, manifest_dir: str) -> None:
+        self.manifest_dir = manifest_dir
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(os.path.join(manifest_dir, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (manifest.get('version') == MANIFEST_VERSION and
+                manifest.get('parser_version') == PARSER_VERSION):
+            self.entries = manifest['files']
+
+    def _GetRowsPath(self, content_hash: str) -> str:
+        return os.path.join(self.manifest_dir, ROWS_DIR, content_hash + ROWS_FILE_SUFFIX)
+
+    def IsCurrent(self, file_path: str) -> bool:
+        """Returns whether the stored rows for a rom are still up to date."""
+        entry = self.entries.get(os.path.abspath(file_path))
+        if entry is None or not os.path.exists(self._GetRowsPath(entry['hash'])):
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+        if stat.st_size != entry['size'] or HashFile(file_path) != entry['hash']:
+            return False
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+
+    def GetRows(self, file_path: str) -> List[Row]:
+        entry = self.entries[os.path.abspath(file_path)]
+        with open(self._GetRowsPath(entry['hash']), 'rb') as f:
+            rows = pickle.loads(zlib.decompress(f.read()))
+        # Rows are shared between copies of a rom, so point them at this copy.
+        if rows and rows[0].file_path != file_path:
+            rows = [row._replace(file_path=file_path) for row in rows]
+        return rows
+
+    def Record(self, file_path: str, rows: List[Row]) -> None:
+        """Stores a rom's rows and records the rom as processed."""
+        stat = os.stat(file_path)
+        content_hash = HashFile(file_path)
+        rows_path = self._GetRowsPath(content_hash)
+        self._WriteAtomically(rows_path,
+                              zlib.compress(pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)))
+        self.entries[os.path.abspath(file_path)] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': content_hash,
+            'rows': os.path.relpath(rows_path, self.manifest_dir),
+        }
+
+    def Save(self) -> None:
+        """Writes the manifest, dropping roms that no longer exist and rows nothing refers to."""
+        self.entries = {
+            path: entry for path, entry in self.entries.items() if os.path.exists(path)
+        }
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'parser_version': PARSER_VERSION,
+            'files': self.entries,
+        }
+        self._WriteAtomically(os.path.join(self.manifest_dir, MANIFEST_FILE),
+                              json.dumps(manifest, indent=1, sort_keys=True).encode())
+        used = set(entry['hash'] + ROWS_FILE_SUFFIX for entry in self.entries.values())
+        os.makedirs(os.path.join(self.manifest_dir, ROWS_DIR), exist_ok=True)
+        with os.scandir(os.path.join(self.manifest_dir, ROWS_DIR)) as it:
+            for dir_entry in it:
+                if dir_entry.name.endswith(ROWS_FILE_SUFFIX) and dir_entry.name not in used:
+                    os.remove(dir_entry.path)
+
+    def _WriteAtomically(self, path: str, payload: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
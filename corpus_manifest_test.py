@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import cli
+from corpus_manifest import CorpusManifest
+from export_rows import IterFileRows
+from rom_generator import RomGenerator
+
+
+class CorpusManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manifest_dir = os.path.join(self.temp_dir.name, 'manifest')
+        generator = RomGenerator(seed=4)
+        self.rom_paths = []
+        for n in range(3):
+            self.rom_paths.append(os.path.join(self.temp_dir.name, 'rom%d.nes' % n))
+            with open(self.rom_paths[-1], 'wb') as f:
+                f.write(generator.Generate(n))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def Run(self):
+        manifest = CorpusManifest(self.manifest_dir)
+        results = [(path, list(rows))
+                   for path, rows in cli.IterManifestFiles(manifest, self.rom_paths)]
+        manifest.Save()
+        return results
+
+    def test_only_parses_changed_roms(self):
+        expected = [(path, list(IterFileRows(path))) for path in self.rom_paths]
+        self.assertEqual(expected, self.Run())
+
+        with mock.patch.object(cli, 'IterFileRows', wraps=IterFileRows) as iter_file_rows:
+            self.assertEqual(expected, self.Run())
+            iter_file_rows.assert_not_called()
+
+            # Touching a rom without changing it only costs a hash.
+            os.utime(self.rom_paths[0], ns=(0, 0))
+            self.assertEqual(expected, self.Run())
+            iter_file_rows.assert_not_called()
+
+            with open(self.rom_paths[1], 'wb') as f:
+                f.write(RomGenerator(seed=5).Generate(0))
+            expected[1] = (self.rom_paths[1], list(IterFileRows(self.rom_paths[1])))
+            iter_file_rows.reset_mock()
+            self.assertEqual(expected, self.Run())
+            self.assertEqual([self.rom_paths[1]],
+                             [call.args[0] for call in iter_file_rows.call_args_list])
+
+    def test_unreadable_roms_are_not_recorded(self):
+        missing_path = os.path.join(self.temp_dir.name, 'missing.nes')
+        truncated_path = os.path.join(self.temp_dir.name, 'truncated.nes')
+        with open(self.rom_paths[0], 'rb') as src, open(truncated_path, 'wb') as dst:
+            dst.write(src.read(0x100))
+        self.rom_paths = [missing_path, truncated_path, self.rom_paths[1]]
+        expected = [(path, list(IterFileRows(path))) for path in self.rom_paths]
+        self.assertEqual(expected, self.Run())
+        self.assertEqual([os.path.abspath(self.rom_paths[2])],
+                         list(CorpusManifest(self.manifest_dir).entries))
+
+        # Once the missing rom shows up, it gets parsed.
+        with open(missing_path, 'wb') as f:
+            f.write(RomGenerator(seed=4).Generate(0))
+        self.assertEqual(list(IterFileRows(missing_path)), self.Run()[0][1])
+        self.assertIn(os.path.abspath(missing_path), CorpusManifest(self.manifest_dir).entries)
+
+    def test_copies_share_rows(self):
+        self.Run()
+        copy_path = os.path.join(self.temp_dir.name, 'copy.nes')
+        with open(self.rom_paths[0], 'rb') as src, open(copy_path, 'wb') as dst:
+            dst.write(src.read())
+        manifest = CorpusManifest(self.manifest_dir)
+        manifest.Record(copy_path, list(IterFileRows(self.rom_paths[0])))
+        self.assertEqual(list(IterFileRows(copy_path)), manifest.GetRows(copy_path))
+        os.remove(self.rom_paths[2])
+        manifest.Save()
+        self.assertEqual(2, len(os.listdir(os.path.join(self.manifest_dir, 'rows'))))
+        self.assertNotIn(os.path.abspath(self.rom_paths[2]),
+                         CorpusManifest(self.manifest_dir).entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
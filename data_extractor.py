@@ -1,26 +1,97 @@
-from rom_reader import RomReader
-import io
-from typing import IO, List
+from rom_image import RomImage
+from rom_reader import NUM_QUOTES, RomReader
+from room_table import RoomTable
+from level_graph import LevelGraph
+from level_decoder import LEVEL_BLOCK_SIZE, DecodedLevel, DecodeLevelBlock
+from parsed_corpus import LEVEL_INFO_SIZE, NUM_LEVEL_BLOCKS, ParsedCorpus
+from collections.abc import MutableMapping
+from types import SimpleNamespace
+from typing import IO, Callable, Iterator, List, Union
 import math
-from typing import Any, Dict, List, Optional
-from constants import Direction, WallType, ROOM_TYPES, ENEMY_TYPES, ITEM_TYPES
-from constants import ENTRANCE_DIRECTION_MAP, PALETTE_COLORS, CAVE_NAME_SHORT, CAVE_NAME
-from constants import OVERWORLD_BLOCK_TYPES, DOOR_TYPES
+import threading
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from constants import Direction, WallType, ITEM_TYPES, ENTRANCE_DIRECTION_MAP, PALETTE_COLORS
+from lookup_tables import CAVE_NAME_LABELS, CAVE_NAME_SHORT_LABELS, DOOR_LABELS, ENEMY_COUNT_SHOWN
+from lookup_tables import ENEMY_INFO_LABELS, ENEMY_TYPE_LABELS, ITEM_LABELS
+from lookup_tables import OVERWORLD_BLOCK_LABELS, ROOM_TYPE_LABELS
 
 PALETTE_OFFSET = 0xB
 START_ROOM_OFFSET = 0x2F
 STAIRWAY_LIST_OFFSET = 0x34
 DISPLAY_OFFSET_OFFSET = 0x2D
 
+# Bump this whenever the output of Parse() changes so that cached results from
+# older versions are no longer used.
+PARSER_VERSION = 1
+
+# Level 0 is the overworld
+LEVEL_NUMS = range(0, 10)
+
+
+class LazyLevelData(MutableMapping):
+    """DataExtractor.data: maps level numbers to their room dicts, parsing each level the first
+    time it's looked up.
+
+    Lookups hold a lock while a level is parsed, so a DataExtractor shared
+    between threads never hands out a half-filled level. If parsing a level
+    fails, the error propagates and the next lookup tries again.
+    """
+
+    def __init__(self, load_level: Callable[[int], None]) -> None:
+        self._load_level = load_level
+        self._levels: Dict[int, Dict[int, Any]] = {}
+        self._lock = threading.RLock()
+
+    def __getitem__(self, level_num: int) -> Dict[int, Any]:
+        with self._lock:
+            # While a level loads, its partly filled dict is only visible to the loading thread.
+            if level_num not in self._levels:
+                if level_num not in LEVEL_NUMS:
+                    raise KeyError(level_num)
+                try:
+                    self._load_level(level_num)
+                except BaseException:
+                    self._levels.pop(level_num, None)
+                    raise
+            return self._levels[level_num]
+
+    def __setitem__(self, level_num: int, rooms: Dict[int, Any]) -> None:
+        self._levels[level_num] = rooms
+
+    def __delitem__(self, level_num: int) -> None:
+        del self._levels[level_num]
+
+    def __contains__(self, level_num: object) -> bool:
+        return level_num in LEVEL_NUMS or level_num in self._levels
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(LEVEL_NUMS)
+
+    def __len__(self) -> int:
+        return len(LEVEL_NUMS)
+
+    def IsLoaded(self, level_num: int) -> bool:
+        return level_num in self._levels
+
 
 class DataExtractor(object):
+    """Parses a ROM's levels, overworld, shops, quotes and recorder data.
 
-    def __init__(self, rom: io.BytesIO, allow_decoding_roms: bool = False) -> None:
+    One DataExtractor can be shared between threads without locking, e.g. a
+    parsed ROM cached for every Streamlit session or server thread. Its reads
+    go through an immutable RomImage, levels are parsed under LazyLevelData's
+    lock, and everything else it memoizes is built in full before it's stored,
+    so at worst two threads compute the same value.
+    """
+
+    def __init__(self, rom: Union[RomImage, IO[bytes]], allow_decoding_roms: bool = False) -> None:
         self.rom_reader = RomReader(rom)
         self.is_z1r = True
-        self.level_info: List[List[int]] = []
-        self.data: Dict[int, Dict[int, Any]] = {}
-        self.shop_data = {}
+        self.level_info: List[memoryview] = []
+        self.data = LazyLevelData(self._LoadLevel)
+        self._shop_data: Optional[Dict[int, List[int]]] = None
+        self._quotes: Dict[int, str] = {}
 
         for level_num in range(0, 10):
             level_info = self.rom_reader.GetLevelInfo(level_num)
@@ -30,24 +101,105 @@ class DataExtractor(object):
                 continue
             self.is_z1r = False
 
-        self.level_blocks: List[List[int]] = []
+        self.level_blocks: List[memoryview] = []
         for level_num in [0, 1, 7]:
             self.level_blocks.append(self.rom_reader.GetLevelBlock(level_num))
+        self._decoded_levels: Dict[int, DecodedLevel] = {}
+        self._room_attributes: Dict[int, SimpleNamespace] = {}
+        self._level_graphs: Dict[int, LevelGraph] = {}
+        self._render_payloads: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._nothing_code: Optional[int] = None
+
+    @classmethod
+    def ParseMany(cls, roms: Iterable[Union[RomImage, IO[bytes]]]) -> ParsedCorpus:
+        """Parses a batch of ROMs, decoding the room, shop, cave and requirement tables of all of
+        them at once. Only the level walks run per ROM."""
+        extractors: List[Optional[DataExtractor]] = []
+        for rom in roms:
+            try:
+                extractors.append(cls(rom))
+            except IndexError:
+                # e.g. a truncated ROM, which is left out like one without level data.
+                extractors.append(None)
+        num_roms = len(extractors)
+        level_blocks = np.zeros((num_roms, NUM_LEVEL_BLOCKS, LEVEL_BLOCK_SIZE), dtype=np.uint8)
+        level_info = np.zeros((num_roms, 10, LEVEL_INFO_SIZE), dtype=np.uint8)
+        valid = np.zeros(num_roms, dtype=bool)
+        is_z1r = np.zeros(num_roms, dtype=bool)
+        requirement_bytes = np.zeros((num_roms, 4), dtype=np.uint8)
+        for rom_index, extractor in enumerate(extractors):
+            if extractor is None:
+                continue
+            is_z1r[rom_index] = extractor.is_z1r
+            requirement_bytes[rom_index] = extractor.rom_reader.GetRequirementBytes()
+            if (all(len(block) == LEVEL_BLOCK_SIZE for block in extractor.level_blocks) and
+                    all(len(info) == LEVEL_INFO_SIZE for info in extractor.level_info)):
+                level_blocks[rom_index] = extractor.level_blocks
+                level_info[rom_index] = extractor.level_info
+                valid[rom_index] = True
+
+        corpus = ParsedCorpus(extractors, level_blocks, level_info, valid, is_z1r,
+                              requirement_bytes)
+        for rom_index, extractor in enumerate(extractors):
+            if not valid[rom_index]:
+                continue
+            for block_num in range(NUM_LEVEL_BLOCKS):
+                extractor._decoded_levels[block_num] = corpus.rooms[rom_index, block_num]
+            try:
+                corpus.room_tables[rom_index] = extractor.GetRoomTable()
+            except IndexError:
+                corpus.valid[rom_index] = False
+        return corpus
 
     def Parse(self) -> None:
-        self.ProcessOverworld()
-        for level_num in range(1, 10):
+        """Parses every level now rather than when data is first looked up."""
+        for level_num in LEVEL_NUMS:
+            self.data[level_num]
+
+    def _LoadLevel(self, level_num: int) -> None:
+        if level_num == 0:
+            self.ProcessOverworld()
+        else:
             self.ProcessLevel(level_num)
 
+    @property
+    def shop_data(self) -> Dict[int, List[int]]:
+        if self._shop_data is None:
+            self.ProcessShops()
+        return self._shop_data
+
+    @shop_data.setter
+    def shop_data(self, shop_data: Dict[int, List[int]]) -> None:
+        self._shop_data = shop_data
+
+    def GetParseResult(self) -> Dict[str, Any]:
+        return {
+            'is_z1r': self.is_z1r,
+            'level_info': [bytes(level_info) for level_info in self.level_info],
+            'data': dict(self.data),
+            'shop_data': self.shop_data,
+            'requirements': self.GetRequirements(),
+            'overworld_items': self.GetOverworldItems(),
+            'quotes': self.GetQuotes(),
+            'recorder_text': self.GetRecorderText(),
+            'recorder_data': self.GetRecorderData(),
+        }
+
+    def LoadParseResult(self, result: Dict[str, Any]) -> None:
+        self.data.update(result['data'])
+        self.shop_data = result['shop_data']
+        self._quotes = dict(enumerate(result['quotes']))
+
     def GetRoomData(self, level_num: int, byte_num: int) -> int:
-        foo = -1
+        return self.level_blocks[self._GetLevelBlockNum(level_num)][byte_num]
+
+    def _GetLevelBlockNum(self, level_num: int) -> int:
         if level_num == 0:
-            level_block_num = 0
+            return 0
         elif level_num in range(1, 7):
-            level_block_num = 1
+            return 1
         elif level_num in range(7, 10):
-            level_block_num = 2
-        return self.level_blocks[level_block_num][byte_num]
+            return 2
 
     def GetLevelEntranceDirection(self, level_num: int) -> Direction:
         if not self.is_z1r:
@@ -95,10 +247,8 @@ class DataExtractor(object):
             x = screen_num % 0x10
             y = 8 - (math.floor(screen_num / 0x10))
 
-            block_type = 'Tell Tetra what block type this is'
-            try:
-                block_type = OVERWORLD_BLOCK_TYPES[screen_num]
-            except KeyError:
+            block_type = OVERWORLD_BLOCK_LABELS[screen_num]
+            if block_type is None:
                 continue
             self.data[0][screen_num] = {
                 'screen_num': '%x' % screen_num,
@@ -109,57 +259,88 @@ class DataExtractor(object):
                 'cave': '%x' % destination,
                 'block_type': block_type,
             }
-            if destination in CAVE_NAME:
-                self.data[0][screen_num]['cave_name'] = CAVE_NAME[destination]
-            if destination in CAVE_NAME_SHORT:
-                self.data[0][screen_num]['cave_name_short'] = CAVE_NAME_SHORT[destination]
-
+            if CAVE_NAME_LABELS[destination] is not None:
+                self.data[0][screen_num]['cave_name'] = CAVE_NAME_LABELS[destination]
+            if CAVE_NAME_SHORT_LABELS[destination] is not None:
+                self.data[0][screen_num]['cave_name_short'] = CAVE_NAME_SHORT_LABELS[destination]
+        self.ProcessShops()
+
+    def ProcessShops(self) -> None:
+        shop_data = {}
         for shop_type in range(0x10, 0x24):
             base_index = 4 * 0x80 + 3 * (shop_type - 0x10)
             price_index = 4 * 0x80 + 3 * (shop_type - 0x10) + 0x14 * 3
-            self.shop_data[shop_type] = []
-            self.shop_data[shop_type].append(self.level_blocks[0][base_index] & 0x3F)
-            self.shop_data[shop_type].append(self.level_blocks[0][base_index + 1] & 0x3F)
-            self.shop_data[shop_type].append(self.level_blocks[0][base_index + 2] & 0x3F)
-            self.shop_data[shop_type].append(self.level_blocks[0][price_index])
-            self.shop_data[shop_type].append(self.level_blocks[0][price_index + 1])
-            self.shop_data[shop_type].append(self.level_blocks[0][price_index + 2])
+            shop_data[shop_type] = []
+            shop_data[shop_type].append(self.level_blocks[0][base_index] & 0x3F)
+            shop_data[shop_type].append(self.level_blocks[0][base_index + 1] & 0x3F)
+            shop_data[shop_type].append(self.level_blocks[0][base_index + 2] & 0x3F)
+            shop_data[shop_type].append(self.level_blocks[0][price_index])
+            shop_data[shop_type].append(self.level_blocks[0][price_index + 1])
+            shop_data[shop_type].append(self.level_blocks[0][price_index + 2])
+        self.shop_data = shop_data
 
     def ProcessLevel(self, level_num: int) -> None:
         self.data[level_num] = {}
-        rooms_to_visit = [(self.GetLevelStartRoomNumber(level_num),
-                           self.GetLevelEntranceDirection(level_num))]
-        transport_staircase_room_nums = set()
-        while True:
-            room_num, direction = rooms_to_visit.pop()
-            for new_room in self._VisitRoom(level_num, room_num, direction):
-                if new_room[1] == Direction.STAIRCASE:
-                    transport_staircase_room_nums.add(new_room[0])
-                else:
-                    rooms_to_visit.append(new_room)
-            if not rooms_to_visit:
-                break
+        level_graph = self.GetLevelGraph(level_num)
+        room_nums, item_stairways, transport_staircase_room_nums = level_graph.Walk()
+        for room_num in room_nums:
+            self._VisitRoom(level_num, room_num)
+            if room_num in item_stairways:
+                item_name = ITEM_LABELS[item_stairways[room_num]]
+                self.data[level_num][room_num]['stair_info'] = '%s' % item_name
+                self.data[level_num][room_num]['stair_tooltip'] = '%s' % item_name
 
         # Add stair info/tooltips for each room that leads to a transport stairway
         stairway_num = 1
         for stairway_room_num in transport_staircase_room_nums:
-            left_exit = self.GetRoomData(level_num, stairway_room_num) % 0x80
-            right_exit = self.GetRoomData(level_num, stairway_room_num + 0x80) % 0x80
+            left_exit, right_exit = self._GetStairwayExits(level_num, stairway_room_num)
             self.data[level_num][left_exit]['stair_info'] = 'Stair #%d' % stairway_num
             self.data[level_num][right_exit]['stair_info'] = 'Stair #%d' % stairway_num
             self.data[level_num][left_exit]['stair_tooltip'] = 'Stairway #%d' % stairway_num
             self.data[level_num][right_exit]['stair_tooltip'] = 'Stairway #%d' % stairway_num
             stairway_num += 1
 
+    def GetRoomTable(self, level_nums: Iterable[int] = range(1, 10)) -> RoomTable:
+        """Builds a columnar RoomTable for the given levels without filling in self.data."""
+        nothing_code = self._GetNothingCode()
+        tables = []
+        for level_num in level_nums:
+            room_nums, item_stairways, transport_staircase_room_nums = self.GetLevelGraph(
+                level_num).Walk()
+            stairway_exits = [
+                self._GetStairwayExits(level_num, stairway_room_num)
+                for stairway_room_num in transport_staircase_room_nums
+            ]
+            tables.append(
+                RoomTable.FromDecodedLevel(level_num, self._GetDecodedLevel(level_num), room_nums,
+                                           self.GetLevelDisplayOffset(level_num), nothing_code,
+                                           item_stairways, stairway_exits))
+        return RoomTable.Concatenate(tables)
+
+    def GetLevelRenderPayload(self, level_num: int) -> Dict[str, Dict[str, Any]]:
+        """Returns RoomTable.ToRenderPayload() for a level, built on first use."""
+        if level_num not in self._render_payloads:
+            self._render_payloads[level_num] = self.GetRoomTable([level_num]).ToRenderPayload()
+        return self._render_payloads[level_num]
+
+    def GetLevelGraph(self, level_num: int) -> LevelGraph:
+        """Returns the level's room adjacency graph, built on first use."""
+        if level_num not in self._level_graphs:
+            self._level_graphs[level_num] = LevelGraph.Build(
+                self.level_blocks[self._GetLevelBlockNum(level_num)],
+                self._GetDecodedLevel(level_num), self.GetLevelStartRoomNumber(level_num),
+                self.GetLevelEntranceDirection(level_num),
+                self.GetLevelStairwayRoomNumberList(level_num))
+        return self._level_graphs[level_num]
+
+    def _GetStairwayExits(self, level_num: int, stairway_room_num: int) -> Tuple[int, int]:
+        return (self.GetRoomData(level_num, stairway_room_num) % 0x80,
+                self.GetRoomData(level_num, stairway_room_num + 0x80) % 0x80)
+
     def GetLevelDisplayOffset(self, level_num: int) -> int:
         return self.level_info[level_num][DISPLAY_OFFSET_OFFSET] - 3
 
-    def _VisitRoom(self, level_num: int, room_num: int, from_dir: Direction) -> None:
-        if room_num in self.data[level_num]:
-            return []
-        if room_num not in range(0, 0x80):
-            return []
-        tbr = []
+    def _VisitRoom(self, level_num: int, room_num: int) -> None:
         x = (room_num + self.GetLevelDisplayOffset(level_num)) % 0x10
         y = 8 - (math.floor(room_num / 0x10))
 
@@ -209,7 +390,7 @@ class DataExtractor(object):
                 self.data[level_num][room_num][
                     '%s.wall.y' % direction_text[direction]] = y + direction_y[direction]
                 self.data[level_num][room_num]['%s.wall_type' %
-                                               direction_text[direction]] = DOOR_TYPES[wall_type]
+                                               direction_text[direction]] = DOOR_LABELS[wall_type]
             if wall_type != WallType.SOLID_WALL:
                 direction_text = {
                     Direction.NORTH: "north",
@@ -245,123 +426,58 @@ class DataExtractor(object):
                 self.data[level_num][room_num]['%s.color' %
                                                direction_text[direction]] = color[wall_type]
             self.data[level_num][room_num]['%s.wall_type' %
-                                           direction_text[direction]] = DOOR_TYPES[wall_type]
-
-        for direction in [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]:
-            if from_dir and direction == from_dir:
-                continue
-            if self._GetWallType(level_num, room_num, direction) == WallType.SOLID_WALL:
-                continue
-            tbr.append((room_num + direction, direction.inverse()))
-
-        # Only check for stairways if this room is configured to have a stairway entrance
-        if not self._HasStairway(level_num, room_num):
-            return tbr
-        for stairway_room_num in self.GetLevelStairwayRoomNumberList(level_num):
-            left_exit = self.GetRoomData(level_num, stairway_room_num) % 0x80
-            right_exit = self.GetRoomData(level_num, stairway_room_num + 0x80) % 0x80
-
-            if left_exit == room_num and right_exit == room_num:
-                # This is an item staircase, not a transport staircase
-                item_type = int(self.GetRoomData(level_num, stairway_room_num + (4 * 0x80)) % 0x20)
-                self.data[level_num][left_exit]['stair_info'] = '%s' % ITEM_TYPES[item_type]
-                self.data[level_num][left_exit]['stair_tooltip'] = '%s' % ITEM_TYPES[item_type]
-                break
-            elif left_exit == room_num and right_exit != room_num:
-                tbr.append((stairway_room_num, direction.STAIRCASE))
-                tbr.append((right_exit, direction.NO_DIRECTION))
-                # Stop looking for additional staircases after finding one
-                break
-            elif right_exit == room_num and left_exit != room_num:
-                tbr.append((stairway_room_num, direction.STAIRCASE))
-                tbr.append((left_exit, direction.NO_DIRECTION))
-                # Stop looking for additional staircases after finding one
-                break
-        return tbr
-
-    def _GetWallType(self, level_num: int, room_num: int, direction: Direction) -> int:
-        offset = 0x80 if direction in [Direction.EAST, Direction.WEST] else 0x00
-        bits_to_shift = 32 if direction in [Direction.NORTH, Direction.WEST] else 4
-
-        wall_type = math.floor(
-            self.GetRoomData(level_num, room_num + offset) / bits_to_shift) % 0x08
-        return wall_type
+                                           direction_text[direction]] = DOOR_LABELS[wall_type]
+
+    def _GetRoomAttributes(self, level_num: int) -> SimpleNamespace:
+        """Returns the decoded per-room attributes of a level's block as Python lists."""
+        block_num = self._GetLevelBlockNum(level_num)
+        if block_num not in self._room_attributes:
+            rooms = self._GetDecodedLevel(level_num).ToLists()
+            rooms.walls = {
+                Direction.NORTH: rooms.north_walls,
+                Direction.EAST: rooms.east_walls,
+                Direction.SOUTH: rooms.south_walls,
+                Direction.WEST: rooms.west_walls,
+            }
+            self._room_attributes[block_num] = rooms
+        return self._room_attributes[block_num]
 
-    def _HasStairway(self, level_num: int, room_num: int) -> str:
-        room_type_code = self.GetRoomData(level_num, room_num + 3 * 0x80) & 0x3F
+    def _GetDecodedLevel(self, level_num: int) -> DecodedLevel:
+        block_num = self._GetLevelBlockNum(level_num)
+        if block_num not in self._decoded_levels:
+            self._decoded_levels[block_num] = DecodeLevelBlock(self.level_blocks[block_num])
+        return self._decoded_levels[block_num]
 
-        # Spiral Stair, Narrow Stair, and Diamond Stair rooms always have a stairway
-        if room_type_code in [0x1A, 0x1B, 0x1C]:
-            return True
+    def _GetNothingCode(self) -> int:
+        if self._nothing_code is None:
+            self._nothing_code = self.rom_reader.GetNothingCode()
+        return self._nothing_code
 
-        # Check if there are any shutter doors in this room. If so, they'll open when a middle
-        # row pushblock is pushed instead of a stairway appearing
-        for direction in [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]:
-            if self._GetWallType(level_num, room_num, direction) == WallType.SHUTTER_DOOR:
-                return False
-
-        # Check if "Movable block" bit is set in a room_type that has a middle row pushblock
-        if room_type_code in [
-                0x01, 0x06, 0x07, 0x08, 0x09, 0x10, 0x0A, 0x0C, 0x0D, 0x11, 0x1F, 0x22
-        ]:
-            if ((self.GetRoomData(level_num, room_num + 3 * 0x80) >> 6) & 0x01) > 0:
-                return True
-        return False
+    def _GetWallType(self, level_num: int, room_num: int, direction: Direction) -> int:
+        return self._GetRoomAttributes(level_num).walls[direction][room_num]
 
     def _GetRoomType(self, level_num: int, room_num: int) -> str:
-        code = self.GetRoomData(level_num, room_num + 3 * 0x80)
-        while code >= 0x40:
-            code -= 0x40
-        if code in ROOM_TYPES:
-            return ROOM_TYPES[code]
-        return 'ERROR CODE %X' % code
+        return ROOM_TYPE_LABELS[self._GetRoomAttributes(level_num).room_types[room_num]]
 
     def _GetEnemyNum(self, level_num: int, room_num: int) -> int:
-        code = math.floor(self.GetRoomData(level_num, room_num + 2 * 0x80) / 64)
-        if code == 0:
-            return 3
-        elif code == 1:
-            return 5
-        elif code == 2:
-            return 6
-        elif code == 3:
-            return 8
-        return -1
+        return self._GetRoomAttributes(level_num).enemy_nums[room_num]
 
     def _GetEnemyText(self, level_num: int, room_num: int) -> str:
-        code = self.GetRoomData(level_num, room_num + 2 * 0x80)
-        while code >= 0x40:
-            code -= 0x40
-        if self.GetRoomData(level_num, room_num + 3 * 0x80) >= 0x80:
-            code += 0x40
-
-        num_text = ''
-        if (code <= 0x30 or code >= 0x62) and code != 0x00:
-            num_text = '%s ' % self._GetEnemyNum(level_num, room_num)
-        if code in ENEMY_TYPES:
-            return num_text + ENEMY_TYPES[code]
-        return 'ERROR CODE %X' % code
+        code = self._GetRoomAttributes(level_num).enemy_codes[room_num]
+        if ENEMY_COUNT_SHOWN[code]:
+            return '%s %s' % (self._GetEnemyNum(level_num, room_num), ENEMY_INFO_LABELS[code])
+        return ENEMY_INFO_LABELS[code]
 
     def _GetEnemyType(self, level_num: int, room_num: int) -> int:
-        code = self.GetRoomData(level_num, room_num + 2 * 0x80)
-        while code >= 0x40:
-            code -= 0x40
-        if self.GetRoomData(level_num, room_num + 3 * 0x80) >= 0x80:
-            code += 0x40
-        if code in ENEMY_TYPES:
-            return ENEMY_TYPES[code]
-        return 'E %X' % code
+        return ENEMY_TYPE_LABELS[self._GetRoomAttributes(level_num).enemy_codes[room_num]]
 
     def _GetItemText(self, level_num: int, room_num: int) -> int:
-        code = self.GetRoomData(level_num, room_num + 4 * 0x80)
-        while code >= 0x20:
-            code -= 0x20
-        if (code == self.rom_reader.GetNothingCode() and
-                self._GetEnemyType(level_num, room_num) != ENEMY_TYPES[0x3E]):
+        rooms = self._GetRoomAttributes(level_num)
+        code = rooms.item_codes[room_num]
+        if code == self._GetNothingCode() and rooms.enemy_codes[room_num] != 0x3E:
             return ''
-        is_drop = math.floor(self.GetRoomData(level_num, room_num + 5 * 0x80) / 4) % 0x02 == 1
-        item_name = ITEM_TYPES[code]
-        return "%s%s" % ('D ' if is_drop else '', item_name)
+        item_name = ITEM_LABELS[code]
+        return "%s%s" % ('D ' if rooms.is_drop[room_num] else '', item_name)
 
     def GetLevelColorPalette(self, level_num: int) -> List[str]:
         vals = self.level_info[level_num][PALETTE_OFFSET:PALETTE_OFFSET + 8]
@@ -380,7 +496,15 @@ class DataExtractor(object):
         return self.rom_reader.GetRequirements()
 
     def GetQuote(self, quote_num: int) -> str:
-        return self.rom_reader.GetQuote(quote_num)
+        if quote_num not in self._quotes:
+            self._quotes[quote_num] = self.rom_reader.GetQuote(quote_num)
+        return self._quotes[quote_num]
+
+    def GetQuotes(self) -> List[str]:
+        quotes = self._quotes
+        if len(quotes) < NUM_QUOTES:
+            quotes = self._quotes = dict(enumerate(self.rom_reader.GetQuotes()))
+        return [quotes[quote_num] for quote_num in range(0, NUM_QUOTES)]
 
     def GetRecorderText(self) -> str:
         return self.rom_reader.GetRecorderText()
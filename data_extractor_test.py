@@ -1,5 +1,10 @@
+import concurrent.futures
+import sys
 import unittest
+from unittest import mock
 from data_extractor import DataExtractor
+from rom_generator import RomGenerator
+from rom_image import RomImage
 
 
 class Bar():
@@ -38,6 +43,57 @@ class DataExtractorTest(unittest.TestCase):
             self.assertEqual('black', level_1_test_room['south.color'])
             self.assertEqual('black', level_1_test_room['west.color'])
 
+    def test_levels_are_parsed_on_first_lookup(self):
+        rom = RomGenerator(seed=6).Generate(0)
+        parsed = DataExtractor(RomImage(rom))
+        parsed.Parse()
+        de = DataExtractor(RomImage(rom))
+        self.assertFalse(de.data.IsLoaded(3))
+        self.assertEqual(parsed.data[3], de.data[3])
+        self.assertTrue(de.data.IsLoaded(3))
+        self.assertFalse(de.data.IsLoaded(4))
+        self.assertFalse(de.data.IsLoaded(0))
+        self.assertEqual(parsed.shop_data, de.shop_data)
+        self.assertEqual(parsed.data, de.data)
+
+    def test_failed_level_is_retried(self):
+        de = DataExtractor(RomImage(RomGenerator(seed=6).Generate(0)))
+        with mock.patch.object(de, 'ProcessLevel', side_effect=IndexError):
+            with self.assertRaises(IndexError):
+                de.data[2]
+        self.assertFalse(de.data.IsLoaded(2))
+        self.assertTrue(de.data[2])
+        with self.assertRaises(KeyError):
+            de.data[10]
+
+    def test_shared_between_threads(self):
+        rom = RomGenerator(seed=6).Generate(1)
+        expected = DataExtractor(RomImage(rom))
+        expected.Parse()
+        de = DataExtractor(RomImage(rom))
+
+        def ReadEverything(first_level_num):
+            level_nums = list(range(first_level_num, 10)) + list(range(0, first_level_num))
+            return ([dict(de.data[level_num]) for level_num in level_nums], de.shop_data,
+                    de.GetQuotes(), de.GetQuote(first_level_num),
+                    de.GetLevelGraph(first_level_num or 1).Walk()[0])
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+                results = list(executor.map(ReadEverything, list(range(0, 10)) * 4))
+        finally:
+            sys.setswitchinterval(switch_interval)
+        for first_level_num, (levels, shop_data, quotes, quote, walk) in zip(
+                list(range(0, 10)) * 4, results):
+            level_nums = list(range(first_level_num, 10)) + list(range(0, first_level_num))
+            self.assertEqual([expected.data[level_num] for level_num in level_nums], levels)
+            self.assertEqual(expected.shop_data, shop_data)
+            self.assertEqual(expected.GetQuotes(), quotes)
+            self.assertEqual(expected.GetQuote(first_level_num), quote)
+            self.assertEqual(expected.GetLevelGraph(first_level_num or 1).Walk()[0], walk)
+
 
 if __name__ == '__main__':
     unittest.main()
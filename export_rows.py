@@ -0,0 +1,204 @@
+from typing import Iterator, NamedTuple, Optional, Union
+from constants import CAVE_NAME, ITEM_TYPES
+from data_extractor import DataExtractor
+from rom_image import RomImage
+from rom_probe import ProbeFile
+
+CAVE_TYPES = [0x10, 0x11, 0x12, 0x13, 0x18]
+SHOP_TYPES = [0x1D, 0x1E, 0x1F, 0x20, 0x1A, 0x23, 0x21, 0x22]
+NO_ITEM = 0x3F
+OVERWORLD_ITEM_LOCATIONS = ["Armos", "Coast"]
+PARSE_ERROR = "Error parsing level data"
+READ_ERROR = "Error reading rom file"
+
+
+class LevelRoomRow(NamedTuple):
+    file_path: str
+    level_num: int
+    room_num: str
+    room_type: str
+    enemy_info: str
+    item_info: str
+    stair_info: str
+    north_wall: str
+    west_wall: str
+    east_wall: str
+    south_wall: str
+
+    def ToCSV(self) -> str:
+        return ','.join([self.file_path, str(self.level_num)] + list(self[2:]))
+
+
+class OverworldScreenRow(NamedTuple):
+    file_path: str
+    screen_num: str
+    cave_name: str
+    block_type: str
+
+    def ToCSV(self) -> str:
+        return ','.join([self.file_path, 'Overworld', self.screen_num, self.cave_name,
+                         self.block_type])
+
+
+class CaveItemRow(NamedTuple):
+    file_path: str
+    cave_name: str
+    item: str
+
+    def ToCSV(self) -> str:
+        return ','.join([self.file_path, 'cave', self.cave_name, self.item])
+
+
+class ShopItemRow(NamedTuple):
+    file_path: str
+    cave_name: str
+    item: str
+    price: int
+
+    def ToCSV(self) -> str:
+        return ','.join([self.file_path, 'cave', self.cave_name, self.item, str(self.price)])
+
+
+class OverworldItemRow(NamedTuple):
+    file_path: str
+    location: str
+    item: str
+
+    def ToCSV(self) -> str:
+        return ','.join([self.file_path, '0', self.location, self.item])
+
+
+class RequirementRow(NamedTuple):
+    file_path: str
+    name: str
+    value: int
+    # Only set for the vanilla level 9 triforce requirement, which is stored as 0xFF.
+    is_vanilla: bool = False
+
+    def ToCSV(self) -> str:
+        value = '%d (Vanilla)' % self.value if self.is_vanilla else '%d' % self.value
+        return '%s,misc,%s,%s' % (self.file_path, self.name, value)
+
+
+class QuoteRow(NamedTuple):
+    file_path: str
+    quote_num: int
+    text: str
+
+    def ToCSV(self) -> str:
+        return '%s,quote,%d,%s' % (self.file_path, self.quote_num, self.text)
+
+
+class RecorderTextRow(NamedTuple):
+    file_path: str
+    text: str
+
+    def ToCSV(self) -> str:
+        return '%s,quote,recorder,%s' % (self.file_path, self.text)
+
+
+class ErrorRow(NamedTuple):
+    file_path: str
+    error: str
+
+    def ToCSV(self) -> str:
+        return '%s,error,%s' % (self.file_path, self.error)
+
+
+Row = Union[LevelRoomRow, OverworldScreenRow, CaveItemRow, ShopItemRow, OverworldItemRow,
+            RequirementRow, QuoteRow, RecorderTextRow, ErrorRow]
+
+# Table name for each kind of row in the columnar output formats
+ROW_KINDS = {
+    LevelRoomRow: 'level_rooms',
+    OverworldScreenRow: 'overworld_screens',
+    CaveItemRow: 'caves',
+    ShopItemRow: 'shops',
+    OverworldItemRow: 'overworld_items',
+    RequirementRow: 'requirements',
+    QuoteRow: 'quotes',
+    RecorderTextRow: 'recorder_text',
+    ErrorRow: 'errors',
+}
+
+
+def IterRows(file_path: str, data_extractor: DataExtractor) -> Iterator[Row]:
+    """Yields the rows for a parsed rom, in the order the CLI prints them."""
+    for level_num in range(1, 10):
+        for room in data_extractor.data.get(level_num, {}).values():
+            yield LevelRoomRow(file_path, level_num, room['room_num'], room['room_type'],
+                               room['enemy_info'] or 'No Enemies', room['item_info'] or 'No Item',
+                               room['stair_info'] or 'No Stairway', room['north.wall_type'],
+                               room['west.wall_type'], room['east.wall_type'],
+                               room['south.wall_type'])
+
+    if data_extractor.data:
+        for screen in data_extractor.data[0].values():
+            yield OverworldScreenRow(file_path, screen['screen_num'], screen['cave_name'],
+                                     screen['block_type'])
+
+    shop_data = data_extractor.shop_data
+    if shop_data:
+        for cave_type in CAVE_TYPES:
+            for i in range(0, 3):
+                if shop_data[cave_type][i] != NO_ITEM:
+                    yield CaveItemRow(file_path, CAVE_NAME[cave_type],
+                                      ITEM_TYPES[shop_data[cave_type][i]])
+        for cave_type in SHOP_TYPES:
+            for i in range(0, 3):
+                if shop_data[cave_type][i] != NO_ITEM:
+                    yield ShopItemRow(file_path, CAVE_NAME[cave_type],
+                                      ITEM_TYPES[shop_data[cave_type][i]],
+                                      shop_data[cave_type][i + 3])
+
+    for location, item in zip(OVERWORLD_ITEM_LOCATIONS, data_extractor.GetOverworldItems()):
+        yield OverworldItemRow(file_path, location, item)
+
+    requirements = data_extractor.GetRequirements()
+    if requirements["triforce"] == 0xFF:
+        yield RequirementRow(file_path, 'level_nine_triforce_requirement', 8, is_vanilla=True)
+    else:
+        yield RequirementRow(file_path, 'level_nine_triforce_requirement',
+                             requirements["triforce"])
+    yield RequirementRow(file_path, 'white_sword_cave_requirement', requirements["white_sword"])
+    yield RequirementRow(file_path, 'magical_sword_cave_requirement',
+                         requirements["magical_sword"])
+    yield RequirementRow(file_path, 'door_repair_charge', requirements["door_repair"])
+
+    for num, quote in enumerate(data_extractor.GetQuotes()):
+        yield QuoteRow(file_path, num, quote)
+    maybe_recorder_text = data_extractor.GetRecorderText()
+    if maybe_recorder_text:
+        yield RecorderTextRow(file_path, maybe_recorder_text)
+
+
+def IterFileRows(file_path: str,
+                 use_mmap: bool = True,
+                 cache_dir: Optional[str] = None,
+                 probe: bool = False) -> Iterator[Row]:
+    """Parses a rom file and yields its rows, or a single ErrorRow if it can't be parsed.
+
+    With probe=True, roms that fail ProbeFile() get an ErrorRow without being parsed.
+    """
+    try:
+        if probe:
+            probe_result = ProbeFile(file_path)
+            if not probe_result.is_supported:
+                yield ErrorRow(file_path, 'Unsupported rom (%s)' % probe_result.status)
+                return
+        with RomImage.FromFile(file_path, use_mmap=use_mmap) as rom_image:
+            data_extractor = DataExtractor(rom=rom_image)
+            if cache_dir:
+                from parse_cache import ParseCache
+                ParseCache(cache_dir).Parse(data_extractor)
+            else:
+                data_extractor.Parse()
+            # Built before yielding any, so a rom that fails partway only gets its ErrorRow.
+            rows = list(IterRows(file_path, data_extractor))
+    except OSError as e:
+        yield ErrorRow(file_path, '%s (%s)' % (READ_ERROR, e.strerror or e))
+        return
+    except (IndexError, KeyError, ValueError):
+        yield ErrorRow(file_path, PARSE_ERROR)
+        return
+    yield from rows
@@ -0,0 +1,55 @@
+import io
+import os
+import tempfile
+import unittest
+from export_rows import ErrorRow, IterFileRows, LevelRoomRow, QuoteRow, RequirementRow
+from row_writers import LinesRowWriter
+from rom_generator import RomGenerator
+
+
+class ExportRowsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.rom_path = os.path.join(self.temp_dir.name, 'rom.nes')
+        with open(self.rom_path, 'wb') as f:
+            f.write(RomGenerator(seed=2).Generate(0))
+        self.bad_rom_path = os.path.join(self.temp_dir.name, 'bad.nes')
+        with open(self.bad_rom_path, 'wb') as f:
+            f.write(bytes(0x100))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_rows(self):
+        rows = list(IterFileRows(self.rom_path))
+        level_rows = [row for row in rows if isinstance(row, LevelRoomRow)]
+        self.assertTrue(level_rows)
+        self.assertEqual(list(range(1, 10)), sorted(set(row.level_num for row in level_rows)))
+        self.assertEqual(list(range(0, 38)),
+                         [row.quote_num for row in rows if isinstance(row, QuoteRow)])
+        requirement = [row for row in rows if isinstance(row, RequirementRow)][1]
+        self.assertEqual('white_sword_cave_requirement', requirement.name)
+        self.assertEqual('%s,misc,white_sword_cave_requirement,%d' %
+                         (self.rom_path, requirement.value), requirement.ToCSV())
+
+    def test_error_row(self):
+        self.assertEqual([ErrorRow(self.bad_rom_path, 'Error parsing level data')],
+                         list(IterFileRows(self.bad_rom_path)))
+        missing_path = os.path.join(self.temp_dir.name, 'missing.nes')
+        for probe in [False, True]:
+            self.assertEqual(
+                [ErrorRow(missing_path, 'Error reading rom file (No such file or directory)')],
+                list(IterFileRows(missing_path, probe=probe)))
+
+    def test_writer(self):
+        stream = io.StringIO()
+        rows = list(IterFileRows(self.rom_path))
+        with LinesRowWriter(stream, batch_size=7) as writer:
+            writer.WriteRows(rows)
+            self.assertEqual(len(rows) - len(rows) % 7, stream.getvalue().count('\n'))
+        self.assertEqual([row.ToCSV() for row in rows], stream.getvalue().splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that the CLI, worker processes and batch jobs import. They must not
+# pull in the UI stack.
+HEADLESS_MODULES = ['cli', 'export_rows', 'row_writers', 'corpus_manifest', 'parse_cache',
+                    'profiling', 'rom_service']
+UI_PACKAGES = ['bokeh', 'pandas', 'pyarrow', 'requests', 'streamlit']
+
+# Cumulative import time allowed for cli, in microseconds. numpy accounts for
+# most of it.
+CLI_IMPORT_BUDGET_US = 500000
+
+
+def GetImportTimes(module_name):
+    """Returns the cumulative import time in microseconds of every module a fresh interpreter
+    imports for `import module_name`."""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                              'import %s' % module_name],
+                             cwd=REPO_DIR,
+                             capture_output=True,
+                             text=True,
+                             check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class ImportTimeTest(unittest.TestCase):
+
+    def test_headless_modules_skip_ui_packages(self):
+        for module_name in HEADLESS_MODULES:
+            imported = set(name.split('.')[0] for name in GetImportTimes(module_name))
+            self.assertEqual(set(), imported & set(UI_PACKAGES), module_name)
+
+    def test_level_figures_skip_streamlit(self):
+        try:
+            import bokeh
+        except ImportError:
+            self.skipTest('bokeh is not installed')
+        imported = set(name.split('.')[0] for name in GetImportTimes('level_figures'))
+        self.assertNotIn('streamlit', imported)
+
+    def test_cli_import_budget(self):
+        # Take the best of a few runs so a busy machine doesn't fail the test.
+        best = min(GetImportTimes('cli')['cli'] for _ in range(3))
+        self.assertLess(best, CLI_IMPORT_BUDGET_US)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+from typing import Sequence, Union
+import numpy as np
+from constants import WallType
+
+NUM_ROOMS = 0x80
+LEVEL_BLOCK_SIZE = 6 * NUM_ROOMS
+
+STAIRWAY_ROOM_TYPES = [0x1A, 0x1B, 0x1C]
+# Room types with a middle row pushblock that can reveal a stairway
+PUSHBLOCK_ROOM_TYPES = [0x01, 0x06, 0x07, 0x08, 0x09, 0x10, 0x0A, 0x0C, 0x0D, 0x11, 0x1F, 0x22]
+ENEMY_NUMS = np.array([3, 5, 6, 8], dtype=np.uint8)
+
+
+class DecodedLevel:
+    """Per-room attributes decoded from a 0x300-byte level block with array ops.
+
+    Every attribute is a uint8/bool array whose last axis is the room number,
+    so a single block gives shape (0x80,) and a stack of blocks shaped
+    (..., 0x300) gives (..., 0x80).
+    """
+
+    def __init__(self, level_blocks: np.ndarray) -> None:
+        tables = level_blocks.reshape(level_blocks.shape[:-1] + (6, NUM_ROOMS))
+        walls_ns = tables[..., 0, :]
+        walls_ew = tables[..., 1, :]
+        enemies = tables[..., 2, :]
+        room_flags = tables[..., 3, :]
+        items = tables[..., 4, :]
+        flags = tables[..., 5, :]
+
+        self.north_walls = walls_ns >> 5
+        self.south_walls = (walls_ns >> 2) & 0x07
+        self.west_walls = walls_ew >> 5
+        self.east_walls = (walls_ew >> 2) & 0x07
+        # For stairway rooms, tables 0 and 1 hold the stairway's exits instead.
+        self.stairway_left_exits = walls_ns & 0x7F
+        self.stairway_right_exits = walls_ew & 0x7F
+
+        self.room_types = room_flags & 0x3F
+        self.enemy_codes = (enemies & 0x3F) | ((room_flags & 0x80) >> 1)
+        self.enemy_nums = ENEMY_NUMS[enemies >> 6]
+        self.item_codes = items & 0x1F
+        self.is_drop = ((flags >> 2) & 0x01).astype(bool)
+
+        has_shutter = ((self.north_walls == WallType.SHUTTER_DOOR) |
+                       (self.south_walls == WallType.SHUTTER_DOOR) |
+                       (self.east_walls == WallType.SHUTTER_DOOR) |
+                       (self.west_walls == WallType.SHUTTER_DOOR))
+        has_pushblock = (np.isin(self.room_types, PUSHBLOCK_ROOM_TYPES) &
+                         ((room_flags >> 6) & 0x01).astype(bool))
+        self.has_stairway = (np.isin(self.room_types, STAIRWAY_ROOM_TYPES) |
+                             (~has_shutter & has_pushblock))
+
+    def __getitem__(self, index) -> "DecodedLevel":
+        """Indexes the leading axes of a stacked decode, e.g. decoded[rom_index, block_num]."""
+        decoded = DecodedLevel.__new__(DecodedLevel)
+        for name, value in vars(self).items():
+            setattr(decoded, name, value[index])
+        return decoded
+
+    def ToLists(self) -> SimpleNamespace:
+        """Returns the attributes as Python lists, which are faster for per-room lookups."""
+        return SimpleNamespace(**{name: value.tolist() for name, value in vars(self).items()})
+
+
+def DecodeLevelBlock(level_block: Union[Sequence[int], np.ndarray]) -> DecodedLevel:
+    if isinstance(level_block, np.ndarray):
+        blocks = level_block.astype(np.uint8, copy=False)
+    else:
+        blocks = np.frombuffer(bytes(level_block), dtype=np.uint8)
+    if blocks.shape[-1] != LEVEL_BLOCK_SIZE:
+        raise IndexError('Level blocks must be 0x%X bytes, got 0x%X' %
+                         (LEVEL_BLOCK_SIZE, blocks.shape[-1]))
+    return DecodedLevel(blocks)
@@ -0,0 +1,55 @@
+import random
+import unittest
+import numpy as np
+from level_decoder import DecodeLevelBlock
+
+
+class LevelDecoderTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.block = bytes(rng.randrange(256) for _ in range(0x300))
+
+    def test_decodes_room_attributes(self):
+        decoded = DecodeLevelBlock(self.block)
+        for room_num in range(0, 0x80):
+            ns_walls = self.block[room_num]
+            ew_walls = self.block[room_num + 0x80]
+            room_flags = self.block[room_num + 3 * 0x80]
+            self.assertEqual(ns_walls // 32 % 8, decoded.north_walls[room_num])
+            self.assertEqual(ns_walls // 4 % 8, decoded.south_walls[room_num])
+            self.assertEqual(ew_walls // 32 % 8, decoded.west_walls[room_num])
+            self.assertEqual(ew_walls // 4 % 8, decoded.east_walls[room_num])
+            self.assertEqual(room_flags % 0x40, decoded.room_types[room_num])
+            enemy_code = self.block[room_num + 2 * 0x80] % 0x40 + (0x40 if room_flags >= 0x80 else 0)
+            self.assertEqual(enemy_code, decoded.enemy_codes[room_num])
+            self.assertEqual([3, 5, 6, 8][self.block[room_num + 2 * 0x80] // 64],
+                             decoded.enemy_nums[room_num])
+            self.assertEqual(self.block[room_num + 4 * 0x80] % 0x20, decoded.item_codes[room_num])
+            self.assertEqual(self.block[room_num + 5 * 0x80] // 4 % 2 == 1,
+                             decoded.is_drop[room_num])
+
+    def test_stairway_flags(self):
+        block = bytearray(0x300)
+        block[3 * 0x80 + 0] = 0x1A  # Diamond Stair
+        block[3 * 0x80 + 1] = 0x01 | 0x40  # Spike Trap with a movable block
+        block[3 * 0x80 + 2] = 0x01 | 0x40
+        block[2] = 7 << 5  # ...but with a shutter door to the north
+        block[3 * 0x80 + 3] = 0x01  # Spike Trap without a movable block
+        decoded = DecodeLevelBlock(block)
+        self.assertEqual([True, True, False, False], decoded.has_stairway[:4].tolist())
+
+    def test_decodes_stacked_blocks(self):
+        stacked = np.frombuffer(self.block * 3, dtype=np.uint8).reshape(3, 0x300)
+        decoded = DecodeLevelBlock(stacked)
+        single = DecodeLevelBlock(self.block)
+        self.assertEqual((3, 0x80), decoded.room_types.shape)
+        np.testing.assert_array_equal(single.has_stairway, decoded.has_stairway[2])
+
+    def test_rejects_short_blocks(self):
+        with self.assertRaises(IndexError):
+            DecodeLevelBlock(self.block[:0x200])
+
+
+if __name__ == '__main__':
+    unittest.main()
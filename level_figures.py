@@ -0,0 +1,257 @@
+from bokeh.layouts import column, gridplot
+from bokeh.plotting import figure
+from bokeh.transform import dodge
+from bokeh.models import CDSView, ColumnDataSource, GroupFilter, Legend, Line, Rect
+import pandas as pd
+
+LEVEL_TOOLTIPS = [
+    ("Room Number", "@{room_num}"),
+    ("Col", "@{col}"),
+    ("Row", "@{row}"),
+    ("Stair", "@{stair_tooltip}"),
+    ("Room Type", "@{room_type}"),
+    ("Enemy Type", "@{enemy_type_tooltip}"),
+    ("Num Enemies", "@{enemy_num_tooltip}"),
+]
+# Width and height of each level in the full seed view
+FULL_SEED_PANEL_SIZE = 480
+
+
+def OverworldColumns(de):
+    return ColumnDataSource.from_df(pd.DataFrame.from_dict(de.data[0], orient='index'))
+
+
+def _NewOverworldFigure(source):
+    x_range = [str(x) for x in range(1, 17)]
+    y_range = [str(y) for y in range(1, 9)]
+    TOOLTIPS = [
+        ("Screen Number", "@{screen_num}"),
+        ("Col", "@{col}"),
+        ("Row", "@{row}"),
+        ("Cave", "@{cave}"),
+        ("Cave2", "@{cave_name}"),
+        ("Cave3", "@{cave_name_short}"),
+    ]
+    p = figure(title="Overworld",
+               width=800,
+               height=400,
+               x_range=x_range,
+               y_range=list(reversed(y_range)),
+               tools="hover",
+               toolbar_location=None,
+               tooltips=TOOLTIPS,
+               background_fill_color="white",
+               border_fill_color="white")
+
+    # Force white background on the plot area
+    p.background_fill_color = "white"
+    p.border_fill_color = "white"
+    p.outline_line_color = "black"
+
+    r = p.rect("x_coord", "y_coord", 0.95, 0.95, source=source, fill_alpha=0.6, color='#4CAF50')
+
+    text_props = dict(source=source, text_align="left", text_baseline="middle")
+    x = dodge("col", .1, range=p.x_range)
+    p.text(x=x,
+           y=dodge("y_coord", 0, range=p.y_range),
+           text="cave_name_short",
+           text_font_size="14px",
+           **text_props)
+    p.outline_line_color = None
+    p.grid.grid_line_color = None
+    p.axis.visible = False
+    p.axis.axis_line_color = None
+    p.axis.major_tick_line_color = None
+    p.axis.major_label_standoff = 0
+    return p
+
+
+def BuildOverworldFigure(de):
+    return _NewOverworldFigure(ColumnDataSource(data=OverworldColumns(de)))
+
+
+def _NewLevelFigure(title, size):
+    x_range = [str(x) for x in range(1, 9)]
+    y_range = [str(y) for y in range(1, 9)]
+    p = figure(title=title,
+               width=size,
+               height=size,
+               x_range=x_range,
+               y_range=list(reversed(y_range)),
+               tools="hover",
+               toolbar_location=None,
+               tooltips=LEVEL_TOOLTIPS,
+               background_fill_color="white",
+               border_fill_color="white")
+
+    # Force white background on the plot area
+    p.background_fill_color = "white"
+    p.border_fill_color = "white"
+    p.outline_line_color = "black"
+    return p
+
+
+def _DrawLevel(p, sources, room_color, text_font_size, level_num=None):
+    """Draws a level's rooms, doors, walls and labels from the ToRenderPayload() sources.
+
+    room_color is a color, or the rooms column holding each room's color.
+    With level_num, the sources can hold several levels and only rows of that
+    level are drawn.
+    """
+    level_filter = None if level_num is None else GroupFilter(column_name='level', group=level_num)
+
+    def View():
+        # Each renderer needs its own view, but they can share the filter.
+        return CDSView() if level_filter is None else CDSView(filter=level_filter)
+
+    r = p.rect("x_coord",
+               "y_coord",
+               0.8,
+               0.8,
+               source=sources['rooms'],
+               view=View(),
+               fill_alpha=0.6,
+               color=room_color)
+    p.rect("x",
+           "y",
+           0.1,
+           0.1,
+           source=sources['doors'],
+           view=View(),
+           fill_alpha=0.6,
+           color="color")
+    p.rect("x",
+           "y",
+           "width",
+           "height",
+           source=sources['walls'],
+           view=View(),
+           fill_alpha=0.6,
+           color="red")
+
+    for text, y_offset in [("room_type", -0.2), ("enemy_info", -0.4), ("item_info", -0.6),
+                           ("stair_info", -0.8)]:
+        p.text(x=dodge("col", -0.86, range=p.x_range),
+               y=dodge("row", y_offset, range=p.y_range),
+               text=text,
+               text_font_style="normal",
+               text_font_size=text_font_size,
+               text_align="left",
+               text_baseline="middle",
+               source=sources['rooms'],
+               view=View())
+
+    p.outline_line_color = None
+    p.grid.grid_line_color = None
+    p.axis.visible = False
+    p.axis.axis_line_color = None
+    p.axis.major_tick_line_color = None
+    p.axis.major_label_standoff = 0
+    p.hover.renderers = [r]  # only hover element boxes
+
+
+def _AddLegend(p, place):
+    source = ColumnDataSource(data={'x': [-1], 'y': [-1], 'w': [.1], 'h': [.1]})
+    bomb_wall = p.add_glyph(
+        source, Rect(x="x", y="y", width="w", height="h", fill_color='blue', fill_alpha=0.6))
+    locked_door = p.add_glyph(
+        source, Rect(x="x", y="y", width="w", height="h", fill_color='orange', fill_alpha=0.6))
+    walk_through_wall = p.add_glyph(
+        source, Rect(x="x", y="y", width="w", height="h", fill_color='purple', fill_alpha=0.6))
+    shutter_door = p.add_glyph(
+        source, Rect(x="x", y="y", width="w", height="h", fill_color='brown', fill_alpha=0.6))
+    open_door = p.add_glyph(
+        source, Rect(x="x", y="y", width="w", height="h", fill_color='black', fill_alpha=0.6))
+    solid_wall = p.add_glyph(source,
+                             Line(x="x", y="y", line_color="red", line_width=3, line_dash="solid"))
+
+    legend = Legend(title='The Legend of Door & Wall Types',
+                    items=[("Open Door    ", [open_door]), ("Shutter Door    ", [shutter_door]),
+                           ("Key-Locked Door    ", [locked_door]),
+                           ("Bombable Wall    ", [bomb_wall]),
+                           ("Walk-Through Wall    ", [walk_through_wall]),
+                           ("Solid Wall", [solid_wall])],
+                    location='top_left',
+                    orientation='horizontal',
+                    label_text_color='black')
+    p.add_layout(legend, place)
+
+
+def BuildLevelFigure(de, level_num):
+    palette = de.GetLevelColorPalette(level_num)
+    payload = de.GetLevelRenderPayload(level_num)
+    if not payload['rooms']['room_num']:
+        return None
+
+    p = _NewLevelFigure("Level %d" % level_num, 800)
+    _DrawLevel(p, {name: ColumnDataSource(data=columns) for name, columns in payload.items()},
+               palette[2], '8pt')
+    _AddLegend(p, 'below')
+    return p
+
+
+class FullSeedFigure:
+    """The overworld above a 3x3 grid of levels 1-9, with the legend below.
+
+    The levels are drawn from one ColumnDataSource per kind of glyph holding
+    every level, which each panel filters down to its own level, so a seed's
+    room data is sent to the browser once. Only the sources' data depends on
+    the seed, so Update() redraws the same layout for another one.
+    """
+
+    def __init__(self, panel_size=FULL_SEED_PANEL_SIZE):
+        self.sources = {
+            name: ColumnDataSource() for name in ['overworld', 'rooms', 'doors', 'walls']
+        }
+        text_font_size = '%dpt' % round(8 * panel_size / 800)
+        level_figures = []
+        for level_num in range(1, 10):
+            p = _NewLevelFigure("Level %d" % level_num, panel_size)
+            _DrawLevel(p, self.sources, 'color', text_font_size, level_num)
+            level_figures.append(p)
+
+        overworld = _NewOverworldFigure(self.sources['overworld'])
+        overworld.width = 3 * panel_size
+        overworld.height = 3 * panel_size // 2
+        legend = figure(width=3 * panel_size,
+                        height=80,
+                        x_range=(0, 1),
+                        y_range=(0, 1),
+                        toolbar_location=None,
+                        outline_line_color=None)
+        legend.axis.visible = False
+        legend.grid.grid_line_color = None
+        _AddLegend(legend, 'center')
+        self.layout = column(overworld, gridplot(level_figures, ncols=3, toolbar_location=None),
+                             legend)
+
+    @staticmethod
+    def SourceData(de):
+        """Returns the data of each source for a seed, or None if it has no rooms to draw."""
+        payload = de.GetRoomTable(range(1, 10)).ToRenderPayload()
+        if not payload['rooms']['room_num']:
+            return None
+        room_colors = {
+            level_num: de.GetLevelColorPalette(level_num)[2] for level_num in range(1, 10)
+        }
+        payload['rooms'] = dict(
+            payload['rooms'],
+            color=[room_colors[level_num] for level_num in payload['rooms']['level'].tolist()])
+        payload['overworld'] = OverworldColumns(de)
+        return payload
+
+    def Update(self, de):
+        """Redraws the layout for another seed. Returns False if it has no rooms to draw."""
+        data = self.SourceData(de)
+        if data is None:
+            return False
+        for name, columns in data.items():
+            self.sources[name].data = columns
+        return True
+
+
+def BuildFullSeedFigure(de, panel_size=FULL_SEED_PANEL_SIZE):
+    full_seed = FullSeedFigure(panel_size)
+    if not full_seed.Update(de):
+        return None
+    return full_seed.layout
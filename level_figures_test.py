@@ -0,0 +1,50 @@
+import unittest
+from bokeh.models import GlyphRenderer
+from data_extractor import DataExtractor
+from level_figures import BuildFullSeedFigure, BuildLevelFigure
+from rom_generator import RomGenerator
+from rom_image import RomImage
+
+
+class LevelFiguresTest(unittest.TestCase):
+
+    def setUp(self):
+        self.de = DataExtractor(RomImage(RomGenerator(seed=9).Generate(0)))
+
+    def test_level_figure(self):
+        p = BuildLevelFigure(self.de, 4)
+        sources = set(id(r.data_source) for r in p.renderers if isinstance(r, GlyphRenderer))
+        # rooms, doors, walls and the legend's placeholder glyphs
+        self.assertEqual(4, len(sources))
+        self.assertEqual(1, len(p.hover.renderers))
+
+    def test_full_seed_shares_sources(self):
+        layout = BuildFullSeedFigure(self.de)
+        overworld, grid, legend = layout.children
+        panels = [child[0] for child in grid.children]
+        self.assertEqual(9, len(panels))
+        sources = None
+        for level_num, p in zip(range(1, 10), panels):
+            renderers = [r for r in p.renderers if isinstance(r, GlyphRenderer)]
+            self.assertEqual([level_num] * len(renderers), [r.view.filter.group for r in renderers])
+            panel_sources = set(r.data_source for r in renderers)
+            self.assertEqual(3, len(panel_sources))
+            if sources is None:
+                sources = panel_sources
+            self.assertEqual(sources, panel_sources)
+            self.assertEqual(p.hover.tooltips, panels[0].hover.tooltips)
+
+        # _DrawLevel draws rooms, then doors, then walls.
+        renderers = [r for r in panels[0].renderers if isinstance(r, GlyphRenderer)]
+        shared = dict(zip(['rooms', 'doors', 'walls'], [r.data_source.data for r in renderers]))
+        for level_num in range(1, 10):
+            for name, columns in self.de.GetLevelRenderPayload(level_num).items():
+                x = 'x_coord' if name == 'rooms' else 'x'
+                self.assertEqual(
+                    list(columns[x]),
+                    [x_val for x_val, level in zip(shared[name][x], shared[name]['level'])
+                     if level == level_num])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from constants import Direction, WallType
+from level_decoder import NUM_ROOMS, DecodedLevel
+
+# Edge label for transport stairways. Door edges are labelled with their WallType.
+STAIRWAY_EDGE = 8
+NO_STAIRWAY = 0xFF
+EDGE_DIRECTIONS = [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
+
+
+class LevelGraph:
+    """Room adjacency for one level in CSR form.
+
+    The edges leaving room r are targets[indptr[r]:indptr[r + 1]], in the
+    order the level walk follows them: north, east, south, west and then the
+    room's stairway, if any. Door edges are labelled with the wall type on r's
+    side and stairway edges with STAIRWAY_EDGE; stairway_rooms holds the
+    transport stairway room an edge goes through (NO_STAIRWAY for doors).
+    """
+
+    def __init__(self, indptr: np.ndarray, targets: np.ndarray, labels: np.ndarray,
+                 directions: np.ndarray, stairway_rooms: np.ndarray, stair_items: np.ndarray,
+                 start_room_num: int, entrance_direction: Direction) -> None:
+        self.indptr = indptr
+        self.targets = targets
+        self.labels = labels
+        self.directions = directions
+        self.stairway_rooms = stairway_rooms
+        self.stair_items = stair_items
+        self.start_room_num = start_room_num
+        self.entrance_direction = entrance_direction
+        self._edges: Optional[List[List[Tuple[int, int, int, int]]]] = None
+        self._walk: Optional[Tuple[List[int], Dict[int, int], Set[int]]] = None
+
+    @classmethod
+    def Build(cls, level_block: Sequence[int], decoded: DecodedLevel, start_room_num: int,
+              entrance_direction: Direction, stairway_room_nums: List[int]) -> "LevelGraph":
+        room_nums = np.arange(NUM_ROOMS)
+        walls = np.stack([
+            decoded.north_walls, decoded.east_walls, decoded.south_walls, decoded.west_walls
+        ], axis=1)
+        neighbors = room_nums[:, None] + np.array(EDGE_DIRECTIONS)
+        door_mask = (walls != WallType.SOLID_WALL) & (neighbors >= 0) & (neighbors < NUM_ROOMS)
+
+        # Only the first stairway in the list that starts or ends in a room counts.
+        stair_targets = np.zeros(NUM_ROOMS, dtype=np.intp)
+        stairway_for_room = np.full(NUM_ROOMS, NO_STAIRWAY, dtype=np.uint8)
+        stair_items = np.full(NUM_ROOMS, NO_STAIRWAY, dtype=np.uint8)
+        for room_num in np.flatnonzero(decoded.has_stairway).tolist():
+            for stairway_room_num in stairway_room_nums:
+                left_exit = level_block[stairway_room_num] % 0x80
+                right_exit = level_block[stairway_room_num + 0x80] % 0x80
+                if left_exit == room_num and right_exit == room_num:
+                    stair_items[room_num] = level_block[stairway_room_num + 4 * 0x80] % 0x20
+                    break
+                elif left_exit == room_num or right_exit == room_num:
+                    stair_targets[room_num] = right_exit if left_exit == room_num else left_exit
+                    stairway_for_room[room_num] = stairway_room_num
+                    break
+        stair_mask = stairway_for_room != NO_STAIRWAY
+
+        edge_mask = np.concatenate([door_mask, stair_mask[:, None]], axis=1)
+        indptr = np.zeros(NUM_ROOMS + 1, dtype=np.int32)
+        np.cumsum(edge_mask.sum(axis=1), out=indptr[1:])
+        return cls(
+            indptr=indptr,
+            targets=np.concatenate([neighbors, stair_targets[:, None]],
+                                   axis=1)[edge_mask].astype(np.uint8),
+            labels=np.concatenate([walls, np.full((NUM_ROOMS, 1), STAIRWAY_EDGE)],
+                                  axis=1)[edge_mask].astype(np.uint8),
+            directions=np.concatenate([
+                np.broadcast_to(np.array(EDGE_DIRECTIONS), (NUM_ROOMS, 4)),
+                np.full((NUM_ROOMS, 1), Direction.NO_DIRECTION)
+            ], axis=1)[edge_mask].astype(np.int8),
+            stairway_rooms=np.concatenate([
+                np.full((NUM_ROOMS, 4), NO_STAIRWAY), stairway_for_room[:, None]
+            ], axis=1)[edge_mask].astype(np.uint8),
+            stair_items=stair_items,
+            start_room_num=start_room_num,
+            entrance_direction=entrance_direction)
+
+    def Edges(self, room_num: int) -> List[Tuple[int, int, int, int]]:
+        """Returns (target, label, direction, stairway room) for each edge leaving a room."""
+        if self._edges is None:
+            edges = list(
+                zip(self.targets.tolist(), self.labels.tolist(), self.directions.tolist(),
+                    self.stairway_rooms.tolist()))
+            indptr = self.indptr.tolist()
+            self._edges = [edges[indptr[num]:indptr[num + 1]] for num in range(NUM_ROOMS)]
+        return self._edges[room_num]
+
+    def Walk(self) -> Tuple[List[int], Dict[int, int], Set[int]]:
+        """Walks the level from its entrance the way the visualizer always has.
+
+        Returns the reachable room numbers in visit order, a map of item stairway
+        rooms to the item code they hold, and the set of transport stairway rooms.
+        """
+        if self._walk is None:
+            visited_room_nums: List[int] = []
+            visited = set()
+            transport_staircase_room_nums = set()
+            rooms_to_visit = [(self.start_room_num, self.entrance_direction)]
+            while rooms_to_visit:
+                room_num, from_dir = rooms_to_visit.pop()
+                if room_num in visited or room_num not in range(0, NUM_ROOMS):
+                    continue
+                visited.add(room_num)
+                visited_room_nums.append(room_num)
+                for target, _, direction, stairway_room_num in self.Edges(room_num):
+                    if from_dir and direction == from_dir:
+                        continue
+                    if stairway_room_num != NO_STAIRWAY:
+                        transport_staircase_room_nums.add(stairway_room_num)
+                    rooms_to_visit.append((target, Direction.NO_DIRECTION))
+            stair_items = self.stair_items.tolist()
+            item_stairways = {
+                room_num: stair_items[room_num]
+                for room_num in visited_room_nums
+                if stair_items[room_num] != NO_STAIRWAY
+            }
+            self._walk = visited_room_nums, item_stairways, transport_staircase_room_nums
+        return self._walk
+
+    def Reachable(self, blocked_labels: Iterable[int] = ()) -> Set[int]:
+        """Returns the rooms reachable from the entrance without using edges with blocked labels."""
+        return set(self._Search(blocked_labels))
+
+    def ShortestPath(self, room_num: int,
+                     blocked_labels: Iterable[int] = ()) -> Optional[List[int]]:
+        """Returns the rooms on a shortest path from the start room to room_num, or None."""
+        parents = self._Search(blocked_labels)
+        if room_num not in parents:
+            return None
+        path = [room_num]
+        while parents[path[-1]] is not None:
+            path.append(parents[path[-1]])
+        return path[::-1]
+
+    def RoomsBehind(self, labels: Iterable[int]) -> Set[int]:
+        """Returns the reachable rooms that can only be reached through edges with these labels,
+        e.g. RoomsBehind([WallType.BOMB_HOLE])."""
+        return self.Reachable() - self.Reachable(labels)
+
+    def _Search(self, blocked_labels: Iterable[int]) -> Dict[int, Optional[int]]:
+        """Breadth-first search from the start room, returning each reached room's parent."""
+        blocked = set(blocked_labels)
+        if self.start_room_num not in range(0, NUM_ROOMS):
+            return {}
+        parents: Dict[int, Optional[int]] = {self.start_room_num: None}
+        queue = deque([self.start_room_num])
+        while queue:
+            room_num = queue.popleft()
+            for target, label, direction, _ in self.Edges(room_num):
+                if room_num == self.start_room_num and direction == self.entrance_direction:
+                    continue
+                if label in blocked or target in parents:
+                    continue
+                parents[target] = room_num
+                queue.append(target)
+        return parents
@@ -0,0 +1,53 @@
+import io
+import unittest
+from constants import Direction, WallType
+from data_extractor import DataExtractor
+from level_decoder import DecodeLevelBlock
+from level_graph import STAIRWAY_EDGE, LevelGraph
+from testutil import MakeBlankRom
+
+SOLID_WALLS = (WallType.SOLID_WALL << 5) | (WallType.SOLID_WALL << 2)
+
+
+class LevelGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        # A level of solid walls except for a bombable wall east of the start room, which
+        # has a stairway to room 0x10.
+        block = bytearray(0x300)
+        block[0:0x100] = bytes([SOLID_WALLS] * 0x100)
+        block[0x80 + 0x73] = (WallType.SOLID_WALL << 5) | (WallType.BOMB_HOLE << 2)
+        block[3 * 0x80 + 0x74] = 0x1A
+        block[0x7F] = 0x74
+        block[0x80 + 0x7F] = 0x10
+        self.graph = LevelGraph.Build(block, DecodeLevelBlock(block), 0x73, Direction.SOUTH,
+                                      [0x7F])
+
+    def test_edges(self):
+        self.assertEqual([(0x74, WallType.BOMB_HOLE, Direction.EAST, 0xFF)],
+                         self.graph.Edges(0x73))
+        self.assertEqual([(0x10, STAIRWAY_EDGE, Direction.NO_DIRECTION, 0x7F)],
+                         self.graph.Edges(0x74))
+        self.assertEqual(len(self.graph.targets), self.graph.indptr[-1])
+
+    def test_queries(self):
+        room_nums, item_stairways, transport_stairways = self.graph.Walk()
+        self.assertEqual([0x73, 0x74, 0x10], room_nums)
+        self.assertEqual({}, item_stairways)
+        self.assertEqual({0x7F}, transport_stairways)
+        self.assertEqual({0x73, 0x74, 0x10}, self.graph.Reachable())
+        self.assertEqual([0x73, 0x74, 0x10], self.graph.ShortestPath(0x10))
+        self.assertIsNone(self.graph.ShortestPath(0x11))
+        self.assertEqual({0x74, 0x10}, self.graph.RoomsBehind([WallType.BOMB_HOLE]))
+        self.assertEqual({0x10}, self.graph.RoomsBehind([STAIRWAY_EDGE]))
+
+    def test_open_level(self):
+        de = DataExtractor(io.BytesIO(MakeBlankRom()))
+        graph = de.GetLevelGraph(1)
+        self.assertEqual(set(range(0, 0x80)), graph.Reachable())
+        self.assertEqual([0x73, 0x72, 0x71], graph.ShortestPath(0x71))
+        self.assertEqual(set(), graph.RoomsBehind([WallType.LOCKED_DOOR_1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+from constants import CAVE_NAME, CAVE_NAME_SHORT, CHAR_MAP, DOOR_TYPES, ENEMY_TYPES, ITEM_TYPES
+from constants import OVERWORLD_BLOCK_TYPES, ROOM_TYPES
+
+# Dense versions of the code -> label dicts in constants.py, indexed by code over
+# the whole range a ROM byte can hold, with the fallback labels already
+# rendered. The *_ARRAY versions are NumPy object arrays for mapping arrays of
+# codes with take().
+
+NUM_CODES = 0x100
+
+
+def _Dense(labels: Dict[int, str], fallback: str, num_codes: int = NUM_CODES) -> Tuple[str, ...]:
+    """Returns labels for every code, formatting the code into `fallback` for missing ones."""
+    if '%' in fallback:
+        return tuple(labels.get(code, fallback % code) for code in range(num_codes))
+    return tuple(labels.get(code, fallback) for code in range(num_codes))
+
+
+def _Sparse(labels: Dict[int, str], num_codes: int = NUM_CODES) -> Tuple[Optional[str], ...]:
+    return tuple(labels.get(code) for code in range(num_codes))
+
+
+def _ObjectArray(labels: Tuple[Optional[str], ...]) -> np.ndarray:
+    array = np.empty(len(labels), dtype=object)
+    array[:] = labels
+    return array
+
+
+ROOM_TYPE_LABELS = _Dense(ROOM_TYPES, 'ERROR CODE %X')
+# Enemy names for tooltips, and for the room text, which also shows the count
+# for enemy codes in ENEMY_COUNT_SHOWN.
+ENEMY_TYPE_LABELS = _Dense(ENEMY_TYPES, 'E %X')
+ENEMY_INFO_LABELS = _Dense(ENEMY_TYPES, 'ERROR CODE %X')
+ENEMY_COUNT_SHOWN = tuple(code in ENEMY_TYPES and (code <= 0x30 or code >= 0x62) and code != 0x00
+                          for code in range(NUM_CODES))
+# Item and door codes outside the dicts never come out of a level decode, so
+# they map to ''. Shop and overworld item bytes can hold anything, so those
+# still look codes up in ITEM_TYPES to fail loudly.
+ITEM_LABELS = _Dense(ITEM_TYPES, '')
+DOOR_LABELS = _Dense(DOOR_TYPES, '')
+# None for screens and cave destinations without a label
+OVERWORLD_BLOCK_LABELS = _Sparse(OVERWORLD_BLOCK_TYPES, 0x80)
+CAVE_NAME_LABELS = _Sparse(CAVE_NAME, 0x40)
+CAVE_NAME_SHORT_LABELS = _Sparse(CAVE_NAME_SHORT, 0x40)
+ROOM_NUM_LABELS = tuple('%X' % room_num for room_num in range(NUM_CODES))
+HEX_LABELS = tuple('%x' % num for num in range(NUM_CODES))
+
+ROOM_TYPE_LABEL_ARRAY = _ObjectArray(ROOM_TYPE_LABELS)
+ENEMY_TYPE_LABEL_ARRAY = _ObjectArray(ENEMY_TYPE_LABELS)
+ENEMY_INFO_LABEL_ARRAY = _ObjectArray(ENEMY_INFO_LABELS)
+ENEMY_COUNT_SHOWN_ARRAY = np.array(ENEMY_COUNT_SHOWN, dtype=bool)
+ITEM_LABEL_ARRAY = _ObjectArray(ITEM_LABELS)
+DOOR_LABEL_ARRAY = _ObjectArray(DOOR_LABELS)
+ROOM_NUM_LABEL_ARRAY = _ObjectArray(ROOM_NUM_LABELS)
+HEX_LABEL_ARRAY = _ObjectArray(HEX_LABELS)
+# '%d ' for each enemy count, to prefix ENEMY_INFO_LABELS with
+ENEMY_COUNT_PREFIX_ARRAY = _ObjectArray(tuple('%d ' % num for num in range(NUM_CODES)))
+
+
+def _BuildQuoteTable() -> Dict[int, str]:
+    # Each byte of a quote is a character in its low 6 bits. High bits of 1 or
+    # 2 add a space after it and 3 marks the last character.
+    table = {}
+    for val in range(0, NUM_CODES):
+        if val & 0x3F in CHAR_MAP:
+            table[val] = CHAR_MAP[val & 0x3F] + (' ' if (val >> 6) in [1, 2] else '')
+    return table
+
+
+def _BuildQuoteAsciiPairs() -> np.ndarray:
+    # The text of each quote byte as two little-endian ASCII codes padded with
+    # 0s. Bytes that aren't in CHAR_MAP get 0xFFFF, which isn't ASCII.
+    codes = np.full(NUM_CODES, 0xFFFF, dtype='<u2')
+    for val, text in QUOTE_TABLE.items():
+        code = text.encode('ascii').ljust(2, b'\0')
+        codes[val] = code[0] | code[1] << 8
+    return codes
+
+
+# str.translate() tables from the bytes of a latin-1 decoded quote or recorder
+# word to their text, and the bytes each table knows.
+QUOTE_TABLE = _BuildQuoteTable()
+QUOTE_KNOWN_BYTES = bytes(QUOTE_TABLE)
+RECORDER_TABLE = {val: CHAR_MAP[val] for val in CHAR_MAP}
+RECORDER_KNOWN_BYTES = bytes(RECORDER_TABLE)
+QUOTE_ASCII_PAIRS = _BuildQuoteAsciiPairs()
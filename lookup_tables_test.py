@@ -0,0 +1,37 @@
+import unittest
+from constants import CAVE_NAME, ENEMY_TYPES, ITEM_TYPES, OVERWORLD_BLOCK_TYPES, ROOM_TYPES
+from lookup_tables import CAVE_NAME_LABELS, ENEMY_COUNT_SHOWN, ENEMY_INFO_LABELS
+from lookup_tables import ENEMY_TYPE_LABEL_ARRAY, ITEM_LABELS, OVERWORLD_BLOCK_LABELS
+from lookup_tables import ROOM_TYPE_LABELS
+
+
+class LookupTablesTest(unittest.TestCase):
+
+    def test_dense_tables_match_dicts(self):
+        for code in range(0x100):
+            self.assertEqual(ROOM_TYPES.get(code, 'ERROR CODE %X' % code), ROOM_TYPE_LABELS[code])
+            self.assertEqual(ENEMY_TYPES.get(code, 'ERROR CODE %X' % code),
+                             ENEMY_INFO_LABELS[code])
+            self.assertEqual(ITEM_TYPES.get(code, ''), ITEM_LABELS[code])
+        self.assertEqual('E FF', ENEMY_TYPE_LABEL_ARRAY.take([0xFF])[0])
+        self.assertEqual(['E FF', ENEMY_TYPES[0x01]],
+                         ENEMY_TYPE_LABEL_ARRAY.take([0xFF, 0x01]).tolist())
+
+    def test_enemy_count_shown(self):
+        self.assertFalse(ENEMY_COUNT_SHOWN[0x00])
+        for code in ENEMY_TYPES:
+            self.assertEqual(code != 0x00 and (code <= 0x30 or code >= 0x62),
+                             ENEMY_COUNT_SHOWN[code])
+        self.assertFalse(any(ENEMY_COUNT_SHOWN[code]
+                             for code in range(0x100)
+                             if code not in ENEMY_TYPES))
+
+    def test_sparse_tables(self):
+        self.assertEqual(0x80, len(OVERWORLD_BLOCK_LABELS))
+        self.assertEqual(set(OVERWORLD_BLOCK_TYPES),
+                         set(code for code, label in enumerate(OVERWORLD_BLOCK_LABELS) if label))
+        self.assertEqual(len(CAVE_NAME), sum(label is not None for label in CAVE_NAME_LABELS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,277 @@
+# Usage:
+#   To write an HTML map sheet of every rom:  python map_export.py --files="*.nes" --output-dir=maps
+#   To export on every core:  python map_export.py --jobs=0 --files="*.nes" --output-dir=maps
+#   To make each HTML file self-contained instead of sharing one copy of BokehJS:
+#     python map_export.py --resources=inline --files="*.nes" --output-dir=maps
+#   To write SVG or PNG images (needs selenium and a browser driver):
+#     python map_export.py --format=svg --files="*.nes" --output-dir=maps
+
+import argparse
+import contextlib
+import glob
+import html
+import itertools
+import json
+import os
+import sys
+from typing import Optional, Tuple
+from bokeh.core.serialization import Serializer
+from bokeh.embed import json_item
+from bokeh.models import Plot
+from bokeh.resources import Resources
+from data_extractor import DataExtractor
+from export_rows import PARSE_ERROR, READ_ERROR
+from level_figures import FullSeedFigure
+from rom_image import RomImage
+from rom_probe import ProbeFile
+
+FORMATS = ['html', 'svg', 'png']
+RESOURCE_MODES = ['shared', 'inline']
+TARGET_ID = 'map'
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{scripts}
+</head>
+<body>
+<div id="{target}"></div>
+<script type="application/json" id="{target}-item">{item}</script>
+<script>
+const item = JSON.parse(document.getElementById("{target}-item").textContent);
+Bokeh.embed.embed_item(item, "{target}");
+</script>
+</body>
+</html>
+"""
+
+
+def _BokehJs() -> Tuple[str, str]:
+    """Returns the file name and source of the BokehJS bundle the maps need."""
+    file_name = os.path.basename(Resources(mode='cdn', components=['bokeh']).js_files[0])
+    return file_name, Resources(mode='inline', components=['bokeh']).js_raw[0]
+
+
+def WriteSharedResources(output_dir: str) -> None:
+    """Writes the BokehJS bundle that HTML maps exported with resources='shared' load."""
+    file_name, js = _BokehJs()
+    path = os.path.join(output_dir, file_name)
+    if not os.path.exists(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(js)
+
+
+def _EncodeColumns(columns):
+    """Encodes a ColumnDataSource's data like Bokeh's Serializer, but passes lists of strings
+    through as they are instead of encoding them item by item."""
+    serializer = Serializer(deferred=False)
+    entries = []
+    for name, values in columns.items():
+        if not (isinstance(values, list) and all(type(value) is str for value in values)):
+            values = serializer.encode(values)
+        entries.append((name, values))
+    return {'type': 'map', 'entries': entries}
+
+
+class HtmlMapWriter:
+    """Writes FullSeedFigure map sheets as standalone HTML.
+
+    Nearly all of the time it takes Bokeh to serialize the layout goes into its
+    models, not their data, and only the data changes between seeds. So the
+    layout is serialized once, with the first seed's data, and each later seed
+    only has its sources' data encoded into that JSON.
+    """
+
+    def __init__(self, resources: str = 'shared') -> None:
+        file_name, js = _BokehJs()
+        if resources == 'inline':
+            self._scripts = '<script type="text/javascript">\n%s\n</script>' % js
+        else:
+            self._scripts = '<script type="text/javascript" src="%s"></script>' % file_name
+        self._template = FullSeedFigure()
+        self._item = None
+        # name -> the serialized attributes of that ColumnDataSource in self._item
+        self._source_attributes = {}
+
+    def Write(self, de: DataExtractor, path: str, title: str) -> bool:
+        """Writes the map of one seed. Returns False if it has no rooms to draw."""
+        if self._item is None:
+            if not self._template.Update(de):
+                return False
+            self._item = json_item(self._template.layout, TARGET_ID)
+            self._FindSources(self._item['doc'])
+        else:
+            data = self._template.SourceData(de)
+            if data is None:
+                return False
+            for name, columns in data.items():
+                self._source_attributes[name]['data'] = _EncodeColumns(columns)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(
+                HTML_TEMPLATE.format(title=html.escape(title),
+                                     scripts=self._scripts,
+                                     target=TARGET_ID,
+                                     item=json.dumps(self._item).replace('</', '<\\/')))
+        return True
+
+    def _FindSources(self, value) -> None:
+        # Each model is serialized in full where it first appears and by id after that.
+        ids = {source.id: name for name, source in self._template.sources.items()}
+        stack = [value]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, dict):
+                if value.get('id') in ids and 'attributes' in value:
+                    self._source_attributes[ids[value['id']]] = value['attributes']
+                stack.extend(value.values())
+            elif isinstance(value, list):
+                stack.extend(value)
+        if len(self._source_attributes) != len(ids):
+            raise RuntimeError('Bokeh serialized the map layout without its data sources')
+
+
+class ImageMapWriter:
+    """Writes FullSeedFigure map sheets as SVG or PNG through Bokeh's browser based export."""
+
+    def __init__(self, output_format: str) -> None:
+        self.output_format = output_format
+        self._template = FullSeedFigure()
+        if output_format == 'svg':
+            for plot in self._template.layout.select({'type': Plot}):
+                plot.output_backend = 'svg'
+
+    def Write(self, de: DataExtractor, path: str, title: str) -> bool:
+        if not self._template.Update(de):
+            return False
+        from bokeh.io import export_png, export_svg
+        if self.output_format == 'svg':
+            export_svg(self._template.layout, filename=path)
+        else:
+            export_png(self._template.layout, filename=path)
+        return True
+
+
+# Each worker process keeps one writer, and so one layout, for every rom it exports.
+_writers = {}
+
+
+def _GetWriter(output_format: str, resources: str):
+    key = (output_format, resources)
+    if key not in _writers:
+        if output_format == 'html':
+            _writers[key] = HtmlMapWriter(resources)
+        else:
+            _writers[key] = ImageMapWriter(output_format)
+    return _writers[key]
+
+
+def _MapName(file_path: str) -> str:
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def ExportFile(file_path: str,
+               output_dir: str,
+               output_format: str = 'html',
+               resources: str = 'shared') -> Tuple[str, Optional[str]]:
+    """Writes the map sheet of one rom. Returns its path, or the rom's path and an error."""
+    name = _MapName(file_path)
+    output_path = os.path.join(output_dir, '%s.%s' % (name, output_format))
+    try:
+        probe_result = ProbeFile(file_path)
+        if not probe_result.is_supported:
+            return file_path, 'Unsupported rom (%s)' % probe_result.status
+        with RomImage.FromFile(file_path) as rom_image:
+            wrote_map = _GetWriter(output_format, resources).Write(DataExtractor(rom_image),
+                                                                    output_path, name)
+    except OSError as e:
+        if e.filename == output_path:
+            return file_path, 'Error writing map file (%s)' % e.strerror
+        return file_path, '%s (%s)' % (READ_ERROR, e.strerror or e)
+    except (IndexError, KeyError, ValueError):
+        return file_path, PARSE_ERROR
+    if not wrote_map:
+        return file_path, 'No rooms to draw'
+    return output_path, None
+
+
+def ExportFiles(files_to_export, output_dir, output_format='html', resources='shared', jobs=1):
+    """Yields ExportFile()'s result for each rom, in order, using `jobs` processes (0 = one per
+    core).
+
+    Maps are named after their rom's file name, so a rom whose map would
+    overwrite an earlier rom's gets an error instead.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if output_format == 'html' and resources == 'shared':
+        WriteSharedResources(output_dir)
+    first_paths = {}
+    # For each rom, None or the earlier rom whose map has the same name
+    duplicate_of = []
+    for file_path in files_to_export:
+        name = _MapName(file_path)
+        duplicate_of.append(first_paths.get(name))
+        first_paths.setdefault(name, file_path)
+    unique_files = [
+        file_path for file_path, first_path in zip(files_to_export, duplicate_of)
+        if first_path is None
+    ]
+    args = (itertools.repeat(output_dir), itertools.repeat(output_format),
+            itertools.repeat(resources))
+    with contextlib.ExitStack() as stack:
+        if jobs == 1:
+            results = map(ExportFile, unique_files, *args)
+        else:
+            import concurrent.futures
+            max_workers = jobs or os.cpu_count()
+            chunksize = max(1, min(16, len(unique_files) // (max_workers * 4)))
+            executor = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(max_workers=max_workers))
+            results = executor.map(ExportFile, unique_files, *args, chunksize=chunksize)
+        for file_path, first_path in zip(files_to_export, duplicate_of):
+            if first_path is None:
+                yield next(results)
+            else:
+                yield file_path, 'Same map file name as %s' % first_path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=str, required=True, help='Roms to export maps of')
+    parser.add_argument('--output-dir', type=str, required=True, help='Directory to write maps to')
+    parser.add_argument('--format',
+                        choices=FORMATS,
+                        default='html',
+                        help='svg and png need selenium and a browser driver')
+    parser.add_argument('--resources',
+                        choices=RESOURCE_MODES,
+                        default='shared',
+                        help='shared: HTML maps load one copy of BokehJS written to --output-dir. '
+                        'inline: each HTML map includes BokehJS')
+    parser.add_argument('--jobs',
+                        type=int,
+                        default=1,
+                        help='Number of worker processes to export in (0 = one per core)')
+    args = parser.parse_args()
+    files_to_export = []
+    for pattern in args.files.split(' '):
+        if '*' in pattern:
+            files_to_export.extend(glob.glob(pattern))
+        else:
+            files_to_export.append(pattern)
+
+    had_errors = False
+    for path, error in ExportFiles(files_to_export, args.output_dir, args.format, args.resources,
+                                   args.jobs):
+        if error:
+            had_errors = True
+            print('%s: %s' % (path, error), file=sys.stderr)
+        else:
+            print(path)
+    if had_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
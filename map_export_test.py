@@ -0,0 +1,91 @@
+import json
+import os
+import re
+import tempfile
+import unittest
+from data_extractor import DataExtractor
+from map_export import ExportFiles
+from rom_generator import RomGenerator
+from rom_image import RomImage
+
+
+def ReadItem(path):
+    with open(path, encoding='utf-8') as f:
+        page = f.read()
+    item = re.search(r'id="map-item">(.*?)</script>', page, re.S).group(1)
+    return page, json.loads(item.replace('<\\/', '</'))
+
+
+def FindColumn(value, column_name):
+    """Returns the first ColumnDataSource column with this name in a serialized document."""
+    if isinstance(value, dict):
+        if value.get('type') == 'map':
+            for name, values in value['entries']:
+                if name == column_name:
+                    return values
+        values = value.values()
+    elif isinstance(value, list):
+        values = value
+    else:
+        return None
+    for child in values:
+        column = FindColumn(child, column_name)
+        if column is not None:
+            return column
+    return None
+
+
+class MapExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.rom_paths = RomGenerator(seed=4).WriteFiles(self.temp_dir.name, 2)
+        self.truncated_path = os.path.join(self.temp_dir.name, 'truncated.nes')
+        with open(self.truncated_path, 'wb') as f:
+            f.write(RomGenerator(seed=4).Generate(9)[:0x100])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_export_html(self):
+        output_dir = os.path.join(self.temp_dir.name, 'maps')
+        results = list(ExportFiles(self.rom_paths + [self.truncated_path], output_dir))
+        self.assertEqual((self.truncated_path, 'Unsupported rom (truncated)'), results[-1])
+        js_files = [name for name in os.listdir(output_dir) if name.endswith('.js')]
+        self.assertEqual(1, len(js_files))
+        for rom_path, (map_path, error) in zip(self.rom_paths, results):
+            self.assertIsNone(error)
+            page, item = ReadItem(map_path)
+            self.assertIn('src="%s"' % js_files[0], page)
+            # The second map reuses the first one's layout with its own data.
+            with open(rom_path, 'rb') as f:
+                de = DataExtractor(RomImage(f.read()))
+            self.assertEqual(de.GetRoomTable(range(1, 10)).ToRenderPayload()['rooms']['room_type'],
+                             FindColumn(item['doc'], 'room_type'))
+
+    def test_export_errors(self):
+        output_dir = os.path.join(self.temp_dir.name, 'maps')
+        missing_path = os.path.join(self.temp_dir.name, 'missing.nes')
+        other_dir = os.path.join(self.temp_dir.name, 'other')
+        [same_name_path] = RomGenerator(seed=4).WriteFiles(other_dir, 1)
+        results = list(ExportFiles([missing_path, self.rom_paths[0], same_name_path], output_dir))
+        self.assertEqual((missing_path, 'Error reading rom file (No such file or directory)'),
+                         results[0])
+        self.assertIsNone(results[1][1])
+        self.assertEqual((same_name_path, 'Same map file name as %s' % self.rom_paths[0]),
+                         results[2])
+
+    def test_export_inline_html(self):
+        output_dir = os.path.join(self.temp_dir.name, 'maps')
+        [(map_path, error)] = ExportFiles(self.rom_paths[:1], output_dir, resources='inline')
+        self.assertIsNone(error)
+        self.assertEqual([os.path.basename(map_path)], os.listdir(output_dir))
+        page, _ = ReadItem(map_path)
+        # Compare booleans so that a failure doesn't print all of BokehJS.
+        self.assertFalse('<script type="text/javascript" src=' in page)
+        self.assertTrue('Bokeh.embed.embed_item' in page)
+        self.assertGreater(len(page), 1000000)
+
+
+if __name__ == '__main__':
+    unittest.main()
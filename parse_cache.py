@@ -0,0 +1,159 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from data_extractor import PARSER_VERSION, DataExtractor
+from rom_reader import RomReader, NUM_QUOTES, OVERWORLD_POINTER_LOCATION, OVERWORLD_DATA_LOCATION
+from rom_reader import VARIOUS_DATA_LOCATION, ARMOS_ITEM_ADDRESS, COAST_ITEM_ADDRESS
+from rom_reader import TRIFORCE_REQUIREMENT_ADDRESS, WHITE_SWORD_REQUIREMENT_ADDRESS
+from rom_reader import MAGICAL_SWORD_REQUIREMENT_ADDRESS, DOOR_REPAIR_CHARGE_ADDRESS
+from rom_reader import QUOTE_POINTER_TABLE_ADDRESS, RECORDER_TEXT_ADDRESS, RECORDER_DATA_ADDRESS
+from rom_reader import NOTHING_CODE_ADDRESS
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'z1r-visualizer')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CACHE_FILE_SUFFIX = '.parse'
+# Eviction frees up this much of max_bytes, so a full cache isn't scanned on every Put().
+EVICT_TO_FRACTION = 0.9
+
+# cache_dir -> this process's estimate of the bytes in it, so that Put() only scans the
+# directory when the estimate goes over max_bytes. Writes from other processes are picked up
+# at the next scan.
+_cache_dir_bytes: Dict[str, int] = {}
+_cache_dir_bytes_lock = threading.Lock()
+
+# (address, length) of every region that Parse() and the DataExtractor getters read.
+# Quote text is hashed separately since its location depends on the pointer table.
+HASHED_REGIONS: List[Tuple[int, int]] = [
+    (OVERWORLD_POINTER_LOCATION, 0x10),
+    # Overworld block, both quests' level blocks and the level info tables
+    (OVERWORLD_DATA_LOCATION, VARIOUS_DATA_LOCATION + 10 * 0xFC - OVERWORLD_DATA_LOCATION),
+    (ARMOS_ITEM_ADDRESS, 0x01),
+    (COAST_ITEM_ADDRESS, 0x01),
+    (TRIFORCE_REQUIREMENT_ADDRESS, 0x01),
+    (WHITE_SWORD_REQUIREMENT_ADDRESS, 0x01),
+    (MAGICAL_SWORD_REQUIREMENT_ADDRESS, 0x01),
+    (DOOR_REPAIR_CHARGE_ADDRESS, 0x01),
+    (QUOTE_POINTER_TABLE_ADDRESS, 2 * NUM_QUOTES),
+    (RECORDER_TEXT_ADDRESS, 0x40),
+    (RECORDER_DATA_ADDRESS, 0x40),
+    (NOTHING_CODE_ADDRESS, 0x01),
+]
+
+
+class ParseCache:
+    """On-disk cache of DataExtractor.GetParseResult(), keyed by ROM content.
+
+    Entries are zlib-compressed pickles named by a hash of the ROM regions the
+    parser reads plus PARSER_VERSION. A hit refreshes the entry's mtime and the
+    least recently used entries are evicted once the directory grows past
+    max_bytes. The directory is scanned once per process and then only when
+    its running size total goes over max_bytes. The cache is safe to share between processes: entries are
+    written atomically and a missing or unreadable entry is treated as a miss.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def Key(rom_reader: RomReader) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(b'z1r-parse-v%d' % PARSER_VERSION)
+        for address, num_bytes in HASHED_REGIONS:
+            digest.update(rom_reader.rom_image.Read(address, num_bytes))
+        for address in rom_reader.GetQuoteAddresses():
+            if address >= 0:
+                digest.update(rom_reader.rom_image.Read(address, 0x40))
+        return digest.hexdigest()
+
+    def _GetPath(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_FILE_SUFFIX)
+
+    def Get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._GetPath(key)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.loads(zlib.decompress(f.read()))
+            os.utime(path)
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+            return None
+        return result
+
+    def Put(self, key: str, result: Dict[str, Any]) -> None:
+        payload = zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self._GetPath(key))
+        except OSError:
+            # The cache is only an optimization, so a read-only or full disk
+            # shouldn't break parsing.
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with _cache_dir_bytes_lock:
+            total_bytes = _cache_dir_bytes.get(self.cache_dir)
+            if total_bytes is None:
+                # The scan already counts the entry just written.
+                total_bytes = self._Evict()
+            else:
+                total_bytes += len(payload)
+                if total_bytes > self.max_bytes:
+                    total_bytes = self._Evict()
+            _cache_dir_bytes[self.cache_dir] = total_bytes
+
+    def _Evict(self) -> int:
+        """Removes the least recently used entries if the cache is over max_bytes, down to
+        EVICT_TO_FRACTION of it, and returns the cache's size."""
+        entries = []
+        total_bytes = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(CACHE_FILE_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_bytes += stat.st_size
+        if total_bytes <= self.max_bytes:
+            return total_bytes
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
+            if total_bytes <= self.max_bytes * EVICT_TO_FRACTION:
+                break
+        return total_bytes
+
+    def Load(self, data_extractor: DataExtractor) -> bool:
+        """Fills in data_extractor from a cached result if there is one, without parsing."""
+        result = self.Get(self.Key(data_extractor.rom_reader))
+        if result is None:
+            return False
+        data_extractor.LoadParseResult(result)
+        return True
+
+    def Parse(self, data_extractor: DataExtractor) -> Dict[str, Any]:
+        """Parses data_extractor's ROM, reusing a cached result when there is one."""
+        key = self.Key(data_extractor.rom_reader)
+        result = self.Get(key)
+        if result is not None:
+            data_extractor.LoadParseResult(result)
+            return result
+        data_extractor.Parse()
+        result = data_extractor.GetParseResult()
+        self.Put(key, result)
+        return result
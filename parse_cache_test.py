@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from data_extractor import DataExtractor
+from parse_cache import EVICT_TO_FRACTION, ParseCache
+from rom_image import RomImage
+from testutil import MakeBlankRom
+
+
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hit_skips_level_parsing(self):
+        rom = RomImage(bytes(MakeBlankRom()))
+        first = DataExtractor(rom)
+        expected = self.cache.Parse(first)
+
+        second = DataExtractor(rom)
+        with mock.patch.object(DataExtractor, 'ProcessLevel') as process_level:
+            result = self.cache.Parse(second)
+            process_level.assert_not_called()
+        self.assertEqual(expected, result)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.shop_data, second.shop_data)
+
+    def test_key_depends_on_parsed_regions(self):
+        plain = DataExtractor(RomImage(bytes(MakeBlankRom())))
+        changed = DataExtractor(RomImage(bytes(MakeBlankRom(room_type=0x01))))
+        self.assertNotEqual(ParseCache.Key(plain.rom_reader), ParseCache.Key(changed.rom_reader))
+
+        # Bytes the parser never reads don't change the key.
+        unrelated = MakeBlankRom()
+        unrelated[0x10 + 0x100] = 0xAB
+        self.assertEqual(ParseCache.Key(plain.rom_reader),
+                         ParseCache.Key(DataExtractor(RomImage(bytes(unrelated))).rom_reader))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.Put('a', {'payload': os.urandom(1000)})
+        self.cache.Put('b', {'payload': os.urandom(1000)})
+        os.utime(self.cache._GetPath('a'), (0, 0))
+        self.cache.max_bytes = 1500
+        self.cache.Put('c', {'payload': os.urandom(100)})
+        self.assertIsNone(self.cache.Get('a'))
+        self.assertIsNotNone(self.cache.Get('b'))
+        self.assertIsNotNone(self.cache.Get('c'))
+
+
+    def test_put_scans_only_when_over_budget(self):
+        with mock.patch('os.scandir', wraps=os.scandir) as scandir:
+            for num in range(20):
+                self.cache.Put('%d' % num, {'payload': os.urandom(100)})
+            self.assertEqual(1, scandir.call_count)
+            self.cache.max_bytes = 2500
+            self.cache.Put('last', {'payload': os.urandom(100)})
+            self.assertEqual(2, scandir.call_count)
+        self.assertLessEqual(
+            sum(os.path.getsize(os.path.join(self.tmp_dir.name, name))
+                for name in os.listdir(self.tmp_dir.name)), 2500 * EVICT_TO_FRACTION)
+        self.assertIsNotNone(self.cache.Get('last'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+from constants import OVERWORLD_BLOCK_TYPES
+from level_decoder import NUM_ROOMS, DecodeLevelBlock
+from room_table import RoomTable
+
+LEVEL_INFO_SIZE = 0xFC
+NUM_LEVEL_BLOCKS = 3
+FIRST_SHOP_TYPE = 0x10
+NUM_SHOP_TYPES = 0x14
+
+# Screens that can hold a secret cave, as a mask over screen numbers
+OVERWORLD_SECRET_SCREENS = np.array(
+    [screen_num in OVERWORLD_BLOCK_TYPES for screen_num in range(NUM_ROOMS)])
+
+
+class ParsedCorpus:
+    """Vectorized parse results for a batch of ROMs, as built by DataExtractor.ParseMany().
+
+    The level blocks and level info tables of all N ROMs are stacked into
+    (N, 3, 0x300) and (N, 10, 0xFC) arrays and everything that doesn't need a
+    graph traversal is decoded for all ROMs at once:
+
+      rooms              DecodedLevel with (N, 3, 0x80) arrays (overworld, L1-6, L7-9 blocks)
+      cave_destinations  (N, 0x80) overworld cave per screen, 0 where ProcessOverworld skips it
+      shop_items         (N, 0x14, 3) item codes for cave/shop types 0x10-0x23
+      shop_prices        (N, 0x14, 3) prices for the same slots
+      requirements       name -> (N,) array, matching DataExtractor.GetRequirements()
+
+    extractors holds the per-ROM DataExtractors and room_tables the per-ROM
+    RoomTable for levels 1-9. ROMs whose level data couldn't be located have
+    valid[i] == False, zeroed arrays and no room table, and ROMs too short to
+    build a DataExtractor for also have no extractor.
+    """
+
+    def __init__(self, extractors: List[Any], level_blocks: np.ndarray, level_info: np.ndarray,
+                 valid: np.ndarray, is_z1r: np.ndarray, requirement_bytes: np.ndarray) -> None:
+        self.extractors = extractors
+        self.level_blocks = level_blocks
+        self.level_info = level_info
+        self.valid = valid
+        self.is_z1r = is_z1r
+        self.rooms = DecodeLevelBlock(level_blocks)
+        self.room_tables: List[Optional[RoomTable]] = [None] * len(valid)
+
+        overworld = level_blocks[:, 0].reshape(-1, 6, NUM_ROOMS)
+        is_secret = (overworld[:, 5] & 0x80) == 0
+        self.cave_destinations = np.where(is_secret & OVERWORLD_SECRET_SCREENS,
+                                          overworld[:, 1] >> 2, 0).astype(np.uint8)
+
+        shop_table = overworld[:, 4, :2 * 3 * NUM_SHOP_TYPES].reshape(-1, 2, NUM_SHOP_TYPES, 3)
+        self.shop_items = shop_table[:, 0] & 0x3F
+        self.shop_prices = shop_table[:, 1]
+
+        self.requirements: Dict[str, np.ndarray] = {
+            'triforce': requirement_bytes[:, 0],
+            'white_sword': (requirement_bytes[:, 1] >> 4) + 1,
+            'magical_sword': (requirement_bytes[:, 2] >> 4) + 1,
+            'door_repair': requirement_bytes[:, 3],
+        }
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def GetShopData(self, rom_index: int) -> Dict[int, List[int]]:
+        """Returns one ROM's shops in the same shape as DataExtractor.shop_data."""
+        return {
+            FIRST_SHOP_TYPE + shop_num:
+            self.shop_items[rom_index, shop_num].tolist() +
+            self.shop_prices[rom_index, shop_num].tolist() for shop_num in range(NUM_SHOP_TYPES)
+        }
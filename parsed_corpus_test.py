@@ -0,0 +1,63 @@
+import io
+import random
+import unittest
+import numpy as np
+from data_extractor import DataExtractor
+from testutil import MakeBlankRom
+
+OVERWORLD_BLOCK_START = 0x10 + 0x18400
+
+
+class ParsedCorpusTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(7)
+        self.roms = []
+        for room_type in [0x00, 0x01, 0x02]:
+            rom = MakeBlankRom(room_type)
+            rom[OVERWORLD_BLOCK_START:OVERWORLD_BLOCK_START + 0x300] = bytes(
+                rng.randrange(256) for _ in range(0x300))
+            rom[0x10 + 0x5F17] = rng.randrange(256)
+            rom[0x10 + 0x48FD] = rng.randrange(256)
+            self.roms.append(rom)
+
+    def test_matches_single_rom_parse(self):
+        corpus = DataExtractor.ParseMany([io.BytesIO(rom) for rom in self.roms])
+        self.assertEqual(3, len(corpus))
+        self.assertEqual((3, 3, 0x80), corpus.rooms.room_types.shape)
+        for rom_index, rom in enumerate(self.roms):
+            de = DataExtractor(io.BytesIO(rom))
+            de.ProcessOverworld()
+            self.assertTrue(corpus.valid[rom_index])
+            self.assertEqual(de.shop_data, corpus.GetShopData(rom_index))
+            self.assertEqual({screen_num: int(screen['cave'], 16)
+                              for screen_num, screen in de.data[0].items()},
+                             {screen_num: destination for screen_num, destination in enumerate(
+                                 corpus.cave_destinations[rom_index].tolist()) if destination})
+            self.assertEqual(de.GetRequirements(), {
+                name: int(values[rom_index]) for name, values in corpus.requirements.items()
+            })
+            np.testing.assert_array_equal(de.GetRoomTable().rooms,
+                                          corpus.room_tables[rom_index].rooms)
+
+    def test_missing_level_block(self):
+        rom = MakeBlankRom()
+        rom[0x1801E:0x18020] = bytes([0x00, 0x00])
+        corpus = DataExtractor.ParseMany([io.BytesIO(self.roms[0]), io.BytesIO(rom)])
+        self.assertEqual([True, False], corpus.valid.tolist())
+        self.assertIsNone(corpus.room_tables[1])
+        self.assertFalse(corpus.level_blocks[1].any())
+
+    def test_truncated_rom(self):
+        truncated = self.roms[1][:0x1000]
+        corpus = DataExtractor.ParseMany(
+            [io.BytesIO(self.roms[0]), io.BytesIO(truncated), io.BytesIO(self.roms[2])])
+        self.assertEqual([True, False, True], corpus.valid.tolist())
+        self.assertIsNone(corpus.extractors[1])
+        self.assertIsNone(corpus.room_tables[1])
+        self.assertEqual(0, corpus.requirements['door_repair'][1])
+        self.assertIsNotNone(corpus.room_tables[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
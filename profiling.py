@@ -0,0 +1,118 @@
+import contextlib
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from data_extractor import DataExtractor
+from rom_reader import RomReader
+
+# Opt-in timing for the parse stages. Profile() swaps timing wrappers into
+# DataExtractor and RomReader for the duration of a `with` block and puts the
+# original methods back afterwards, so nothing is added to a parse that isn't
+# being profiled. The wrappers are on the classes, so every DataExtractor in
+# the process is counted while a Profile() is active.
+
+# (method name, whether to also keep a separate stage per level_num argument)
+DATA_EXTRACTOR_STAGES = [
+    ('__init__', False),
+    ('ProcessOverworld', False),
+    ('ProcessLevel', True),
+    ('_VisitRoom', False),
+]
+
+
+class StageStats(object):
+    """Number of calls to a stage and the wall time spent in them, including nested stages."""
+    __slots__ = ('calls', 'seconds')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+
+
+class ParseStats(object):
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, StageStats] = {}
+        self.read_calls = 0
+        self.read_bytes = 0
+        self._lock = threading.Lock()
+
+    def AddStage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = StageStats()
+            stage.calls += 1
+            stage.seconds += seconds
+
+    def AddRead(self, num_bytes: int) -> None:
+        with self._lock:
+            self.read_calls += 1
+            self.read_bytes += num_bytes
+
+    def AsDict(self) -> Dict[str, Any]:
+        """Returns the stats as plain dicts and numbers, e.g. for json.dump()."""
+        with self._lock:
+            return {
+                'stages': {
+                    name: {
+                        'calls': stage.calls,
+                        'seconds': stage.seconds
+                    } for name, stage in sorted(self.stages.items())
+                },
+                'rom_reads': {
+                    'calls': self.read_calls,
+                    'bytes': self.read_bytes
+                },
+            }
+
+
+def _TimedMethod(stats: ParseStats, name: str, method: Callable, per_level: bool) -> Callable:
+
+    @functools.wraps(method)
+    def Timed(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            stats.AddStage(name, seconds)
+            if per_level:
+                stats.AddStage('%s[%d]' % (name, args[0]), seconds)
+
+    return Timed
+
+
+def _CountedRead(stats: ParseStats, method: Callable) -> Callable:
+
+    @functools.wraps(method)
+    def Counted(self, *args, **kwargs):
+        data = method(self, *args, **kwargs)
+        stats.AddRead(len(data))
+        return data
+
+    return Counted
+
+
+@contextlib.contextmanager
+def Profile(stats: Optional[ParseStats] = None) -> Iterator[ParseStats]:
+    """Records parse stage timings and RomReader reads into `stats` until the block exits.
+
+    Profiles don't nest across threads: a block that exits puts back the methods
+    it found when it started.
+    """
+    if stats is None:
+        stats = ParseStats()
+    originals: List[Tuple[type, str, Callable]] = []
+    for name, per_level in DATA_EXTRACTOR_STAGES:
+        originals.append((DataExtractor, name, DataExtractor.__dict__[name]))
+        setattr(DataExtractor, name,
+                _TimedMethod(stats, name, DataExtractor.__dict__[name], per_level))
+    originals.append((RomReader, '_ReadMemory', RomReader.__dict__['_ReadMemory']))
+    RomReader._ReadMemory = _CountedRead(stats, RomReader.__dict__['_ReadMemory'])
+    try:
+        yield stats
+    finally:
+        for cls, name, method in reversed(originals):
+            setattr(cls, name, method)
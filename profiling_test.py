@@ -0,0 +1,48 @@
+import json
+import unittest
+from data_extractor import DataExtractor
+from profiling import Profile
+from rom_generator import RomGenerator
+from rom_image import RomImage
+from rom_reader import RomReader
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def test_profile_parse(self):
+        rom = RomImage(RomGenerator(seed=5).Generate(0))
+        with Profile() as stats:
+            de = DataExtractor(rom)
+            de.Parse()
+        num_rooms = sum(len(de.GetLevelGraph(level_num).Walk()[0]) for level_num in range(1, 10))
+        summary = json.loads(json.dumps(stats.AsDict()))
+        stages = summary['stages']
+        self.assertEqual(1, stages['__init__']['calls'])
+        self.assertEqual(1, stages['ProcessOverworld']['calls'])
+        self.assertEqual(9, stages['ProcessLevel']['calls'])
+        for level_num in range(1, 10):
+            self.assertEqual(1, stages['ProcessLevel[%d]' % level_num]['calls'])
+        self.assertEqual(num_rooms, stages['_VisitRoom']['calls'])
+        self.assertGreaterEqual(stages['ProcessLevel']['seconds'], stages['_VisitRoom']['seconds'])
+        self.assertGreater(summary['rom_reads']['calls'], 0)
+        self.assertGreater(summary['rom_reads']['bytes'], summary['rom_reads']['calls'])
+
+    def test_restores_methods(self):
+        process_level = DataExtractor.__dict__['ProcessLevel']
+        read_memory = RomReader.__dict__['_ReadMemory']
+        with self.assertRaises(ValueError):
+            with Profile():
+                self.assertIsNot(process_level, DataExtractor.__dict__['ProcessLevel'])
+                raise ValueError()
+        self.assertIs(process_level, DataExtractor.__dict__['ProcessLevel'])
+        self.assertIs(read_memory, RomReader.__dict__['_ReadMemory'])
+
+        with Profile() as stats:
+            pass
+        DataExtractor(RomImage(RomGenerator(seed=5).Generate(0))).Parse()
+        self.assertEqual({}, stats.stages)
+        self.assertEqual(0, stats.read_calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
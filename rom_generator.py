@@ -0,0 +1,346 @@
+# Usage:
+#   To write 1000 variants of a rom:
+#     python rom_generator.py --base=z1.nes --count=1000 --output-dir=corpus
+#   To make the same corpus again:  python rom_generator.py --seed=1 --base=z1.nes ...
+#   To write vanilla-style second quest dungeons:
+#     python rom_generator.py --second-quest --no-z1r ...
+
+import argparse
+import os
+import random
+from typing import Dict, Iterator, List, Optional, Tuple
+from constants import Direction, WallType, CAVE_NAME, CHAR_MAP, ENEMY_TYPES, ITEM_TYPES, ROOM_TYPES
+from constants import ENTRANCE_DIRECTION_MAP, OVERWORLD_BLOCK_TYPES, PALETTE_COLORS
+from level_decoder import NUM_ROOMS, STAIRWAY_ROOM_TYPES
+from rom_image import NES_HEADER_OFFSET
+from rom_probe import INES_MAGIC
+from rom_reader import LEVEL_1_TO_6_FIRST_QUEST_DATA_LOCATION, LEVEL_1_TO_6_POINTER_LOCATION
+from rom_reader import LEVEL_1_TO_6_SECOND_QUEST_DATA_LOCATION, LEVEL_7_TO_9_POINTER_LOCATION
+from rom_reader import LEVEL_7_TO_9_FIRST_QUEST_DATA_LOCATION, NOTHING_CODE_ADDRESS
+from rom_reader import LEVEL_7_TO_9_SECOND_QUEST_DATA_LOCATION, NUM_QUOTES
+from rom_reader import OVERWORLD_DATA_LOCATION, OVERWORLD_POINTER_LOCATION
+from rom_reader import QUOTE_POINTER_TABLE_ADDRESS, RECORDER_DATA_ADDRESS, VARIOUS_DATA_LOCATION
+
+ROM_SIZE = NES_HEADER_OFFSET + 0x20000
+# The Legend of Zelda's iNES header: 8 16KiB PRG ROM banks, CHR RAM, MMC1 with battery-backed RAM
+INES_HEADER = b'NES\x1a\x08\x00\x12\x00' + bytes(8)
+LEVEL_INFO_SIZE = 0xFC
+PALETTE_OFFSET = 0xB
+DISPLAY_OFFSET_OFFSET = 0x2D
+START_ROOM_OFFSET = 0x2F
+STAIRWAY_LIST_OFFSET = 0x34
+NUM_STAIRWAY_SLOTS = 9
+MIN_LEVEL_SIZE = 8
+
+GRID_WIDTH = 0x10
+GRID_HEIGHT = NUM_ROOMS // GRID_WIDTH
+LEVEL_GROUPS = [range(1, 7), range(7, 10)]
+DOOR_WEIGHTS = {
+    WallType.DOOR: 10,
+    WallType.WALK_THROUGH_WALL_1: 1,
+    WallType.BOMB_HOLE: 3,
+    WallType.LOCKED_DOOR_1: 3,
+    WallType.LOCKED_DOOR_2: 1,
+    WallType.SHUTTER_DOOR: 2,
+}
+ROOM_ITEMS = [code for code in ITEM_TYPES if code < 0x20]
+SHOP_ITEMS = list(ITEM_TYPES)
+ROOM_TYPE_CODES = [code for code in ROOM_TYPES if code not in STAIRWAY_ROOM_TYPES]
+CAVE_DESTINATIONS = list(CAVE_NAME)
+OVERWORLD_SCREENS = list(OVERWORLD_BLOCK_TYPES)
+CHAR_CODES = {char: code for code, char in CHAR_MAP.items()}
+
+
+class RomGenerator:
+    """Writes randomized but parseable variants of a base rom.
+
+    Every region RomReader reads gets rewritten: the dungeon level blocks and
+    their level info (layouts, doors, stairways, rooms, palettes), the
+    overworld cave destinations and shop tables, the quotes and the recorder
+    data. Each level is carved as a connected set of rooms reachable from its
+    entrance, so every generated rom parses and walks like a real one.
+
+    Variant n of a given seed is always the same rom. Without a seed, each
+    generator picks a random one.
+    """
+
+    def __init__(self,
+                 base_rom: Optional[bytes] = None,
+                 seed: Optional[int] = None,
+                 z1r: bool = True,
+                 second_quest: bool = False) -> None:
+        self.base_rom = bytes(base_rom) if base_rom is not None else bytes(ROM_SIZE)
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2**32)
+        self.z1r = z1r
+        self.second_quest = second_quest
+
+    def Generate(self, variant_num: int) -> bytes:
+        rng = random.Random('%d/%d' % (self.seed, variant_num))
+        rom = bytearray(self.base_rom)
+        if len(rom) < ROM_SIZE:
+            rom.extend(bytes(ROM_SIZE - len(rom)))
+        if rom[:len(INES_MAGIC)] != INES_MAGIC:
+            rom[:NES_HEADER_OFFSET] = INES_HEADER
+        self._WritePointers(rom)
+        nothing_code = rom[NES_HEADER_OFFSET + NOTHING_CODE_ADDRESS]
+        for block_location, level_nums in zip(self._GetLevelBlockLocations(), LEVEL_GROUPS):
+            self._WriteLevelBlock(rom, rng, block_location, level_nums, nothing_code)
+        self._WriteOverworld(rom, rng)
+        self._ShuffleQuotes(rom, rng)
+        self._ShuffleRecorderData(rom, rng)
+        return bytes(rom)
+
+    def Iterate(self, count: int, start: int = 0) -> Iterator[bytes]:
+        for variant_num in range(start, start + count):
+            yield self.Generate(variant_num)
+
+    def WriteFiles(self, output_dir: str, count: int, start: int = 0) -> List[str]:
+        """Writes variants as <output_dir>/synthetic-<seed>-<n>.nes and returns their paths."""
+        os.makedirs(output_dir, exist_ok=True)
+        file_paths = []
+        for variant_num, rom in enumerate(self.Iterate(count, start), start):
+            file_path = os.path.join(output_dir, 'synthetic-%d-%05d.nes' % (self.seed, variant_num))
+            with open(file_path, 'wb') as f:
+                f.write(rom)
+            file_paths.append(file_path)
+        return file_paths
+
+    def _GetLevelBlockLocations(self) -> List[int]:
+        if self.second_quest:
+            return [
+                LEVEL_1_TO_6_SECOND_QUEST_DATA_LOCATION, LEVEL_7_TO_9_SECOND_QUEST_DATA_LOCATION
+            ]
+        return [LEVEL_1_TO_6_FIRST_QUEST_DATA_LOCATION, LEVEL_7_TO_9_FIRST_QUEST_DATA_LOCATION]
+
+    def _WritePointers(self, rom: bytearray) -> None:
+        pointer_locations = [
+            OVERWORLD_POINTER_LOCATION, LEVEL_1_TO_6_POINTER_LOCATION, LEVEL_7_TO_9_POINTER_LOCATION
+        ]
+        locations = [OVERWORLD_DATA_LOCATION] + self._GetLevelBlockLocations()
+        for pointer_location, location in zip(pointer_locations, locations):
+            pointer = location - 0x18000 + 0x8000
+            _Write(rom, pointer_location, [pointer & 0xFF, pointer >> 8])
+
+    def _WriteLevelBlock(self, rom: bytearray, rng: random.Random, block_location: int,
+                         level_nums: range, nothing_code: int) -> None:
+        entrance_directions = list(ENTRANCE_DIRECTION_MAP.values()) if self.z1r else [
+            Direction.SOUTH
+        ]
+        # Levels whose start room got boxed in by the others are carved again.
+        regions, edges, entrances = _CarveLevels(rng, len(level_nums), entrance_directions)
+        while min(len(region) for region in regions) < MIN_LEVEL_SIZE:
+            regions, edges, entrances = _CarveLevels(rng, len(level_nums), entrance_directions)
+        block = bytearray(6 * NUM_ROOMS)
+        walls: Dict[Tuple[int, Direction], int] = {}
+        for room_num, direction in edges:
+            door = rng.choices(list(DOOR_WEIGHTS), weights=list(DOOR_WEIGHTS.values()))[0]
+            walls[(room_num, direction)] = door
+            walls[(room_num + direction, _Opposite(direction))] = door
+
+        for room_num in range(0, NUM_ROOMS):
+            wall = {
+                direction: walls.get((room_num, direction), WallType.SOLID_WALL)
+                for direction in [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
+            }
+            block[room_num] = (wall[Direction.NORTH] << 5) | (wall[Direction.SOUTH] << 2)
+            block[room_num + 0x80] = (wall[Direction.WEST] << 5) | (wall[Direction.EAST] << 2)
+            enemy_code = rng.choice(list(ENEMY_TYPES))
+            block[room_num + 2 * 0x80] = (rng.randrange(4) << 6) | (enemy_code & 0x3F)
+            block[room_num + 3 * 0x80] = ((enemy_code & 0x40) << 1) | rng.choice(ROOM_TYPE_CODES)
+            item_code = rng.choice(ROOM_ITEMS) if rng.random() < 0.3 else nothing_code & 0x1F
+            block[room_num + 4 * 0x80] = item_code
+            block[room_num + 5 * 0x80] = 0x04 if rng.random() < 0.3 else 0x00
+
+        # Stairways live in the grid's unused rooms and lead from rooms with a stairway room type.
+        spare_room_nums = [num for num in range(0, NUM_ROOMS) if not any(num in r for r in regions)]
+        rng.shuffle(spare_room_nums)
+        for level_num, region, (start_room_num, entrance) in zip(level_nums, regions, entrances):
+            stairway_room_nums = []
+            candidates = rng.sample(region, len(region))
+            num_item_stairways = rng.randrange(1, 3)
+            num_transport_stairways = rng.randrange(0, 2)
+            while spare_room_nums and len(stairway_room_nums) < (num_item_stairways +
+                                                                 num_transport_stairways):
+                if len(stairway_room_nums) < num_item_stairways:
+                    exits = [candidates.pop()] * 2
+                    item_code = rng.choice(ROOM_ITEMS)
+                elif len(candidates) >= 2:
+                    exits = [candidates.pop(), candidates.pop()]
+                    item_code = 0
+                else:
+                    break
+                stairway_room_num = spare_room_nums.pop()
+                block[stairway_room_num] = exits[0]
+                block[stairway_room_num + 0x80] = exits[1]
+                block[stairway_room_num + 4 * 0x80] = item_code
+                for exit_room_num in exits:
+                    block[exit_room_num + 3 * 0x80] = (block[exit_room_num + 3 * 0x80] & 0x80 |
+                                                       rng.choice(STAIRWAY_ROOM_TYPES))
+                stairway_room_nums.append(stairway_room_num)
+            self._WriteLevelInfo(rom, rng, level_num, region, start_room_num, entrance,
+                                 stairway_room_nums)
+        _Write(rom, block_location, block)
+
+    def _WriteLevelInfo(self, rom: bytearray, rng: random.Random, level_num: int,
+                        region: List[int], start_room_num: int, entrance: Direction,
+                        stairway_room_nums: List[int]) -> None:
+        level_info_location = VARIOUS_DATA_LOCATION + level_num * LEVEL_INFO_SIZE
+        palette = [rng.randrange(len(PALETTE_COLORS)) for _ in range(8)]
+        _Write(rom, level_info_location + PALETTE_OFFSET, palette)
+        min_col = min(room_num % GRID_WIDTH for room_num in region)
+        _Write(rom, level_info_location + DISPLAY_OFFSET_OFFSET, [(1 - min_col) % GRID_WIDTH + 3])
+        _Write(rom, level_info_location + START_ROOM_OFFSET, [start_room_num])
+        stairway_list = stairway_room_nums + [0xFF] * (NUM_STAIRWAY_SLOTS - len(stairway_room_nums))
+        entrance_codes = {direction: code for code, direction in ENTRANCE_DIRECTION_MAP.items()}
+        stairway_list.append(entrance_codes[entrance] if self.z1r else 0xFF)
+        _Write(rom, level_info_location + STAIRWAY_LIST_OFFSET, stairway_list)
+
+    def _WriteOverworld(self, rom: bytearray, rng: random.Random) -> None:
+        start = NES_HEADER_OFFSET + OVERWORLD_DATA_LOCATION
+        destinations = dict(
+            zip(rng.sample(OVERWORLD_SCREENS, len(CAVE_DESTINATIONS)), CAVE_DESTINATIONS))
+        for screen_num in OVERWORLD_SCREENS:
+            destination = destinations.get(screen_num, 0)
+            rom[start + 0x80 + screen_num] = ((destination << 2) |
+                                              (rom[start + 0x80 + screen_num] & 0x03))
+            # Caves only show up on screens flagged as "Secret in 1st Quest"
+            rom[start + 5 * 0x80 + screen_num] &= 0x7F
+
+        for slot in range(0, 0x14 * 3):
+            item_location = start + 4 * 0x80 + slot
+            rom[item_location] = (rom[item_location] & 0xC0) | rng.choice(SHOP_ITEMS)
+            rom[item_location + 0x14 * 3] = rng.randrange(5, 250)
+
+    def _ShuffleQuotes(self, rom: bytearray, rng: random.Random) -> None:
+        """Deals the base rom's quotes out to the quote numbers in a random order.
+
+        Quote numbers whose pointer is outside the rom, e.g. without a base rom,
+        first get a placeholder quote written after the pointer table.
+        """
+        pointer_table = NES_HEADER_OFFSET + QUOTE_POINTER_TABLE_ADDRESS
+        pointers = [
+            rom[pointer_table + 2 * num:pointer_table + 2 * num + 2] for num in range(0, NUM_QUOTES)
+        ]
+        text_address = QUOTE_POINTER_TABLE_ADDRESS + 2 * NUM_QUOTES
+        for num, pointer in enumerate(pointers):
+            address = (pointer[1] - 0x40) * 0x100 + pointer[0]
+            if 0 <= address and NES_HEADER_OFFSET + address + 0x40 <= len(rom):
+                continue
+            text = [CHAR_CODES[char] for char in 'QUOTE%d' % num]
+            text[-1] |= 0xC0
+            _Write(rom, text_address, text)
+            pointer = text_address + 0x4000
+            pointers[num] = bytes([pointer & 0xFF, pointer >> 8])
+            text_address += len(text)
+        rng.shuffle(pointers)
+        _Write(rom, QUOTE_POINTER_TABLE_ADDRESS, b''.join(pointers))
+
+    def _ShuffleRecorderData(self, rom: bytearray, rng: random.Random) -> None:
+        start = NES_HEADER_OFFSET + RECORDER_DATA_ADDRESS
+        length = 0
+        while length < 0x40 and rom[start + length] not in [0x00, 0xFF]:
+            length += 1
+        recorder_data = list(rom[start:start + length])
+        rng.shuffle(recorder_data)
+        rom[start:start + length] = bytes(recorder_data)
+
+
+def _Write(rom: bytearray, address: int, values) -> None:
+    rom[NES_HEADER_OFFSET + address:NES_HEADER_OFFSET + address + len(values)] = bytes(values)
+
+
+def _Opposite(direction: Direction) -> Direction:
+    return Direction(-int(direction))
+
+
+def _GetNeighbor(room_num: int, direction: Direction) -> Optional[int]:
+    """Returns the room next to room_num on the level grid, without wrapping around its edges."""
+    col, row = room_num % GRID_WIDTH, room_num // GRID_WIDTH
+    if direction == Direction.EAST and col == GRID_WIDTH - 1:
+        return None
+    if direction == Direction.WEST and col == 0:
+        return None
+    if direction == Direction.NORTH and row == 0:
+        return None
+    if direction == Direction.SOUTH and row == GRID_HEIGHT - 1:
+        return None
+    return room_num + direction
+
+
+def _CarveLevels(
+    rng: random.Random, num_levels: int, entrance_directions: List[Direction]
+) -> Tuple[List[List[int]], List[Tuple[int, Direction]], List[Tuple[int, Direction]]]:
+    """Grows num_levels disjoint, connected groups of rooms on a block's grid.
+
+    Returns each level's rooms, the doors between rooms as (room, direction)
+    pairs and each level's start room and entrance direction. A start room
+    never has a door in its entrance direction, since the walk doesn't take it.
+    """
+    max_size = (NUM_ROOMS - 3 * num_levels) // num_levels
+    sizes = [rng.randrange(min(12, max_size), max_size + 1) for _ in range(num_levels)]
+    start_room_nums = rng.sample(range(0, NUM_ROOMS), num_levels)
+    entrances = [(start_room_num, rng.choice(entrance_directions))
+                 for start_room_num in start_room_nums]
+    owner = {start_room_num: level for level, start_room_num in enumerate(start_room_nums)}
+    regions = [[start_room_num] for start_room_num in start_room_nums]
+    edges = []
+    growing = set(range(0, num_levels))
+    while growing:
+        for level in sorted(growing):
+            start_room_num, entrance = entrances[level]
+            frontier = []
+            for room_num in regions[level]:
+                for direction in [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]:
+                    if room_num == start_room_num and direction == entrance:
+                        continue
+                    neighbor = _GetNeighbor(room_num, direction)
+                    if neighbor is not None and neighbor not in owner:
+                        frontier.append((room_num, direction, neighbor))
+            if not frontier or len(regions[level]) >= sizes[level]:
+                growing.discard(level)
+                continue
+            room_num, direction, neighbor = rng.choice(frontier)
+            owner[neighbor] = level
+            regions[level].append(neighbor)
+            edges.append((room_num, direction))
+
+    # A few extra doors between rooms of the same level make loops.
+    for room_num, level in owner.items():
+        for direction in [Direction.EAST, Direction.SOUTH]:
+            neighbor = _GetNeighbor(room_num, direction)
+            if (neighbor is not None and owner.get(neighbor) == level and
+                    (room_num, direction) not in edges and
+                    (neighbor, _Opposite(direction)) not in edges and rng.random() < 0.15):
+                start_room_num, entrance = entrances[level]
+                if not ((room_num == start_room_num and direction == entrance) or
+                        (neighbor == start_room_num and _Opposite(direction) == entrance)):
+                    edges.append((room_num, direction))
+    return regions, edges, entrances
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base', type=str, default=None, help='Rom to generate variants of')
+    parser.add_argument('--count', type=int, required=True, help='Number of roms to generate')
+    parser.add_argument('--output-dir', type=str, required=True, help='Directory to write roms to')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for a reproducible corpus')
+    parser.add_argument('--start', type=int, default=0, help='Variant number to start from')
+    parser.add_argument('--z1r',
+                        action=argparse.BooleanOptionalAction,
+                        default=True,
+                        help='Write randomizer-style entrance directions into the stairway lists')
+    parser.add_argument('--second-quest',
+                        action='store_true',
+                        help='Write the dungeons into the second quest level blocks')
+    args = parser.parse_args()
+    base_rom = None
+    if args.base:
+        with open(args.base, 'rb') as f:
+            base_rom = f.read()
+    generator = RomGenerator(base_rom, args.seed, args.z1r, args.second_quest)
+    for file_path in generator.WriteFiles(args.output_dir, args.count, args.start):
+        print(file_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import io
+import os
+import tempfile
+import unittest
+from data_extractor import DataExtractor
+from rom_generator import RomGenerator
+from testutil import MakeBlankRom
+
+
+class RomGeneratorTest(unittest.TestCase):
+
+    def test_deterministic(self):
+        generator = RomGenerator(MakeBlankRom(), seed=3)
+        self.assertEqual(generator.Generate(1), RomGenerator(MakeBlankRom(), seed=3).Generate(1))
+        self.assertNotEqual(generator.Generate(1), generator.Generate(2))
+        self.assertEqual(list(generator.Iterate(2, start=1)),
+                         [generator.Generate(1), generator.Generate(2)])
+
+    def test_levels_are_traversable(self):
+        for z1r, second_quest in [(True, False), (False, True)]:
+            for rom in RomGenerator(seed=7, z1r=z1r, second_quest=second_quest).Iterate(5):
+                de = DataExtractor(io.BytesIO(rom))
+                self.assertEqual(z1r, de.is_z1r)
+                de.Parse()
+                self.assertEqual(29, len(de.data[0]))
+                for level_nums in [range(1, 7), range(7, 10)]:
+                    reachable = set()
+                    stairway_room_nums = set()
+                    for level_num in level_nums:
+                        reachable |= de.GetLevelGraph(level_num).Reachable()
+                        stairway_room_nums |= set(de.GetLevelStairwayRoomNumberList(level_num))
+                        self.assertGreaterEqual(len(de.data[level_num]), 8)
+                    decoded = de._GetDecodedLevel(level_nums[0])
+                    for room_num in set(range(0, 0x80)) - stairway_room_nums - reachable:
+                        for walls in [decoded.north_walls, decoded.east_walls,
+                                      decoded.south_walls, decoded.west_walls]:
+                            self.assertEqual(1, walls[room_num])
+
+    def test_write_files(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            file_paths = RomGenerator(seed=1).WriteFiles(output_dir, 3)
+            self.assertEqual(3, len(file_paths))
+            with open(file_paths[2], 'rb') as f:
+                self.assertEqual(RomGenerator(seed=1).Generate(2), f.read())
+            self.assertEqual(sorted(os.path.basename(path) for path in file_paths),
+                             sorted(os.listdir(output_dir)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import io
+import mmap
+import os
+import stat
+from typing import IO, Optional, Union
+
+NES_HEADER_OFFSET = 0x10
+
+
+def _PreadFile(rom: IO[bytes]) -> Optional[bytes]:
+    """Reads all of a file opened with open(path, 'rb') without moving its position, which other
+    threads may be using. Returns None for other streams."""
+    if not isinstance(rom, (io.BufferedReader, io.FileIO)) or not hasattr(os, 'pread'):
+        return None
+    try:
+        fd = rom.fileno()
+        file_stat = os.fstat(fd)
+    except (OSError, ValueError):
+        return None
+    if not stat.S_ISREG(file_stat.st_mode):
+        return None
+    chunks = []
+    offset = 0
+    while True:
+        chunk = os.pread(fd, max(file_stat.st_size - offset, io.DEFAULT_BUFFER_SIZE), offset)
+        if not chunk:
+            return b''.join(chunks)
+        chunks.append(chunk)
+        offset += len(chunk)
+
+
+class RomImage:
+    """Immutable, header-adjusted view of a ROM.
+
+    The ROM is loaded once and every Read() hands back a memoryview slice into
+    that buffer, so there is no per-read copy and no shared file position.
+    Files on disk can be mapped read-only, in which case only the pages that
+    are actually read get faulted in.
+
+    Reads never change any state, so one RomImage can be read from any number
+    of threads at once, as long as nothing writes to a bytearray it was built
+    from or closes it while they do.
+    """
+
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview, mmap.mmap],
+                 header_offset: int = NES_HEADER_OFFSET) -> None:
+        self._buffer = buffer
+        self._view = memoryview(buffer).cast('B')
+        self.header_offset = header_offset
+
+    @classmethod
+    def FromStream(cls, rom: IO[bytes]) -> "RomImage":
+        if isinstance(rom, io.BytesIO):
+            return cls(rom.getvalue())
+        contents = _PreadFile(rom)
+        if contents is not None:
+            return cls(contents)
+        rom.seek(0)
+        return cls(rom.read())
+
+    @classmethod
+    def FromFile(cls, path: str, use_mmap: bool = True) -> "RomImage":
+        with open(path, 'rb') as f:
+            if use_mmap:
+                try:
+                    return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                except ValueError:
+                    # Empty files can't be mapped; fall through to a plain read.
+                    pass
+            return cls(f.read())
+
+    def Read(self, address: int, num_bytes: int = 1) -> memoryview:
+        start = self.header_offset + address
+        if address < 0 or start + num_bytes > len(self._view):
+            raise IndexError('Read of %d bytes at 0x%x is outside the rom' % (num_bytes, address))
+        return self._view[start:start + num_bytes]
+
+    def ReadByte(self, address: int) -> int:
+        if address < 0:
+            raise IndexError('Read at -0x%x is outside the rom' % -address)
+        return self._view[self.header_offset + address]
+
+    def GetBytes(self) -> memoryview:
+        return self._view
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def close(self) -> None:
+        self._view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            try:
+                self._buffer.close()
+            except BufferError:
+                # Slices handed out by Read() are still alive (e.g. held by a
+                # DataExtractor); the mapping goes away once they are dropped.
+                pass
+
+    def __enter__(self) -> "RomImage":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
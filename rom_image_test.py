@@ -0,0 +1,83 @@
+import concurrent.futures
+import io
+import os
+import tempfile
+import unittest
+from rom_image import NES_HEADER_OFFSET, RomImage
+from rom_reader import RomReader
+
+
+class RomImageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.raw = bytes(range(256)) * 0x200
+
+    def test_read_is_header_adjusted(self):
+        image = RomImage(self.raw)
+        self.assertEqual(NES_HEADER_OFFSET, image.ReadByte(0))
+        self.assertEqual([0x20, 0x21, 0x22], list(image.Read(0x10, 3)))
+
+    def test_read_out_of_range(self):
+        image = RomImage(self.raw)
+        end = len(self.raw) - NES_HEADER_OFFSET
+        self.assertEqual(4, len(image.Read(end - 4, 4)))
+        for address in [-0x20, end - 3, end]:
+            with self.assertRaises(IndexError):
+                image.Read(address, 4)
+        for address in [-1, end]:
+            with self.assertRaises(IndexError):
+                image.ReadByte(address)
+
+    def test_read_does_not_copy(self):
+        raw = bytearray(self.raw)
+        image = RomImage(raw)
+        view = image.Read(0x00, 2)
+        raw[NES_HEADER_OFFSET] = 0xAB
+        self.assertEqual(0xAB, view[0])
+
+    def test_from_stream_matches_buffer(self):
+        stream = io.BytesIO(self.raw)
+        stream.seek(100)
+        image = RomImage.FromStream(stream)
+        self.assertEqual(len(self.raw), len(image))
+        self.assertEqual(bytes(RomImage(self.raw).Read(0x40, 0x40)), bytes(image.Read(0x40, 0x40)))
+
+    def test_from_file_with_and_without_mmap(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'rom.nes')
+            with open(path, 'wb') as f:
+                f.write(self.raw)
+            for use_mmap in [True, False]:
+                with RomImage.FromFile(path, use_mmap=use_mmap) as image:
+                    self.assertEqual(len(self.raw), len(image))
+                    self.assertEqual(self.raw[0x110:0x120], bytes(image.Read(0x100, 0x10)))
+
+    def test_from_file_stream_keeps_position(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'rom.nes')
+            with open(path, 'wb') as f:
+                f.write(self.raw)
+            with open(path, 'rb') as f:
+                f.seek(123)
+                image = RomImage.FromStream(f)
+                self.assertEqual(123, f.tell())
+            self.assertEqual(self.raw, bytes(image.GetBytes()))
+
+    def test_concurrent_reads(self):
+        image = RomImage(self.raw)
+
+        def ReadAll(start):
+            return [bytes(image.Read(address, 0x10)) for address in range(start, 0x10000, 0x40)]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(ReadAll, [0, 0x20] * 16))
+        self.assertEqual([ReadAll(0), ReadAll(0x20)] * 16, results)
+
+    def test_rom_reader_accepts_stream_or_image(self):
+        from_stream = RomReader(io.BytesIO(self.raw))
+        from_image = RomReader(RomImage(self.raw))
+        self.assertEqual(list(from_stream.GetLevelInfo(1)), list(from_image.GetLevelInfo(1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
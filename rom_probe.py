@@ -0,0 +1,91 @@
+import os
+from typing import Callable, NamedTuple, Optional, Union
+from rom_image import NES_HEADER_OFFSET, RomImage
+from rom_reader import LEVEL_1_TO_6_POINTER_LOCATION, LEVEL_7_TO_9_POINTER_LOCATION
+from rom_reader import OVERWORLD_POINTER_LOCATION, VARIOUS_DATA_LOCATION
+
+INES_MAGIC = b'NES\x1a'
+LEVEL_INFO_SIZE = 0xFC
+# Last byte of each level's stairway list, which z1r sets to the level's entrance direction
+STAIRWAY_LIST_TAIL_OFFSET = 0x3D
+# Every rom the parser handles has the header and all ten level info blocks.
+MIN_ROM_SIZE = NES_HEADER_OFFSET + VARIOUS_DATA_LOCATION + 10 * LEVEL_INFO_SIZE
+
+OVERWORLD_POINTER = 0x8400
+FIRST_QUEST_POINTERS = (0x8700, 0x8A00)
+SECOND_QUEST_POINTERS = (0x8D00, 0x9000)
+
+PROBE_OK = 'ok'
+PROBE_TRUNCATED = 'truncated'
+PROBE_UNKNOWN_LAYOUT = 'unknown level layout'
+PROBE_BAD_HEADER = 'no iNES header'
+
+
+class ProbeResult(NamedTuple):
+    status: str
+    size: int
+    has_ines_header: bool
+    # 'first', 'second' or 'mixed' (levels 1-6 and 7-9 from different quests)
+    quest: Optional[str]
+    is_z1r: bool
+
+    @property
+    def is_supported(self) -> bool:
+        return self.status == PROBE_OK
+
+
+def _Probe(size: int, read: Callable[[int, int], bytes]) -> ProbeResult:
+    """Classifies a rom from its size and a few reads of `read(file offset, num bytes)`."""
+    has_ines_header = read(0, len(INES_MAGIC)) == INES_MAGIC
+    if size < MIN_ROM_SIZE:
+        return ProbeResult(PROBE_TRUNCATED, size, has_ines_header, None, False)
+    if not has_ines_header:
+        # The parser skips a header it assumes is there, so every read would be off.
+        return ProbeResult(PROBE_BAD_HEADER, size, has_ines_header, None, False)
+
+    pointers = read(NES_HEADER_OFFSET + OVERWORLD_POINTER_LOCATION,
+                    LEVEL_7_TO_9_POINTER_LOCATION + 2 - OVERWORLD_POINTER_LOCATION)
+
+    def Pointer(address: int) -> int:
+        offset = address - OVERWORLD_POINTER_LOCATION
+        return pointers[offset] + pointers[offset + 1] * 0x100
+
+    level_pointers = (Pointer(LEVEL_1_TO_6_POINTER_LOCATION),
+                      Pointer(LEVEL_7_TO_9_POINTER_LOCATION))
+    if level_pointers == FIRST_QUEST_POINTERS:
+        quest = 'first'
+    elif level_pointers == SECOND_QUEST_POINTERS:
+        quest = 'second'
+    elif (level_pointers[0] in [FIRST_QUEST_POINTERS[0], SECOND_QUEST_POINTERS[0]] and
+          level_pointers[1] in [FIRST_QUEST_POINTERS[1], SECOND_QUEST_POINTERS[1]]):
+        quest = 'mixed'
+    else:
+        quest = None
+    if Pointer(OVERWORLD_POINTER_LOCATION) != OVERWORLD_POINTER or quest is None:
+        return ProbeResult(PROBE_UNKNOWN_LAYOUT, size, has_ines_header, quest, False)
+
+    level_info = read(NES_HEADER_OFFSET + VARIOUS_DATA_LOCATION + STAIRWAY_LIST_TAIL_OFFSET,
+                      9 * LEVEL_INFO_SIZE + 1)
+    is_z1r = all(tail in range(0, 5) for tail in level_info[::LEVEL_INFO_SIZE])
+    return ProbeResult(PROBE_OK, size, has_ines_header, quest, is_z1r)
+
+
+def Probe(rom: Union[RomImage, bytes, bytearray, memoryview]) -> ProbeResult:
+    """Checks whether a rom in memory looks parseable without building a DataExtractor."""
+    buffer = rom.GetBytes() if isinstance(rom, RomImage) else memoryview(rom)
+    return _Probe(len(buffer), lambda offset, num_bytes: bytes(buffer[offset:offset + num_bytes]))
+
+
+def ProbeFile(file_path: str) -> ProbeResult:
+    """Like Probe(), but only reads the few bytes it needs from the file."""
+    with open(file_path, 'rb') as f:
+        fd = f.fileno()
+        if hasattr(os, 'pread'):
+            return _Probe(os.fstat(fd).st_size,
+                          lambda offset, num_bytes: os.pread(fd, num_bytes, offset))
+
+        def Read(offset: int, num_bytes: int) -> bytes:
+            f.seek(offset)
+            return f.read(num_bytes)
+
+        return _Probe(os.fstat(fd).st_size, Read)
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from data_extractor import DataExtractor
+from export_rows import ErrorRow, IterFileRows
+from rom_generator import RomGenerator
+from rom_image import RomImage
+from rom_probe import PROBE_BAD_HEADER, PROBE_OK, PROBE_TRUNCATED, PROBE_UNKNOWN_LAYOUT, Probe
+from rom_probe import ProbeFile
+from testutil import MakeBlankRom
+
+
+class RomProbeTest(unittest.TestCase):
+
+    def test_matches_data_extractor(self):
+        for rom in [bytes(MakeBlankRom()), RomGenerator(seed=8).Generate(0)]:
+            result = Probe(rom)
+            self.assertEqual(PROBE_OK, result.status)
+            self.assertTrue(result.is_supported)
+            self.assertEqual('first', result.quest)
+            self.assertEqual(DataExtractor(RomImage(rom)).is_z1r, result.is_z1r)
+            self.assertEqual(result, Probe(RomImage(rom)))
+
+    def test_second_quest(self):
+        result = Probe(RomGenerator(seed=8, second_quest=True).Generate(0))
+        self.assertEqual(PROBE_OK, result.status)
+        self.assertEqual('second', result.quest)
+
+    def test_unsupported(self):
+        rom = MakeBlankRom()
+        self.assertEqual(PROBE_TRUNCATED, Probe(bytes(rom[:0x18000])).status)
+        rom[0x18013] = 0x85
+        self.assertEqual(PROBE_UNKNOWN_LAYOUT, Probe(bytes(rom)).status)
+        self.assertFalse(Probe(bytes(rom)).is_supported)
+
+    def test_bad_header(self):
+        rom = MakeBlankRom()
+        rom[0:4] = b'NES\x00'
+        result = Probe(bytes(rom))
+        self.assertEqual(PROBE_BAD_HEADER, result.status)
+        self.assertFalse(result.has_ines_header)
+        self.assertFalse(result.is_supported)
+        # The same rom without its header is still the right size, but not supported either.
+        self.assertEqual(PROBE_BAD_HEADER, Probe(bytes(rom[0x10:]) + bytes(0x10)).status)
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            rom_path = os.path.join(temp_dir, 'rom.nes')
+            with open(rom_path, 'wb') as f:
+                f.write(RomGenerator(seed=8).Generate(1)[:0x100])
+            result = ProbeFile(rom_path)
+            self.assertEqual(PROBE_TRUNCATED, result.status)
+            self.assertEqual(0x100, result.size)
+            self.assertEqual([ErrorRow(rom_path, 'Unsupported rom (truncated)')],
+                             list(IterFileRows(rom_path, probe=True)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 from enum import IntEnum
-import io
-from typing import IO, List
-from constants import CHAR_MAP
+import re
+from typing import IO, Dict, List, Union
+import numpy as np
+from lookup_tables import QUOTE_ASCII_PAIRS, QUOTE_KNOWN_BYTES, QUOTE_TABLE
+from lookup_tables import RECORDER_KNOWN_BYTES, RECORDER_TABLE
+from rom_image import RomImage
 
 OVERWORLD_DATA_LOCATION = 0x18400
 LEVEL_1_TO_6_FIRST_QUEST_DATA_LOCATION = 0x18700
@@ -13,7 +16,6 @@ LEVEL_1_TO_6_POINTER_LOCATION = 0x18002
 LEVEL_7_TO_9_POINTER_LOCATION = 0x1800E
 
 VARIOUS_DATA_LOCATION = 0x19300
-NES_HEADER_OFFSET = 0x10
 ARMOS_ITEM_ADDRESS = 0x10CF5
 COAST_ITEM_ADDRESS = 0x1788A
 WS_ITEM_ADDRESS = 0x18607
@@ -21,26 +23,45 @@ TRIFORCE_REQUIREMENT_ADDRESS = 0x5F17
 WHITE_SWORD_REQUIREMENT_ADDRESS = 0x48FD
 MAGICAL_SWORD_REQUIREMENT_ADDRESS = 0x4906
 DOOR_REPAIR_CHARGE_ADDRESS = 0x4890
+QUOTE_POINTER_TABLE_ADDRESS = 0x4000
+RECORDER_TEXT_ADDRESS = 0xB000
+RECORDER_DATA_ADDRESS = 0x2020
+NOTHING_CODE_ADDRESS = 0x1784F
+NUM_QUOTES = 38
+# Raw bytes behind GetRequirements(), in the order triforce, white sword, magical sword, door repair
+REQUIREMENT_ADDRESSES = [
+    TRIFORCE_REQUIREMENT_ADDRESS, WHITE_SWORD_REQUIREMENT_ADDRESS,
+    MAGICAL_SWORD_REQUIREMENT_ADDRESS, DOOR_REPAIR_CHARGE_ADDRESS
+]
+QUOTE_END = re.compile(b'[\xc0-\xff]')
+
+
+def _Translate(raw: bytes, table: Dict[int, str], known_bytes: bytes) -> str:
+    unknown = raw.translate(None, known_bytes)
+    if unknown:
+        raise KeyError(unknown[0])
+    return raw.decode('latin-1').translate(table)
 
 
 class RomReader:
+    """Decodes the tables in a ROM. Reads go through a RomImage, so a RomReader is as safe to
+    share between threads as its RomImage."""
 
-    def __init__(self, rom: io.BytesIO) -> None:
-        self.rom = rom
+    def __init__(self, rom: Union[RomImage, IO[bytes]]) -> None:
+        if isinstance(rom, RomImage):
+            self.rom_image = rom
+        else:
+            self.rom_image = RomImage.FromStream(rom)
 
-    def _ReadMemory(self, address: int, num_bytes: int = 1) -> List[int]:
+    def _ReadMemory(self, address: int, num_bytes: int = 1) -> memoryview:
         assert num_bytes > 0, "num_bytes shouldn't be negative"
-        self.rom.seek(NES_HEADER_OFFSET + address)
-        data = []  # type: List[int]
-        for raw_byte in self.rom.read(num_bytes):
-            data.append(int(raw_byte))
-        return data
+        return self.rom_image.Read(address, num_bytes)
 
-    def _GetLevelBlockPointer(self, addr: int) -> List[int]:
+    def _GetLevelBlockPointer(self, addr: int) -> int:
         val = self._ReadMemory(addr, 0x02)
         return val[1] * 0x100 + val[0]
 
-    def GetLevelBlock(self, level_num: int) -> List[int]:
+    def GetLevelBlock(self, level_num: int) -> memoryview:
         if level_num == 0:
             if self._GetLevelBlockPointer(OVERWORLD_POINTER_LOCATION) == 0x8400:
                 return self._ReadMemory(OVERWORLD_DATA_LOCATION, 0x300)
@@ -56,7 +77,7 @@ class RomReader:
                 return self._ReadMemory(LEVEL_7_TO_9_SECOND_QUEST_DATA_LOCATION, 0x300)
         return []
 
-    def GetLevelInfo(self, level_num: int) -> List[int]:
+    def GetLevelInfo(self, level_num: int) -> memoryview:
         start = VARIOUS_DATA_LOCATION + level_num * 0xFC
         return self._ReadMemory(start, 0xFC)
 
@@ -78,25 +99,51 @@ class RomReader:
                 self._ReadMemory(DOOR_REPAIR_CHARGE_ADDRESS, 0x01)[0],
         }
 
+    def GetRequirementBytes(self) -> List[int]:
+        return [self._ReadMemory(address, 0x01)[0] for address in REQUIREMENT_ADDRESSES]
+
+    def GetQuoteAddress(self, num: int) -> int:
+        assert num in range(0, NUM_QUOTES)
+        pointer = self._ReadMemory(QUOTE_POINTER_TABLE_ADDRESS + 2 * num, 0x02)
+        return (pointer[1] - 0x40) * 0x100 + pointer[0]
+
+    def GetQuoteAddresses(self) -> List[int]:
+        pointers = self._ReadMemory(QUOTE_POINTER_TABLE_ADDRESS, 2 * NUM_QUOTES)
+        return [(pointers[2 * num + 1] - 0x40) * 0x100 + pointers[2 * num]
+                for num in range(0, NUM_QUOTES)]
+
+    def _DecodeQuote(self, address: int) -> str:
+        raw_quote = bytes(self._ReadMemory(address, 0x40))
+        end = QUOTE_END.search(raw_quote)
+        if end:
+            raw_quote = raw_quote[:end.end()]
+        return _Translate(raw_quote, QUOTE_TABLE, QUOTE_KNOWN_BYTES)
+
     def GetQuote(self, num: int) -> str:
-        assert num in range(0, 38)
-        low_byte = self._ReadMemory(0x4000 + 2 * num, 0x01)[0]
-        high_byte = self._ReadMemory(0x4000 + 2 * num + 1, 0x01)[0] - 0x40
-        addr = high_byte * 0x100 + low_byte
-        raw_quote = self._ReadMemory(addr, 0x40)
-        out_quote = ""
-        for val in raw_quote:
-            char = val & 0x3F
-            out_quote += CHAR_MAP[char]
-            high_bits = (val >> 6) & 0x03
-            if high_bits in [1, 2]:
-                out_quote += " "
-            if high_bits == 3:
-                break
-        return out_quote
+        return self._DecodeQuote(self.GetQuoteAddress(num))
+
+    def GetQuotes(self) -> List[str]:
+        """Returns every quote, reading the pointer table once and decoding all quotes together."""
+        addresses = self.GetQuoteAddresses()
+        windows = [self._ReadMemory(address, 0x40) for address in addresses]
+        raw = np.frombuffer(b''.join(windows), dtype=np.uint8).reshape(NUM_QUOTES, 0x40)
+        ends = raw >= 0xC0
+        lengths = np.where(ends.any(axis=1), ends.argmax(axis=1) + 1, 0x40)
+        # One row per quote, ending in a newline
+        codes = np.zeros((NUM_QUOTES, 0x40 + 1), dtype='<u2')
+        codes[:, :-1] = QUOTE_ASCII_PAIRS.take(raw)
+        codes[:, :-1][np.arange(0x40) >= lengths[:, None]] = 0
+        codes[:, -1] = ord('\n')
+        try:
+            text = codes.tobytes().translate(None, b'\0').decode('ascii')
+        except UnicodeDecodeError:
+            # A quote has a byte that isn't in CHAR_MAP, so raise the same
+            # KeyError as decoding it on its own.
+            return [self._DecodeQuote(address) for address in addresses]
+        return text.split('\n')[:-1]
 
     def GetRecorderText(self) -> str:
-        raw_data = self._ReadMemory(0xB000, 0x40)
+        raw_data = bytes(self._ReadMemory(RECORDER_TEXT_ADDRESS, 0x40))
         if raw_data[0] == 0xFF:
             return ""
 
@@ -104,8 +151,8 @@ class RomReader:
         index = 0
         while index < len(raw_data):
             length = raw_data[index]
-            bytes_to_process = raw_data[index + 2:index + 2 + length]
-            word = "".join([CHAR_MAP[val] for val in bytes_to_process])
+            word = _Translate(raw_data[index + 2:index + 2 + length], RECORDER_TABLE,
+                              RECORDER_KNOWN_BYTES)
             if word != "RECORDER":
                 words.append(word)
             index += 2 + length
@@ -113,7 +160,7 @@ class RomReader:
         return ' '.join(words)
 
     def GetRecorderData(self) -> str:
-        raw_data = self._ReadMemory(0x2020, 0x40)
+        raw_data = self._ReadMemory(RECORDER_DATA_ADDRESS, 0x40)
         tbr = []
 
         for val in raw_data:
@@ -123,4 +170,4 @@ class RomReader:
         return tbr
 
     def GetNothingCode(self):
-        return self._ReadMemory(0x1784F, 0x01)[0]
+        return self._ReadMemory(NOTHING_CODE_ADDRESS, 0x01)[0]
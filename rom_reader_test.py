@@ -0,0 +1,40 @@
+import unittest
+from rom_generator import RomGenerator
+from rom_image import RomImage
+from rom_reader import NUM_QUOTES, RomReader
+from testutil import MakeBlankRom
+
+
+class RomReaderTest(unittest.TestCase):
+
+    def test_quotes(self):
+        rom = MakeBlankRom()
+        # Point quote 1 at 0x4100, which holds "HI" with a space after it and ends at "H".
+        rom[0x10 + 0x4000 + 2] = 0x00
+        rom[0x10 + 0x4000 + 3] = 0x81
+        rom[0x10 + 0x4100:0x10 + 0x4105] = bytes([0x11, 0x12 | 0x40, 0x11 | 0xC0, 0x12, 0x12])
+        rom_reader = RomReader(RomImage(bytes(rom)))
+        self.assertEqual('HI H', rom_reader.GetQuote(1))
+        quotes = rom_reader.GetQuotes()
+        self.assertEqual(NUM_QUOTES, len(quotes))
+        self.assertEqual('HI H', quotes[1])
+        self.assertEqual([rom_reader.GetQuote(num) for num in range(0, NUM_QUOTES)], quotes)
+
+    def test_quotes_match_one_at_a_time(self):
+        for n in range(5):
+            rom_reader = RomReader(RomImage(RomGenerator(seed=7).Generate(n)))
+            self.assertEqual([rom_reader.GetQuote(num) for num in range(0, NUM_QUOTES)],
+                             rom_reader.GetQuotes())
+
+    def test_unknown_character(self):
+        rom = MakeBlankRom()
+        rom[0x10 + 0x4000 + 0x30] = 0x30 | 0xC0
+        rom_reader = RomReader(RomImage(bytes(rom)))
+        with self.assertRaises(KeyError):
+            rom_reader.GetQuote(0)
+        with self.assertRaises(KeyError):
+            rom_reader.GetQuotes()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,244 @@
+# Usage:
+#   To serve on port 8000 with a worker process per core:  python rom_service.py --port=8000
+#   To upload a rom:  curl --data-binary @rom.nes http://localhost:8000/roms
+#   To look up part of a rom that was already uploaded, by the hash the upload returned:
+#     curl http://localhost:8000/roms/<hash>/levels/3
+#   Other parts are overworld, shops, quotes, recorder, requirements and overworld_items.
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import json
+import os
+from concurrent.futures import Executor
+from typing import Any, Dict, Optional, Tuple
+from data_extractor import DataExtractor
+from export_rows import PARSE_ERROR
+from rom_image import RomImage
+from rom_probe import Probe
+
+# Roms are 128KiB plus the iNES header. Anything much bigger isn't one.
+MAX_ROM_BYTES = 512 * 1024
+DEFAULT_MAX_PENDING = 64
+DEFAULT_MAX_RESULTS = 1024
+# Seconds a client that got a 503 should wait before retrying
+RETRY_AFTER = 1
+
+
+class UnsupportedRomError(ValueError):
+    pass
+
+
+class ServiceBusyError(RuntimeError):
+    pass
+
+
+class WorkerPoolError(RuntimeError):
+    """The executor can't run parses any more, e.g. a worker process died."""
+
+
+def HashRom(rom: bytes) -> str:
+    return hashlib.blake2b(rom, digest_size=20).hexdigest()
+
+
+def _EncodeJson(value: Any) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def ParseRom(rom: bytes, cache_dir: Optional[str] = None) -> Dict[str, bytes]:
+    """Parses a rom and returns the JSON for each part of it, keyed by its path under /roms/<hash>/.
+
+    The JSON is encoded here, in the worker process, so that the service only
+    has to copy bytes out for each request. '' is the whole rom.
+    """
+    try:
+        data_extractor = DataExtractor(RomImage(rom))
+        if cache_dir:
+            from parse_cache import ParseCache
+            result = ParseCache(cache_dir).Parse(data_extractor)
+        else:
+            data_extractor.Parse()
+            result = data_extractor.GetParseResult()
+    except (IndexError, KeyError, ValueError):
+        raise UnsupportedRomError(PARSE_ERROR)
+
+    levels = {level_num: result['data'][level_num] for level_num in range(1, 10)}
+    parts = {
+        'levels': levels,
+        'overworld': result['data'][0],
+        'shops': result['shop_data'],
+        'quotes': result['quotes'],
+        'recorder': {
+            'text': result['recorder_text'],
+            'data': result['recorder_data']
+        },
+        'requirements': result['requirements'],
+        'overworld_items': result['overworld_items'],
+    }
+    encoded = {name: _EncodeJson(part) for name, part in parts.items()}
+    for level_num, rooms in levels.items():
+        encoded['levels/%d' % level_num] = _EncodeJson(rooms)
+    encoded[''] = _EncodeJson(dict(hash=HashRom(rom), is_z1r=result['is_z1r'], **parts))
+    return encoded
+
+
+class RomService:
+    """Parses roms in an executor and keeps the most recent results, keyed by content hash.
+
+    Concurrent requests for the same rom share a single parse. Once
+    max_pending different roms are waiting on the executor, new roms are
+    turned away with ServiceBusyError until some of them finish. A parse that
+    fails raises UnsupportedRomError, and an executor that can't run it any
+    more raises WorkerPoolError.
+    """
+
+    def __init__(self,
+                 executor: Executor,
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 max_results: int = DEFAULT_MAX_RESULTS,
+                 cache_dir: Optional[str] = None) -> None:
+        self.max_pending = max_pending
+        self.max_results = max_results
+        self._executor = executor
+        self._cache_dir = cache_dir
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._results: collections.OrderedDict[str, Dict[str, bytes]] = collections.OrderedDict()
+
+    def Get(self, rom_hash: str) -> Optional[Dict[str, bytes]]:
+        result = self._results.get(rom_hash)
+        if result is not None:
+            self._results.move_to_end(rom_hash)
+        return result
+
+    def NumPending(self) -> int:
+        return len(self._pending)
+
+    async def Analyze(self, rom: bytes) -> Tuple[str, Dict[str, bytes]]:
+        """Returns the rom's hash and ParseRom() result, parsing it if it isn't already known."""
+        rom_hash = HashRom(rom)
+        result = self.Get(rom_hash)
+        if result is not None:
+            return rom_hash, result
+        future = self._pending.get(rom_hash)
+        if future is None:
+            if len(self._pending) >= self.max_pending:
+                raise ServiceBusyError()
+            probe_result = Probe(rom)
+            if not probe_result.is_supported:
+                raise UnsupportedRomError('Unsupported rom (%s)' % probe_result.status)
+            try:
+                future = asyncio.get_running_loop().run_in_executor(
+                    self._executor, ParseRom, rom, self._cache_dir)
+            except (concurrent.futures.BrokenExecutor, RuntimeError) as e:
+                # RuntimeError is what a shut down executor raises.
+                raise WorkerPoolError(str(e)) from e
+            self._pending[rom_hash] = future
+            future.add_done_callback(functools.partial(self._FinishParse, rom_hash))
+        try:
+            # A client that goes away mid-parse shouldn't cancel the parse for everyone else.
+            return rom_hash, await asyncio.shield(future)
+        except UnsupportedRomError:
+            raise
+        except concurrent.futures.BrokenExecutor as e:
+            raise WorkerPoolError(str(e)) from e
+        except Exception as e:
+            raise UnsupportedRomError(PARSE_ERROR) from e
+
+    def _FinishParse(self, rom_hash: str, future: asyncio.Future) -> None:
+        del self._pending[rom_hash]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._results[rom_hash] = future.result()
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+
+def BuildApp(service: RomService):
+    """Returns a Starlette app serving `service`."""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    def JsonBytesResponse(body: bytes, status_code: int = 200, headers=None) -> Response:
+        return Response(body, status_code, headers, media_type='application/json')
+
+    def ErrorResponse(status_code: int, message: str, headers=None) -> Response:
+        return JSONResponse({'error': message}, status_code, headers)
+
+    async def PostRom(request):
+        try:
+            content_length = int(request.headers.get('content-length', 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            return ErrorResponse(400, 'Invalid Content-Length header')
+        if content_length > MAX_ROM_BYTES:
+            return ErrorResponse(413, 'Roms are at most %d bytes' % MAX_ROM_BYTES)
+        chunks = []
+        num_bytes = 0
+        async for chunk in request.stream():
+            num_bytes += len(chunk)
+            if num_bytes > MAX_ROM_BYTES:
+                return ErrorResponse(413, 'Roms are at most %d bytes' % MAX_ROM_BYTES)
+            chunks.append(chunk)
+        try:
+            rom_hash, result = await service.Analyze(b''.join(chunks))
+        except ServiceBusyError:
+            return ErrorResponse(503, 'Too many roms are being parsed',
+                                 {'Retry-After': str(RETRY_AFTER)})
+        except WorkerPoolError:
+            return ErrorResponse(503, 'Roms can\'t be parsed right now')
+        except UnsupportedRomError as e:
+            return ErrorResponse(422, str(e))
+        return JsonBytesResponse(result[''], headers={'Location': '/roms/%s' % rom_hash})
+
+    async def GetRomPart(request):
+        result = service.Get(request.path_params['rom_hash'])
+        if result is None:
+            return ErrorResponse(404, 'Unknown rom hash. Upload the rom first')
+        part = result.get(request.path_params.get('part', '').strip('/'))
+        if part is None:
+            return ErrorResponse(404, 'Unknown part %s' % request.path_params['part'])
+        return JsonBytesResponse(part)
+
+    return Starlette(routes=[
+        Route('/roms', PostRom, methods=['POST']),
+        Route('/roms/{rom_hash}', GetRomPart, methods=['GET']),
+        Route('/roms/{rom_hash}/{part:path}', GetRomPart, methods=['GET']),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--jobs',
+                        type=int,
+                        default=0,
+                        help='Number of worker processes to parse roms in (0 = one per core)')
+    parser.add_argument('--max-pending',
+                        type=int,
+                        default=DEFAULT_MAX_PENDING,
+                        help='Number of different roms that can wait to be parsed before uploads '
+                        'get a 503')
+    parser.add_argument('--max-results',
+                        type=int,
+                        default=DEFAULT_MAX_RESULTS,
+                        help='Number of parsed roms to keep in memory for lookups by hash')
+    parser.add_argument('--cache-dir',
+                        type=str,
+                        default=None,
+                        help='Directory to cache parse results in, keyed by rom contents')
+    args = parser.parse_args()
+
+    import uvicorn
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs or os.cpu_count()) as executor:
+        service = RomService(executor, args.max_pending, args.max_results, args.cache_dir)
+        uvicorn.run(BuildApp(service), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from data_extractor import DataExtractor
+from export_rows import PARSE_ERROR
+from rom_generator import RomGenerator
+from rom_image import NES_HEADER_OFFSET, RomImage
+from rom_reader import QUOTE_POINTER_TABLE_ADDRESS
+from rom_service import BuildApp, HashRom, RomService, ServiceBusyError, UnsupportedRomError
+from rom_service import WorkerPoolError
+
+
+class CountingExecutor(ThreadPoolExecutor):
+
+    def __init__(self) -> None:
+        super().__init__(max_workers=2)
+        self.num_submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.num_submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+async def CallApp(app, method, path, body=b'', content_length=None):
+    """Sends one request straight to an ASGI app and returns (status, headers, body)."""
+    if content_length is None:
+        content_length = str(len(body))
+    scope = {
+        'type': 'http',
+        'asgi': {
+            'version': '3.0'
+        },
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'content-length', content_length.encode())],
+        'server': ('testserver', 80),
+        'client': ('testclient', 1),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    response = {'body': b''}
+
+    async def Receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def Send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {
+                key.decode(): value.decode() for key, value in message['headers']
+            }
+        else:
+            response['body'] += message.get('body', b'')
+
+    await app(scope, Receive, Send)
+    return response['status'], response['headers'], response['body']
+
+
+class RomServiceTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.executor = CountingExecutor()
+        self.generator = RomGenerator(seed=6)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    async def test_analyze(self):
+        rom = self.generator.Generate(0)
+        service = RomService(self.executor)
+        rom_hash, result = await service.Analyze(rom)
+        self.assertEqual(HashRom(rom), rom_hash)
+        de = DataExtractor(RomImage(rom))
+        self.assertEqual({str(room_num): room for room_num, room in de.data[3].items()},
+                         json.loads(result['levels/3']))
+        self.assertEqual(de.GetQuotes(), json.loads(result['quotes']))
+        whole = json.loads(result[''])
+        self.assertEqual(rom_hash, whole['hash'])
+        self.assertEqual(json.loads(result['shops']), whole['shops'])
+        self.assertIs(result, service.Get(rom_hash))
+
+    async def test_coalesces_identical_roms(self):
+        rom = self.generator.Generate(1)
+        service = RomService(self.executor)
+        results = await asyncio.gather(*[service.Analyze(rom) for _ in range(5)])
+        self.assertEqual(1, self.executor.num_submitted)
+        self.assertTrue(all(result is results[0][1] for _, result in results))
+        await service.Analyze(rom)
+        self.assertEqual(1, self.executor.num_submitted)
+        self.assertEqual(0, service.NumPending())
+
+    async def test_backpressure(self):
+        service = RomService(self.executor, max_pending=1, max_results=1)
+        first = asyncio.ensure_future(service.Analyze(self.generator.Generate(2)))
+        await asyncio.sleep(0)
+        with self.assertRaises(ServiceBusyError):
+            await service.Analyze(self.generator.Generate(3))
+        first_hash, _ = await first
+        second_hash, _ = await service.Analyze(self.generator.Generate(3))
+        self.assertIsNone(service.Get(first_hash))
+        self.assertIsNotNone(service.Get(second_hash))
+
+    async def test_unsupported_rom(self):
+        service = RomService(self.executor)
+        with self.assertRaises(UnsupportedRomError):
+            await service.Analyze(self.generator.Generate(4)[:0x100])
+        self.assertEqual(0, self.executor.num_submitted)
+
+    async def test_app(self):
+        rom = self.generator.Generate(5)
+        app = BuildApp(RomService(self.executor))
+        status, headers, body = await CallApp(app, 'POST', '/roms', rom)
+        self.assertEqual(200, status)
+        rom_hash = json.loads(body)['hash']
+        self.assertEqual('/roms/%s' % rom_hash, headers['location'])
+
+        status, _, body = await CallApp(app, 'GET', '/roms/%s/levels/1' % rom_hash)
+        self.assertEqual(200, status)
+        _, _, whole = await CallApp(app, 'GET', '/roms/%s' % rom_hash)
+        self.assertEqual(json.loads(whole)['levels']['1'], json.loads(body))
+        self.assertEqual(404, (await CallApp(app, 'GET', '/roms/%s/levels/10' % rom_hash))[0])
+        self.assertEqual(404, (await CallApp(app, 'GET', '/roms/0123'))[0])
+        self.assertEqual(422, (await CallApp(app, 'POST', '/roms', rom[:0x100]))[0])
+        self.assertEqual(413, (await CallApp(app, 'POST', '/roms', bytes(0x100000)))[0])
+        for content_length in ['ten', '-1']:
+            self.assertEqual(400, (await CallApp(app, 'POST', '/roms', rom, content_length))[0])
+
+    async def test_process_pool(self):
+        # Results and errors have to make it back from the worker processes.
+        rom = self.generator.Generate(6)
+        # Passes the probe, but the first quote's pointer is outside the rom.
+        bad_rom = bytearray(self.generator.Generate(7))
+        pointer = NES_HEADER_OFFSET + QUOTE_POINTER_TABLE_ADDRESS
+        bad_rom[pointer:pointer + 2] = bytes(2)
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            app = BuildApp(RomService(executor))
+            status, _, body = await CallApp(app, 'POST', '/roms', rom)
+            self.assertEqual(200, status)
+            _, expected = await RomService(self.executor).Analyze(rom)
+            self.assertEqual(expected[''], body)
+            status, _, body = await CallApp(app, 'POST', '/roms', bytes(bad_rom))
+            self.assertEqual(422, status)
+            self.assertEqual({'error': PARSE_ERROR}, json.loads(body))
+
+            # A worker that dies takes the pool down with it.
+            with self.assertRaises(BrokenProcessPool):
+                executor.submit(os._exit, 1).result()
+            with self.assertRaises(WorkerPoolError):
+                await RomService(executor).Analyze(self.generator.Generate(8))
+            status, _, _ = await CallApp(app, 'POST', '/roms', self.generator.Generate(8))
+            self.assertEqual(503, status)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,278 @@
+from typing import Any, Dict, List
+import numpy as np
+from constants import Direction, WallType
+from level_decoder import DecodedLevel
+from lookup_tables import DOOR_LABEL_ARRAY, ENEMY_COUNT_PREFIX_ARRAY, ENEMY_COUNT_SHOWN_ARRAY
+from lookup_tables import ENEMY_INFO_LABEL_ARRAY, ENEMY_TYPE_LABEL_ARRAY, HEX_LABEL_ARRAY
+from lookup_tables import ITEM_LABEL_ARRAY, ITEM_LABELS, ROOM_NUM_LABEL_ARRAY
+from lookup_tables import ROOM_TYPE_LABEL_ARRAY
+
+NUM_ROOMS = 0x80
+NUM_LEVELS = 10
+NO_STAIRWAY_ITEM = 0xFF
+
+ROOM_TABLE_DTYPE = np.dtype([
+    ('level', 'u1'),
+    ('room', 'u1'),
+    ('col', 'i1'),
+    ('row', 'i1'),
+    ('visit', 'u1'),
+    ('room_type', 'u1'),
+    ('enemy_code', 'u1'),
+    ('enemy_num', 'u1'),
+    ('item_code', 'u1'),
+    ('item_hidden', '?'),
+    ('is_drop', '?'),
+    ('north_wall', 'u1'),
+    ('east_wall', 'u1'),
+    ('south_wall', 'u1'),
+    ('west_wall', 'u1'),
+    ('stair_item', 'u1'),
+    ('stairway_num', 'u1'),
+])
+
+# Column name, marker offset for doors and offset for solid walls, per direction.
+WALL_LAYOUT = [
+    ('north', Direction.NORTH, (-.5, -.05), (-.5, 0)),
+    ('east', Direction.EAST, (-.05, -.5), (0, -.5)),
+    ('south', Direction.SOUTH, (-.5, -.95), (-.5, -1)),
+    ('west', Direction.WEST, (-.95, -.5), (-1, -.5)),
+]
+
+DOOR_COLORS = {
+    WallType.BOMB_HOLE: 'blue',
+    WallType.LOCKED_DOOR_1: 'orange',
+    WallType.LOCKED_DOOR_2: 'orange',
+    WallType.WALK_THROUGH_WALL_1: 'purple',
+    WallType.WALK_THROUGH_WALL_2: 'purple',
+    WallType.SHUTTER_DOOR: 'brown',
+    WallType.DOOR: 'black'
+}
+# Door marker colors as drawn, with open doors in dark gray rather than black
+DOOR_RENDER_COLORS = {**DOOR_COLORS, WallType.DOOR: '#333333'}
+DOOR_RENDER_COLOR_ARRAY = np.array([DOOR_RENDER_COLORS.get(code) for code in range(0x100)],
+                                   dtype=object)
+# Width and height of the bar drawn for a solid wall on each side of a room
+WALL_BAR_SIZES = {'north': (1, .05), 'east': (.05, 1), 'south': (1, .05), 'west': (.05, 1)}
+# Glyphs are drawn in this order, so later sides are on top where they overlap.
+RENDER_SIDE_ORDER = ['north', 'south', 'east', 'west']
+
+
+class RoomTable:
+    """Columnar room data for one or more levels.
+
+    Rooms are stored as integer codes in a NumPy structured array (one row per
+    reachable room, in visit order within each level) and are only turned into
+    display labels by ToColumns(). Rows can be looked up by (level, room).
+    """
+
+    def __init__(self, rooms: np.ndarray) -> None:
+        assert rooms.dtype == ROOM_TABLE_DTYPE
+        self.rooms = rooms
+        self._index = np.full((NUM_LEVELS, NUM_ROOMS), -1, dtype=np.int32)
+        self._index[rooms['level'], rooms['room']] = np.arange(len(rooms), dtype=np.int32)
+
+    @classmethod
+    def FromDecodedLevel(cls, level_num: int, decoded: DecodedLevel, room_nums: List[int],
+                         display_offset: int, nothing_code: int, item_stairways: Dict[int, int],
+                         stairway_exits: List[List[int]]) -> "RoomTable":
+        room_array = np.asarray(room_nums, dtype=np.intp)
+        rooms = np.zeros(len(room_nums), dtype=ROOM_TABLE_DTYPE)
+        rooms['level'] = level_num
+        rooms['room'] = room_array
+        rooms['col'] = (room_array + display_offset) % 0x10
+        rooms['row'] = 8 - room_array // 0x10
+        rooms['visit'] = np.arange(len(room_nums))
+        rooms['north_wall'] = decoded.north_walls[room_array]
+        rooms['south_wall'] = decoded.south_walls[room_array]
+        rooms['west_wall'] = decoded.west_walls[room_array]
+        rooms['east_wall'] = decoded.east_walls[room_array]
+        rooms['room_type'] = decoded.room_types[room_array]
+        rooms['enemy_code'] = decoded.enemy_codes[room_array]
+        rooms['enemy_num'] = decoded.enemy_nums[room_array]
+        rooms['item_code'] = decoded.item_codes[room_array]
+        rooms['item_hidden'] = ((rooms['item_code'] == nothing_code) &
+                                (rooms['enemy_code'] != 0x3E))
+        rooms['is_drop'] = decoded.is_drop[room_array]
+
+        rooms['stair_item'] = NO_STAIRWAY_ITEM
+        row_for_room = {room_num: row for row, room_num in enumerate(room_nums)}
+        for room_num, item_code in item_stairways.items():
+            rooms['stair_item'][row_for_room[room_num]] = item_code
+        for stairway_num, exits in enumerate(stairway_exits, 1):
+            for exit_room_num in exits:
+                rooms['stairway_num'][row_for_room[exit_room_num]] = stairway_num
+        return cls(rooms)
+
+    @classmethod
+    def Concatenate(cls, tables: List["RoomTable"]) -> "RoomTable":
+        if not tables:
+            return cls(np.zeros(0, dtype=ROOM_TABLE_DTYPE))
+        return cls(np.concatenate([table.rooms for table in tables]))
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+    def __contains__(self, key) -> bool:
+        level_num, room_num = key
+        return self._index[level_num, room_num] >= 0
+
+    def __getitem__(self, key) -> np.void:
+        level_num, room_num = key
+        row = self._index[level_num, room_num]
+        if row < 0:
+            raise KeyError(key)
+        return self.rooms[row]
+
+    def ForLevel(self, level_num: int) -> "RoomTable":
+        return RoomTable(self.rooms[self.rooms['level'] == level_num])
+
+    def ToColumns(self) -> Dict[str, List[Any]]:
+        """Returns display columns ready for a Bokeh ColumnDataSource or pandas.
+
+        Column names match DataExtractor.data's room keys with '.' replaced by
+        '_'. Door and wall columns that don't apply to a room are NaN/None.
+        """
+        rooms = self.rooms
+        col = rooms['col'].astype(float)
+        row = rooms['row'].astype(float)
+        columns: Dict[str, Any] = {
+            'level': rooms['level'].tolist(),
+            'col': rooms['col'].tolist(),
+            'x_coord': (col - .5).tolist(),
+            'row': rooms['row'].tolist(),
+            'y_coord': (row - .5).tolist(),
+        }
+        columns.update(self._LabelColumns())
+
+        visit_order = self._VisitOrder()
+        for name, direction, door_offset, wall_offset in WALL_LAYOUT:
+            wall_types = rooms['%s_wall' % name]
+            is_solid = wall_types == WallType.SOLID_WALL
+            neighbor_seen = self._NeighborSeen(visit_order, direction)
+            columns['%s_x' % name] = np.where(is_solid, np.nan, col + door_offset[0]).tolist()
+            columns['%s_y' % name] = np.where(is_solid, np.nan, row + door_offset[1]).tolist()
+            columns['%s_wall_x' % name] = np.where(is_solid, col + wall_offset[0], np.nan).tolist()
+            columns['%s_wall_y' % name] = np.where(is_solid, row + wall_offset[1], np.nan).tolist()
+            columns['%s_wall_type' % name] = DOOR_LABEL_ARRAY.take(wall_types).tolist()
+            columns['%s_color' % name] = [
+                ('red' if seen else None) if solid else DOOR_COLORS[code]
+                for code, solid, seen in zip(wall_types.tolist(), is_solid.tolist(),
+                                             neighbor_seen.tolist())
+            ]
+        return columns
+
+    def ToRenderPayload(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the columns of a level map's ColumnDataSources, one per kind of glyph.
+
+        rooms has a row per room with its position, labels and tooltips. doors
+        has a marker per door, colored with DOOR_RENDER_COLORS. walls has a bar
+        per solid wall that's drawn red; the others would be drawn in the
+        background color, so they're left out. Every row has its level, for
+        tables of several levels. Numbers are NumPy arrays, which Bokeh sends
+        to the browser as binary.
+        """
+        rooms = self.rooms
+        col = rooms['col'].astype(float)
+        row = rooms['row'].astype(float)
+        room_columns: Dict[str, Any] = {
+            'level': rooms['level'].astype(np.int32),
+            'col': rooms['col'].astype(np.int32),
+            'row': rooms['row'].astype(np.int32),
+            'x_coord': col - .5,
+            'y_coord': row - .5,
+        }
+        room_columns.update(self._LabelColumns())
+
+        layout = {name: (direction, door_offset, wall_offset)
+                  for name, direction, door_offset, wall_offset in WALL_LAYOUT}
+        visit_order = self._VisitOrder()
+        door_levels, door_x, door_y, door_colors = [], [], [], []
+        wall_levels, wall_x, wall_y, wall_widths, wall_heights = [], [], [], [], []
+        for name in RENDER_SIDE_ORDER:
+            direction, door_offset, wall_offset = layout[name]
+            wall_types = rooms['%s_wall' % name]
+            is_solid = wall_types == WallType.SOLID_WALL
+            is_door = ~is_solid
+            door_levels.append(rooms['level'][is_door])
+            door_x.append(col[is_door] + door_offset[0])
+            door_y.append(row[is_door] + door_offset[1])
+            door_colors.extend(DOOR_RENDER_COLOR_ARRAY.take(wall_types[is_door]).tolist())
+            is_red = is_solid & self._NeighborSeen(visit_order, direction)
+            wall_levels.append(rooms['level'][is_red])
+            wall_x.append(col[is_red] + wall_offset[0])
+            wall_y.append(row[is_red] + wall_offset[1])
+            width, height = WALL_BAR_SIZES[name]
+            wall_widths.append(np.full(np.count_nonzero(is_red), width, dtype=float))
+            wall_heights.append(np.full(np.count_nonzero(is_red), height, dtype=float))
+        return {
+            'rooms': room_columns,
+            'doors': {
+                'level': np.concatenate(door_levels).astype(np.int32),
+                'x': np.concatenate(door_x),
+                'y': np.concatenate(door_y),
+                'color': door_colors
+            },
+            'walls': {
+                'level': np.concatenate(wall_levels).astype(np.int32),
+                'x': np.concatenate(wall_x),
+                'y': np.concatenate(wall_y),
+                'width': np.concatenate(wall_widths),
+                'height': np.concatenate(wall_heights)
+            },
+        }
+
+    def _LabelColumns(self) -> Dict[str, List[str]]:
+        rooms = self.rooms
+        columns = {
+            'room_num': ROOM_NUM_LABEL_ARRAY.take(rooms['room']).tolist(),
+            'room_type': ROOM_TYPE_LABEL_ARRAY.take(rooms['room_type']).tolist(),
+            'enemy_num_tooltip': HEX_LABEL_ARRAY.take(rooms['enemy_num']).tolist(),
+            'enemy_type_tooltip': ENEMY_TYPE_LABEL_ARRAY.take(rooms['enemy_code']).tolist(),
+            'enemy_info': np.where(
+                ENEMY_COUNT_SHOWN_ARRAY.take(rooms['enemy_code']),
+                ENEMY_COUNT_PREFIX_ARRAY.take(rooms['enemy_num']) +
+                ENEMY_INFO_LABEL_ARRAY.take(rooms['enemy_code']),
+                ENEMY_INFO_LABEL_ARRAY.take(rooms['enemy_code'])).tolist(),
+            'item_info': np.where(
+                rooms['item_hidden'], '',
+                np.where(rooms['is_drop'], 'D ', '').astype(object) +
+                ITEM_LABEL_ARRAY.take(rooms['item_code'])).tolist(),
+        }
+
+        stair_info = []
+        stair_tooltip = []
+        for stairway_num, stair_item in zip(rooms['stairway_num'].tolist(),
+                                            rooms['stair_item'].tolist()):
+            if stairway_num:
+                stair_info.append('Stair #%d' % stairway_num)
+                stair_tooltip.append('Stairway #%d' % stairway_num)
+            elif stair_item != NO_STAIRWAY_ITEM:
+                stair_info.append(ITEM_LABELS[stair_item])
+                stair_tooltip.append(ITEM_LABELS[stair_item])
+            else:
+                stair_info.append('')
+                stair_tooltip.append('None')
+        columns['stair_info'] = stair_info
+        columns['stair_tooltip'] = stair_tooltip
+        return columns
+
+    def _VisitOrder(self) -> np.ndarray:
+        visit_order = np.full((NUM_LEVELS, NUM_ROOMS), NUM_ROOMS, dtype=np.int16)
+        visit_order[self.rooms['level'], self.rooms['room']] = self.rooms['visit']
+        return visit_order
+
+    def _NeighborSeen(self, visit_order: np.ndarray, direction: Direction) -> np.ndarray:
+        """Returns whether each room's neighbor in `direction` was visited before it.
+
+        A solid wall is drawn red when the room behind it was reached first.
+        """
+        rooms = self.rooms
+        neighbors = rooms['room'].astype(np.intp) + int(direction)
+        in_range = (neighbors >= 0) & (neighbors < NUM_ROOMS)
+        neighbor_visit = visit_order[rooms['level'], np.clip(neighbors, 0, NUM_ROOMS - 1)]
+        return in_range & (neighbor_visit < rooms['visit'])
+
+    def ToDataFrame(self):
+        import pandas as pd
+        return pd.DataFrame(self.ToColumns())
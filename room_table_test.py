@@ -0,0 +1,70 @@
+import math
+import random
+import unittest
+from data_extractor import DataExtractor
+from rom_image import RomImage
+from room_table import RENDER_SIDE_ORDER, WALL_BAR_SIZES
+from testutil import MakeBlankRom
+
+
+class RoomTableTest(unittest.TestCase):
+
+    def setUp(self):
+        rom = MakeBlankRom()
+        rng = random.Random(1234)
+        # Scramble the walls, enemies, items and flags of levels 1-6.
+        start = 0x10 + 0x18700
+        rom[start:start + 3 * 0x80] = bytes(rng.randrange(256) for _ in range(3 * 0x80))
+        rom[start + 4 * 0x80:start + 6 * 0x80] = bytes(rng.randrange(256) for _ in range(0x100))
+        self.de = DataExtractor(RomImage(bytes(rom)))
+        self.de.Parse()
+
+    def test_columns_match_room_dicts(self):
+        for level_num in range(1, 10):
+            columns = self.de.GetRoomTable([level_num]).ToColumns()
+            rooms = list(self.de.data[level_num].values())
+            self.assertEqual(len(rooms), len(columns['room_num']))
+            for row, room in enumerate(rooms):
+                room = {key.replace('.', '_'): value for key, value in room.items()}
+                for key, value in room.items():
+                    self.assertEqual(value, columns[key][row], '%s in level %d' % (key, level_num))
+                for key, values in columns.items():
+                    if key != 'level' and key not in room:
+                        self.assertTrue(values[row] is None or math.isnan(values[row]), key)
+
+    def test_render_payload_matches_columns(self):
+        num_walls = 0
+        for level_num in range(1, 10):
+            columns = self.de.GetRoomTable([level_num]).ToColumns()
+            payload = self.de.GetLevelRenderPayload(level_num)
+            for key, values in payload['rooms'].items():
+                self.assertEqual(columns[key], list(values), key)
+            doors = []
+            walls = []
+            for name in RENDER_SIDE_ORDER:
+                for x, y, color, wall_x, wall_y in zip(columns['%s_x' % name],
+                                                       columns['%s_y' % name],
+                                                       columns['%s_color' % name],
+                                                       columns['%s_wall_x' % name],
+                                                       columns['%s_wall_y' % name]):
+                    if not math.isnan(x):
+                        doors.append((level_num, x, y, '#333333' if color == 'black' else color))
+                    elif color == 'red':
+                        walls.append((level_num, wall_x, wall_y) + WALL_BAR_SIZES[name])
+            self.assertEqual(doors, list(zip(*payload['doors'].values())))
+            self.assertEqual(walls, list(zip(*payload['walls'].values())))
+            num_walls += len(walls)
+        self.assertTrue(num_walls)
+
+    def test_lookup_by_level_and_room(self):
+        table = self.de.GetRoomTable()
+        start_room = self.de.GetLevelStartRoomNumber(1)
+        self.assertIn((1, start_room), table)
+        self.assertEqual(start_room, table[1, start_room]['room'])
+        self.assertEqual(len(self.de.data[4]), len(table.ForLevel(4)))
+        with self.assertRaises(KeyError):
+            table[0, 0]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+import abc
+import csv
+import json
+import os
+from typing import IO, Any, Dict, Iterable, List, Optional
+from export_rows import ROW_KINDS, Row
+
+FORMATS = ['lines', 'csv', 'ndjson', 'parquet']
+DEFAULT_BATCH_SIZE = 1024
+
+
+class RowWriter(abc.ABC):
+    """Buffers rows and writes them out `batch_size` at a time.
+
+    Subclasses implement _WriteBatch(kind, rows). Each batch holds rows of one
+    kind, unless the subclass sets batch_by_kind = False to write rows of all
+    kinds in the order they come in, in which case kind is None.
+    """
+
+    batch_by_kind = True
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.batch_size = batch_size
+        self._batches: Dict[Optional[str], List[Row]] = {}
+
+    def Write(self, row: Row) -> None:
+        kind = ROW_KINDS[type(row)] if self.batch_by_kind else None
+        batch = self._batches.setdefault(kind, [])
+        batch.append(row)
+        if len(batch) >= self.batch_size:
+            self._WriteBatch(kind, batch)
+            self._batches[kind] = []
+
+    def WriteRows(self, rows: Iterable[Row]) -> None:
+        for row in rows:
+            self.Write(row)
+
+    def Flush(self) -> None:
+        for kind, batch in self._batches.items():
+            if batch:
+                self._WriteBatch(kind, batch)
+        self._batches = {}
+
+    def Close(self) -> None:
+        self.Flush()
+
+    @abc.abstractmethod
+    def _WriteBatch(self, kind: Optional[str], rows: List[Row]) -> None:
+        pass
+
+    def __enter__(self) -> "RowWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.Close()
+
+
+class LinesRowWriter(RowWriter):
+    """Writes rows as the CLI's original comma-joined lines, in the order they come in."""
+
+    batch_by_kind = False
+
+    def __init__(self,
+                 stream: IO[str],
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 close_stream: bool = False) -> None:
+        super().__init__(batch_size)
+        self.stream = stream
+        self.close_stream = close_stream
+
+    def _WriteBatch(self, kind: Optional[str], rows: List[Row]) -> None:
+        self.stream.write(''.join(row.ToCSV() + '\n' for row in rows))
+
+    def Flush(self) -> None:
+        super().Flush()
+        self.stream.flush()
+
+    def Close(self) -> None:
+        self.Flush()
+        if self.close_stream:
+            self.stream.close()
+
+
+class NdjsonRowWriter(RowWriter):
+    """Writes one JSON object per row, with the row's table name under "kind", in the order they
+    come in."""
+
+    batch_by_kind = False
+
+    def __init__(self,
+                 stream: IO[str],
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 close_stream: bool = False) -> None:
+        super().__init__(batch_size)
+        self.stream = stream
+        self.close_stream = close_stream
+
+    def _WriteBatch(self, kind: Optional[str], rows: List[Row]) -> None:
+        lines = []
+        for row in rows:
+            record: Dict[str, Any] = {'kind': ROW_KINDS[type(row)]}
+            record.update(row._asdict())
+            lines.append(json.dumps(record) + '\n')
+        self.stream.write(''.join(lines))
+
+    def Flush(self) -> None:
+        super().Flush()
+        self.stream.flush()
+
+    def Close(self) -> None:
+        self.Flush()
+        if self.close_stream:
+            self.stream.close()
+
+
+class CsvTableWriter(RowWriter):
+    """Writes each kind of row to <output_dir>/<kind>.csv, with a header and proper quoting."""
+
+    def __init__(self, output_dir: str, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        super().__init__(batch_size)
+        self.output_dir = output_dir
+        self._files: Dict[str, IO[str]] = {}
+        self._writers: Dict[str, Any] = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _WriteBatch(self, kind: str, rows: List[Row]) -> None:
+        if kind not in self._writers:
+            self._files[kind] = open(os.path.join(self.output_dir, '%s.csv' % kind),
+                                     'w',
+                                     newline='')
+            self._writers[kind] = csv.writer(self._files[kind])
+            self._writers[kind].writerow(rows[0]._fields)
+        self._writers[kind].writerows(rows)
+
+    def Close(self) -> None:
+        self.Flush()
+        for f in self._files.values():
+            f.close()
+
+
+class ParquetTableWriter(RowWriter):
+    """Writes each kind of row to <output_dir>/<kind>.parquet, one row group per batch.
+
+    Needs pyarrow, an optional dependency that is only imported when this writer is used.
+    """
+
+    def __init__(self,
+                 output_dir: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 compression: str = 'zstd') -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError('The parquet format needs pyarrow (pip install pyarrow)') from e
+        super().__init__(batch_size)
+        self.output_dir = output_dir
+        self.compression = compression
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._writers: Dict[str, Any] = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _GetSchema(self, row_class: type):
+        arrow_types = {str: self._pa.string(), int: self._pa.int64(), bool: self._pa.bool_()}
+        return self._pa.schema([(name, arrow_types[field_type])
+                                for name, field_type in row_class.__annotations__.items()])
+
+    def _WriteBatch(self, kind: str, rows: List[Row]) -> None:
+        if kind not in self._writers:
+            self._writers[kind] = self._pq.ParquetWriter(
+                os.path.join(self.output_dir, '%s.parquet' % kind),
+                self._GetSchema(type(rows[0])),
+                compression=self.compression)
+        schema = self._writers[kind].schema
+        self._writers[kind].write_batch(
+            self._pa.record_batch([list(column) for column in zip(*rows)], schema=schema))
+
+    def Close(self) -> None:
+        self.Flush()
+        for writer in self._writers.values():
+            writer.close()
+
+
+def OpenRowWriter(output_format: str, stream: IO[str], output_dir: Optional[str] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> RowWriter:
+    """Returns a writer for one of FORMATS.
+
+    csv and parquet write a table per kind of row into output_dir. lines and
+    ndjson write to the stream unless output_dir is given for ndjson, in which
+    case it writes <output_dir>/rows.ndjson.
+    """
+    if output_format == 'lines':
+        return LinesRowWriter(stream, batch_size)
+    if output_format == 'ndjson':
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            return NdjsonRowWriter(open(os.path.join(output_dir, 'rows.ndjson'), 'w'),
+                                   batch_size,
+                                   close_stream=True)
+        return NdjsonRowWriter(stream, batch_size)
+    if not output_dir:
+        raise ValueError('The %s format needs an output directory' % output_format)
+    if output_format == 'csv':
+        return CsvTableWriter(output_dir, batch_size)
+    if output_format == 'parquet':
+        return ParquetTableWriter(output_dir, batch_size)
+    raise ValueError('Unknown output format %s' % output_format)
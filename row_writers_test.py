@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from export_rows import ErrorRow, IterFileRows, LevelRoomRow, RequirementRow
+from rom_generator import RomGenerator
+from row_writers import CsvTableWriter, NdjsonRowWriter, OpenRowWriter, RowWriter
+
+
+class RowWritersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rom_path = os.path.join(self.temp_dir.name, 'rom.nes')
+        with open(rom_path, 'wb') as f:
+            f.write(RomGenerator(seed=3).Generate(0))
+        self.rows = list(IterFileRows(rom_path)) + [ErrorRow('bad,rom.nes', 'Error parsing')]
+        self.output_dir = os.path.join(self.temp_dir.name, 'out')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_row_writer_is_abstract(self):
+        with self.assertRaises(TypeError):
+            RowWriter()
+
+    def test_csv_tables(self):
+        with CsvTableWriter(self.output_dir, batch_size=5) as writer:
+            writer.WriteRows(self.rows)
+        with open(os.path.join(self.output_dir, 'level_rooms.csv'), newline='') as f:
+            level_rows = list(csv.reader(f))
+        self.assertEqual(list(LevelRoomRow._fields), level_rows[0])
+        self.assertEqual([list(map(str, row)) for row in self.rows if isinstance(row, LevelRoomRow)],
+                         level_rows[1:])
+        with open(os.path.join(self.output_dir, 'errors.csv'), newline='') as f:
+            self.assertEqual([['file_path', 'error'], ['bad,rom.nes', 'Error parsing']],
+                             list(csv.reader(f)))
+
+    def test_ndjson(self):
+        stream = io.StringIO()
+        with NdjsonRowWriter(stream, batch_size=7) as writer:
+            writer.WriteRows(self.rows)
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(len(self.rows), len(records))
+        self.assertEqual('level_rooms', records[0]['kind'])
+        requirement = [record for record in records if record['kind'] == 'requirements'][0]
+        self.assertIsInstance(requirement['value'], int)
+        self.assertIn('is_vanilla', requirement)
+
+    def test_parquet(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+        with OpenRowWriter('parquet', io.StringIO(), self.output_dir, batch_size=10) as writer:
+            writer.WriteRows(self.rows)
+        table = pq.read_table(os.path.join(self.output_dir, 'requirements.parquet'))
+        self.assertEqual(list(RequirementRow._fields), table.column_names)
+        self.assertEqual([tuple(row) for row in self.rows if isinstance(row, RequirementRow)],
+                         list(zip(*table.to_pydict().values())))
+        levels = pq.read_table(os.path.join(self.output_dir, 'level_rooms.parquet'))
+        self.assertEqual(sum(isinstance(row, LevelRoomRow) for row in self.rows), levels.num_rows)
+
+    def test_needs_output_dir(self):
+        with self.assertRaises(ValueError):
+            OpenRowWriter('csv', io.StringIO())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+"""Helpers shared by the unit tests."""
+from rom_generator import INES_HEADER
+
+
+def MakeBlankRom(room_type: int = 0x00) -> bytearray:
+    """Returns a headered first-quest ROM whose dungeon rooms all have open doors."""
+    rom = bytearray(0x20010)
+    rom[0:0x10] = INES_HEADER
+    rom[0x18010:0x18012] = bytes([0x00, 0x84])
+    rom[0x18012:0x18014] = bytes([0x00, 0x87])
+    rom[0x1801E:0x18020] = bytes([0x00, 0x8A])
+    for level_num in range(0, 10):
+        start = 0x10 + 0x19300 + level_num * 0xFC
+        rom[start + 0x2D] = 0x03
+        rom[start + 0x2F] = 0x73
+        rom[start + 0x34:start + 0x3E] = bytes([0xFF] * 10)
+    for num in range(0, 38):
+        rom[0x10 + 0x4000 + 2 * num + 1] = 0x80
+    for block_start in [0x18700, 0x18A00]:
+        start = 0x10 + block_start + 3 * 0x80
+        rom[start:start + 0x80] = bytes([room_type] * 0x80)
+    return rom